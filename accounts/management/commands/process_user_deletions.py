@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from accounts.services import DELETE_CHUNK_SIZE, claim_deletion, delete_user_data, pending_deletions
+
+
+class Command(BaseCommand):
+    help = "Xoá các user đang chờ xoá (trang quản trị) và chạy tiếp các lần xoá bị ngắt (cron mỗi phút)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DELETE_CHUNK_SIZE)
+
+    def handle(self, *args, **opts):
+        done = 0
+        for job in pending_deletions():
+            if not claim_deletion(job):
+                continue  # process khác vừa nhận
+            try:
+                n = delete_user_data(job.user_id, chunk_size=opts["chunk_size"])
+            except Exception as exc:
+                # đã ghi state="error" vào UserDeletion; xử lý tiếp user khác
+                self.stderr.write(f"Xoá user {job.user_id} thất bại: {exc}")
+                continue
+            done += 1
+            self.stdout.write(f"Đã xoá user {job.username or job.user_id} ({n} dòng dữ liệu).")
+        self.stdout.write(self.style.SUCCESS(f"Đã xử lý {done} yêu cầu xoá user."))
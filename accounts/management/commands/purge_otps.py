@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.services import purge_stale_otps
+
+
+class Command(BaseCommand):
+    help = "Xoá các mã OTP đặt lại mật khẩu đã dùng hoặc đã hết hạn (theo lô)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        n = purge_stale_otps(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Đã xoá {n} mã OTP cũ."))
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.services import DELETE_CHUNK_SIZE, delete_user_data
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Xoá user và toàn bộ dữ liệu theo lô (dùng cho user có lịch sử lớn, hoặc xoá tiếp 1 user khi lần xoá trước bị lỗi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="ID hoặc username")
+        parser.add_argument("--chunk-size", type=int, default=DELETE_CHUNK_SIZE)
+
+    def handle(self, *args, **opts):
+        ident = opts["user"]
+        lookup = {"pk": int(ident)} if ident.isdigit() else {"username": ident}
+        user = User.objects.filter(**lookup).first()
+        if user is None:
+            raise CommandError(f"Không tìm thấy user {ident}")
+        if user.is_superuser:
+            raise CommandError("Không xoá tài khoản quản trị viên.")
+
+        n = delete_user_data(user.pk, chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Đã xoá user {user.username} ({n} dòng dữ liệu)."))
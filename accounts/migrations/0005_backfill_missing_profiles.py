@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    # User tạo bằng migration (vd admin ở 0004) không đi qua signal nên chưa có
+    # Profile; trước đây Profile được tạo bù mỗi lần user đăng nhập.
+    User = apps.get_model("auth", "User")
+    Profile = apps.get_model("accounts", "Profile")
+    missing = User.objects.filter(profile__isnull=True).values_list("id", flat=True)
+    Profile.objects.bulk_create(
+        [Profile(user_id=uid) for uid in missing.iterator()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_create_admin_fix"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_history(apps, schema_editor):
+    # Mỗi hồ sơ hiện có -> 1 điểm đo đầu tiên (tính từ ngày tạo tài khoản)
+    Profile = apps.get_model("accounts", "Profile")
+    ProfileMetric = apps.get_model("accounts", "ProfileMetric")
+    rows = (
+        Profile.objects.filter(weight_kg__gt=0)
+        .values_list("user_id", "user__date_joined", "weight_kg", "bmi", "bmr", "tdee")
+    )
+    ProfileMetric.objects.bulk_create(
+        [
+            ProfileMetric(
+                user_id=uid, date=joined.date(), weight_kg=w, bmi=bmi, bmr=bmr, tdee=tdee,
+            )
+            for uid, joined, w, bmi, bmr, tdee in rows.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_backfill_missing_profiles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('weight_kg', models.FloatField()),
+                ('bmi', models.FloatField(default=0)),
+                ('bmr', models.FloatField(default=0)),
+                ('tdee', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date', 'id'],
+                'indexes': [models.Index(fields=['user', 'date', 'id'], name='accounts_metric_asof_idx')],
+            },
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
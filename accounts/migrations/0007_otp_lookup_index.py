@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_profilemetric'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='passwordresetotp',
+            index=models.Index(fields=['user', 'is_used', 'code', 'created_at'], name='accounts_otp_lookup_idx'),
+        ),
+    ]
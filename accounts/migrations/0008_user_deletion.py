@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_otp_lookup_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDeletion',
+            fields=[
+                ('user_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('state', models.CharField(choices=[('queued', 'Chờ xoá'), ('running', 'Đang xoá'), ('done', 'Đã xoá'), ('error', 'Lỗi')], default='queued', max_length=10)),
+                ('deleted', models.PositiveBigIntegerField(default=0)),
+                ('total', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('current', models.CharField(blank=True, max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'updated_at'], name='accounts_deletion_state_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,11 @@
 # accounts/models.py
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from bisect import bisect_right
 from datetime import timedelta
-import random
+import secrets
 # Hệ số hoạt động để tính TDEE
 ACTIVITY_CHOICES = (
     ("sedentary", "Ít vận động (x1.2)"),
@@ -21,6 +23,10 @@ ACTIVITY_FACTOR = {
 }
 
 
+# Các trường dùng để tính BMI/BMR/TDEE – chỉ khi chúng đổi mới cần recalc()
+METRIC_FIELDS = ("age", "gender", "height_cm", "weight_kg", "activity_level")
+
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     full_name = models.CharField(max_length=120, blank=True)
@@ -101,25 +107,212 @@ class Profile(models.Model):
         factor = ACTIVITY_FACTOR.get(self.activity_level, ACTIVITY_FACTOR["light"])
         self.tdee = round(self.bmr * factor, 0) if self.bmr > 0 else 0
 
+    # ====== Theo dõi thay đổi (dirty fields) ======
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_metrics = instance._metric_values()
+        return instance
+
+    def _metric_values(self):
+        # trường bị defer (only()/defer()) -> không biết giá trị cũ
+        if self.get_deferred_fields() & set(METRIC_FIELDS):
+            return None
+        return tuple(getattr(self, f) for f in METRIC_FIELDS)
+
+    @property
+    def metrics_changed(self) -> bool:
+        """True nếu là bản ghi mới hoặc số liệu nhân trắc đã đổi kể từ lúc load."""
+        loaded = getattr(self, "_loaded_metrics", None)
+        return self._state.adding or loaded is None or loaded != self._metric_values()
+
     def save(self, *args, **kwargs):
-        # Luôn tính lại trước khi lưu để dữ liệu nhất quán
-        self.recalc()
-        return super().save(*args, **kwargs)
+        # Chỉ tính lại khi số liệu nhân trắc thay đổi (hoặc chưa từng tính)
+        if self.metrics_changed or not self.bmi:
+            self.recalc()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"bmi", "bmr", "tdee"}
+        changed = self.metrics_changed
+        # hồ sơ mới tạo (signal tạo user) còn 65kg / 170cm mặc định: chưa phải số đo thật
+        placeholder = self._state.adding and self._has_default_body()
+        result = super().save(*args, **kwargs)
+        self._loaded_metrics = self._metric_values()
+        # Ghi thêm 1 điểm vào lịch sử chỉ số khi cân nặng/chiều cao... đổi
+        if changed and self.weight_kg and not placeholder:
+            ProfileMetric.record(self)
+        return result
+
+    def _has_default_body(self) -> bool:
+        return all(
+            getattr(self, f) == self._meta.get_field(f).get_default()
+            for f in ("weight_kg", "height_cm")
+        )
+
+
+class ProfileMetric(models.Model):
+    """
+    Lịch sử chỉ số cơ thể (chỉ thêm, không sửa): mỗi lần hồ sơ đổi số liệu
+    nhân trắc sẽ có 1 dòng (ngày, cân nặng, BMI, BMR, TDEE).
+    Dùng để lấy "cân nặng tại ngày X" cho calo tập luyện và tiến độ mục tiêu.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="metric_history")
+    date = models.DateField(default=timezone.localdate)
+    weight_kg = models.FloatField()
+    bmi = models.FloatField(default=0)
+    bmr = models.FloatField(default=0)
+    tdee = models.FloatField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["date", "id"]
+        indexes = [
+            # as-of: WHERE user_id = ? AND date <= ? ORDER BY date DESC, id DESC LIMIT 1
+            models.Index(fields=["user", "date", "id"], name="accounts_metric_asof_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.date}: {self.weight_kg} kg"
+
+    @classmethod
+    def record(cls, profile, date=None):
+        metric = cls(
+            user_id=profile.user_id,
+            date=date or timezone.localdate(),
+            weight_kg=profile.weight_kg,
+            bmi=profile.bmi or 0,
+            bmr=profile.bmr or 0,
+            tdee=profile.tdee or 0,
+        )
+        metric.from_profile_save = True  # accounts.signals: Profile đã ghi change feed
+        metric.save()
+        return metric
+
+    @classmethod
+    def as_of(cls, user, day):
+        """
+        Bản ghi có hiệu lực tại ngày `day` (bản mới nhất có date <= day).
+        Nếu `day` trước điểm đo đầu tiên thì dùng điểm đo đầu tiên.
+        """
+        user_id = getattr(user, "pk", user)
+        qs = cls.objects.filter(user_id=user_id)
+        return (
+            qs.filter(date__lte=day).order_by("-date", "-id").first()
+            or qs.order_by("date", "id").first()
+        )
+
+    @classmethod
+    def weights_as_of(cls, user, days):
+        """
+        As-of join theo lô: {ngày: cân nặng} cho nhiều ngày chỉ với 2 truy vấn
+        (điểm đo ngay trước ngày nhỏ nhất + các điểm đo trong khoảng), rồi
+        tra bằng bisect. Ngày không có dữ liệu -> None.
+        """
+        days = sorted(set(days))
+        if not days:
+            return {}
+        user_id = getattr(user, "pk", user)
+        qs = cls.objects.filter(user_id=user_id)
+        first, last = days[0], days[-1]
+
+        points = list(
+            qs.filter(date__gt=first, date__lte=last)
+            .order_by("date", "id")
+            .values_list("date", "weight_kg")
+        )
+        base = (
+            qs.filter(date__lte=first).order_by("-date", "-id").values_list("date", "weight_kg").first()
+            or qs.order_by("date", "id").values_list("date", "weight_kg").first()
+        )
+        if base is None:
+            return {d: None for d in days}
+
+        keys = [p[0] for p in points]
+        out = {}
+        for d in days:
+            i = bisect_right(keys, d)
+            out[d] = points[i - 1][1] if i else base[1]
+        return out
 
 class PasswordResetOTP(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reset_otps')
     code = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     is_used = models.BooleanField(default=False)
+    attempts = models.PositiveSmallIntegerField(default=0)  # số lần nhập sai khi mã này là mã mới nhất
+
+    class Meta:
+        indexes = [
+            # xác thực = 1 lần tra index: user + is_used + code, lọc hạn theo created_at
+            models.Index(fields=["user", "is_used", "code", "created_at"], name="accounts_otp_lookup_idx"),
+        ]
 
     def __str__(self):
         return f"OTP reset for {self.user.username} - {self.code}"
 
+    @staticmethod
+    def ttl_minutes():
+        return int(getattr(settings, "PASSWORD_RESET_OTP_TTL_MINUTES", 10))
+
     @classmethod
     def create_new(cls, user):
-        # tạo mã 6 số
-        code = f"{random.randint(0, 999999):06d}"
+        # tạo mã 6 số (secrets: không đoán được như random)
+        code = f"{secrets.randbelow(1_000_000):06d}"
         return cls.objects.create(user=user, code=code)
 
-    def is_expired(self, minutes=10):
-        return self.created_at + timedelta(minutes=minutes) < timezone.now()
\ No newline at end of file
+    @classmethod
+    def find_valid(cls, user, code):
+        """OTP mới nhất còn hạn, chưa dùng, khớp mã; hết hạn lọc ngay trong SQL."""
+        cutoff = timezone.now() - timedelta(minutes=cls.ttl_minutes())
+        return (
+            cls.objects.filter(user=user, is_used=False, code=code, created_at__gte=cutoff)
+            .order_by("-created_at")
+            .first()
+        )
+
+    @classmethod
+    def stale(cls):
+        """OTP đã dùng hoặc đã hết hạn (để dọn định kỳ)."""
+        cutoff = timezone.now() - timedelta(minutes=cls.ttl_minutes())
+        return cls.objects.filter(models.Q(is_used=True) | models.Q(created_at__lt=cutoff))
+
+    def is_expired(self, minutes=None):
+        minutes = self.ttl_minutes() if minutes is None else minutes
+        return self.created_at + timedelta(minutes=minutes) < timezone.now()
+
+
+class UserDeletion(models.Model):
+    """
+    Yêu cầu xoá user có lịch sử lớn (accounts.services). Tiến độ nằm trong DB
+    nên worker nào cũng đọc được; việc xoá do `manage.py process_user_deletions`
+    (cron) làm, không chạy trong worker web. Không dùng FK: dòng này phải
+    còn sau khi user đã bị xoá.
+    """
+    STATE_CHOICES = [
+        ("queued", "Chờ xoá"),
+        ("running", "Đang xoá"),
+        ("done", "Đã xoá"),
+        ("error", "Lỗi"),
+    ]
+
+    user_id = models.IntegerField(primary_key=True)
+    username = models.CharField(max_length=150, blank=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default="queued")
+    deleted = models.PositiveBigIntegerField(default=0)
+    total = models.PositiveBigIntegerField(null=True, blank=True)
+    current = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["state", "updated_at"], name="accounts_deletion_state_idx"),
+        ]
+
+    def __str__(self):
+        return f"Xoá user {self.user_id} ({self.state})"
+
+    def as_dict(self):
+        return {"state": self.state, "deleted": self.deleted, "total": self.total,
+                "current": self.current, **({"error": self.error} if self.error else {})}
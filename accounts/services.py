@@ -0,0 +1,294 @@
+# accounts/services.py
+"""
+Dịch vụ cho trang quản trị user (staff): truy vấn danh sách và xoá user;
+cùng các tiện ích OTP đặt lại mật khẩu (giới hạn nhập sai, dọn OTP cũ).
+
+Danh sách: mọi số liệu của 1 dòng lấy trong CÙNG 1 truy vấn:
+- số bữa ăn / buổi tập, lần ghi nhật ký gần nhất: JOIN bảng rollup
+  tracker.UserActivity (có index, sort được ở 100k user)
+- mục tiêu đang thực hiện: Subquery lấy goal in_progress mới nhất
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, models, transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from goals.models import Goal
+
+from .models import PasswordResetOTP, UserDeletion
+
+# key trên URL -> trường để ORDER BY
+SORT_FIELDS = {
+    "username": "username",
+    "joined": "date_joined",
+    "login": "last_login",
+    "activity": "activity__last_activity_at",
+    "meals": "activity__meal_count",
+    "workouts": "activity__workout_count",
+}
+DEFAULT_SORT = "-joined"
+
+CSV_HEADER = [
+    "ID", "Username", "Email", "Ngày tạo", "Đăng nhập gần nhất",
+    "Hoạt động gần nhất", "Số bữa ăn", "Số buổi tập", "Mục tiêu đang thực hiện",
+    "Cân nặng mục tiêu",
+]
+
+
+def parse_sort(value: str):
+    """'-meals' -> ('-meals', '-activity__meal_count'); key lạ -> mặc định."""
+    value = (value or "").strip()
+    key = value.lstrip("-")
+    if key not in SORT_FIELDS:
+        value, key = DEFAULT_SORT, DEFAULT_SORT.lstrip("-")
+    desc = value.startswith("-")
+    return value, ("-" if desc else "") + SORT_FIELDS[key]
+
+
+def staff_users_queryset(params):
+    """
+    QuerySet user (không gồm superuser) đã lọc + sắp xếp theo `params`
+    (request.GET): q, status (active/inactive), goal (yes/no), idle (số ngày
+    không ghi nhật ký), sort. Trả về (queryset, sort_key).
+    """
+    active_goal = Goal.objects.filter(user=OuterRef("pk"), status="in_progress").order_by("-created")
+
+    qs = (
+        User.objects.filter(is_superuser=False)
+        .select_related("activity")
+        .annotate(
+            goal_type=Subquery(active_goal.values("type")[:1]),
+            goal_target=Subquery(active_goal.values("target_value")[:1]),
+        )
+    )
+
+    q = (params.get("q") or "").strip()
+    if q:
+        qs = qs.filter(Q(username__icontains=q) | Q(email__icontains=q))
+
+    status = params.get("status")
+    if status == "active":
+        qs = qs.filter(is_active=True)
+    elif status == "inactive":
+        qs = qs.filter(is_active=False)
+
+    goal = params.get("goal")
+    has_goal = Exists(Goal.objects.filter(user=OuterRef("pk"), status="in_progress"))
+    if goal == "yes":
+        qs = qs.filter(has_goal)
+    elif goal == "no":
+        qs = qs.filter(~has_goal)
+
+    idle = params.get("idle")
+    if idle and str(idle).isdigit():
+        since = timezone.now() - timedelta(days=int(idle))
+        qs = qs.filter(
+            Q(activity__last_activity_at__lt=since) | Q(activity__last_activity_at__isnull=True)
+        )
+
+    sort_key, order = parse_sort(params.get("sort"))
+    # NULL (chưa hoạt động) luôn xuống cuối, thêm pk để phân trang ổn định
+    if order.startswith("-"):
+        qs = qs.order_by(F(order[1:]).desc(nulls_last=True), "-pk")
+    else:
+        qs = qs.order_by(F(order).asc(nulls_last=True), "pk")
+    return qs, sort_key
+
+
+def csv_rows(qs, chunk_size=2000):
+    """Từng dòng CSV (đọc theo lô bằng iterator, không nạp hết vào RAM)."""
+    goal_labels = dict(Goal.GOAL_TYPE_CHOICES)
+    yield CSV_HEADER
+    for u in qs.iterator(chunk_size=chunk_size):
+        act = getattr(u, "activity", None)
+        yield [
+            u.pk,
+            u.username,
+            u.email,
+            timezone.localtime(u.date_joined).strftime("%Y-%m-%d %H:%M"),
+            timezone.localtime(u.last_login).strftime("%Y-%m-%d %H:%M") if u.last_login else "",
+            timezone.localtime(act.last_activity_at).strftime("%Y-%m-%d %H:%M")
+            if act and act.last_activity_at else "",
+            act.meal_count if act else 0,
+            act.workout_count if act else 0,
+            goal_labels.get(u.goal_type, "") if u.goal_type else "",
+            u.goal_target if u.goal_target is not None else "",
+        ]
+
+
+# ==============================
+# Xoá user có lịch sử lớn
+# ==============================
+# user.delete() của Django gom MỌI dòng con (Meal, Workout, ...) vào RAM để
+# phát signal rồi mới xoá -> rất chậm với user có hàng chục nghìn dòng.
+# Ở đây các bảng "lá" (không bảng nào trỏ tới) được xoá thẳng bằng DELETE
+# theo lô; cuối cùng mới gọi user.delete() cho phần còn lại (rất ít dòng).
+# Việc xoá chạy ngoài worker web (cron gọi process_user_deletions): thread
+# nền trong worker chết theo worker khi gunicorn recycle, để lại user bị
+# khoá với dữ liệu xoá dở.
+# Rollup của user (Goal.kcal_*_total, tracker.UserActivity) thuộc về chính
+# user đó nên bị xoá cùng, không cần cập nhật.
+
+DELETE_CHUNK_SIZE = 2000
+# yêu cầu "running" không cập nhật tiến độ quá lâu -> process chạy nó đã chết
+DELETE_STALE_AFTER = timedelta(minutes=10)
+
+
+def request_user_deletion(user):
+    """
+    Khoá tài khoản ngay (không đăng nhập được nữa) và xếp hàng yêu cầu xoá;
+    `manage.py process_user_deletions` (cron mỗi phút) xoá dữ liệu theo lô.
+    """
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    UserDeletion.objects.update_or_create(
+        user_id=user.pk,
+        defaults={"username": user.username, "state": "queued", "error": "", "updated_at": timezone.now()},
+    )
+
+
+def deletion_progress(user_id):
+    """Tiến độ xoá: dict state/deleted/total/current hoặc None (chưa từng yêu cầu)."""
+    job = UserDeletion.objects.filter(pk=user_id).first()
+    return job.as_dict() if job else None
+
+
+def pending_deletions():
+    """Yêu cầu đang chờ + yêu cầu "running" bị bỏ dở (process chạy nó đã tắt)."""
+    stale = timezone.now() - DELETE_STALE_AFTER
+    return UserDeletion.objects.filter(
+        Q(state="queued") | Q(state="running", updated_at__lt=stale)
+    ).order_by("requested_at")
+
+
+def claim_deletion(job) -> bool:
+    """Nhận xử lý 1 yêu cầu (UPDATE có điều kiện: 2 process không cùng nhận)."""
+    return bool(
+        UserDeletion.objects.filter(pk=job.pk, state=job.state, updated_at=job.updated_at)
+        .update(state="running", updated_at=timezone.now())
+    )
+
+
+def _leaf_relations():
+    """
+    Các quan hệ FK/1-1 tới User có on_delete=CASCADE mà model con không có
+    bảng nào khác trỏ tới -> xoá thẳng được, không cần Collector.
+    """
+    rels = []
+    for rel in User._meta.related_objects:
+        if rel.many_to_many or rel.on_delete is not models.CASCADE:
+            continue
+        model = rel.related_model
+        if model._meta.related_objects:
+            continue
+        rels.append((model, rel.field.name))
+    return rels
+
+
+def _delete_rows(model, ids, using):
+    """
+    DELETE thẳng theo pk bằng SQL, bỏ qua Collector và post_delete: mọi thứ
+    các signal cập nhật (rollup UserActivity, tổng chạy Goal, change feed,
+    bộ đếm /metrics) đều thuộc chính user đang bị xoá, cập nhật từng dòng chỉ
+    tốn thêm vài query cho mỗi bữa ăn / buổi tập.
+    """
+    conn = connections[using]
+    qn = conn.ops.quote_name
+    pk = model._meta.pk
+    sql = "DELETE FROM %s WHERE %s IN (%s)" % (
+        qn(model._meta.db_table), qn(pk.column), ", ".join(["%s"] * len(ids)),
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(sql, [pk.get_db_prep_value(v, conn) for v in ids])
+        return cursor.rowcount
+
+
+def delete_user_data(user_id, chunk_size=DELETE_CHUNK_SIZE):
+    """
+    Xoá user và toàn bộ dữ liệu theo lô nhỏ (mỗi lô 1 transaction ngắn,
+    không khoá bảng lâu). Chạy lại được nếu bị ngắt giữa chừng.
+    Tiến độ ghi vào UserDeletion (xem deletion_progress). Trả về số dòng đã
+    xoá trong lần chạy này.
+    """
+    rels = _leaf_relations()
+    counts = {
+        model._meta.label: model._base_manager.filter(**{field: user_id}).count()
+        for model, field in rels
+    }
+    job, _ = UserDeletion.objects.get_or_create(
+        user_id=user_id,
+        defaults={"username": User.objects.filter(pk=user_id).values_list("username", flat=True).first() or ""},
+    )
+    jobs = UserDeletion.objects.filter(pk=user_id)
+    deleted = 0
+
+    def report(**fields):
+        jobs.update(updated_at=timezone.now(), **fields)
+
+    # chạy tiếp sau khi bị ngắt: giữ số đã xoá ở lần trước
+    done_before = job.deleted if job.state in ("running", "error") else 0
+    report(state="running", deleted=done_before, total=done_before + sum(counts.values()), current="", error="")
+
+    try:
+        for model, field in rels:
+            base = model._base_manager.filter(**{field: user_id})
+            while True:
+                ids = list(base.values_list("pk", flat=True)[:chunk_size])
+                if not ids:
+                    break
+                with transaction.atomic(using=base.db):
+                    n = _delete_rows(model, ids, base.db)
+                deleted += n
+                report(deleted=done_before + deleted, current=model._meta.label)
+
+        # phần còn lại (vd User.groups) – Collector lúc này gần như rỗng
+        report(current="auth.User")
+        User.objects.filter(pk=user_id).delete()
+        report(state="done", current="")
+    except Exception as exc:
+        report(state="error", error=str(exc))
+        raise
+    return deleted
+
+
+# ==============================
+# OTP đặt lại mật khẩu: giới hạn số lần nhập sai
+# ==============================
+
+def _live_otps(user_id):
+    # mã chưa dùng, còn trong thời hạn: bộ đếm là tổng attempts của các mã này
+    # -> xin mã mới không reset được giới hạn; đổi mật khẩu xong (mọi mã
+    # is_used=True) hoặc hết hạn thì tự về 0
+    cutoff = timezone.now() - timedelta(minutes=PasswordResetOTP.ttl_minutes())
+    return PasswordResetOTP.objects.filter(user_id=user_id, is_used=False, created_at__gte=cutoff)
+
+
+def otp_attempts_left(user_id) -> int:
+    limit = int(getattr(settings, "PASSWORD_RESET_OTP_MAX_ATTEMPTS", 5))
+    used = _live_otps(user_id).aggregate(n=Sum("attempts"))["n"] or 0
+    return max(limit - used, 0)
+
+
+def record_otp_failure(user_id) -> int:
+    """
+    Tăng bộ đếm nhập sai trên mã mới nhất còn hạn (UPDATE ... F() + 1 trong
+    DB: mọi worker dùng chung, không bị nhân theo số process). Trả về số
+    lần còn lại.
+    """
+    latest = _live_otps(user_id).order_by("-created_at").values_list("pk", flat=True).first()
+    if latest is not None:
+        PasswordResetOTP.objects.filter(pk=latest).update(attempts=F("attempts") + 1)
+    return otp_attempts_left(user_id)
+
+
+def purge_stale_otps(batch_size=1000) -> int:
+    """Xoá OTP đã dùng / hết hạn theo lô (bảng OTP không có bảng con, không signal)."""
+    total = 0
+    stale = PasswordResetOTP.stale()
+    while True:
+        ids = list(stale.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += PasswordResetOTP.objects.filter(pk__in=ids).delete()[0]
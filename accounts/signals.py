@@ -1,21 +1,33 @@
 # accounts/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
-from .models import Profile
+from .models import Profile, ProfileMetric
 
 User = get_user_model()
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
-    # Khi tạo user mới, tự tạo Profile đi kèm
+    # Chỉ tạo Profile khi tạo user mới.
+    # Không save Profile ở các lần save User sau (đăng nhập cập nhật last_login,
+    # đổi email...) vì Profile không phụ thuộc dữ liệu của User; BMI/BMR/TDEE
+    # được tính lại trong Profile.save() khi số liệu nhân trắc thay đổi.
     if created:
         Profile.objects.get_or_create(user=instance)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    # Mỗi lần user được save (ví dụ đổi tên/email), đảm bảo Profile tồn tại và đồng bộ
-    Profile.objects.get_or_create(user=instance)
-    # Gọi save() để chạy recalc() trong model Profile (nếu có dữ liệu đủ)
-    instance.profile.save()
+
+@receiver(post_save, sender=ProfileMetric)
+@receiver(post_delete, sender=ProfileMetric)
+def mark_profile_changed(sender, instance, **kwargs):
+    # Lịch sử chỉ số đổi (kể cả sửa / xoá trong admin) -> ghi vào change feed
+    # như 1 lần lưu Profile: trang sức khỏe / báo cáo (ETag) và client đồng
+    # bộ biết để lấy lại. Điểm đo sinh từ Profile.save thì tracker.signals
+    # đã ghi dòng của Profile.
+    if getattr(instance, "from_profile_save", False):
+        return
+    from tracker import changes
+
+    profile = Profile.objects.filter(user_id=instance.user_id).first()
+    if profile is not None:
+        changes.record(profile)
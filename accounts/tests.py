@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from goals.models import Goal
+from tracker.models import Food, Meal, Workout
+
+from .models import Profile, ProfileMetric, UserDeletion
+from .services import delete_user_data
+
+
+class LoginProfileWritesTests(TestCase):
+    """Đăng nhập (User.save cập nhật last_login) không được ghi lại Profile."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="an", password="matkhau-123")
+        Profile.objects.filter(user=self.user).update(weight_kg=60, height_cm=165, age=25, gender="M")
+
+    def _profile_writes(self, queries):
+        table = Profile._meta.db_table
+        return [
+            q["sql"] for q in queries
+            if table in q["sql"] and q["sql"].lstrip().upper().startswith(("UPDATE", "INSERT"))
+        ]
+
+    def test_login_view_does_not_write_profile(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("accounts:login"),
+                {"username": "an", "password": "matkhau-123"},
+                HTTP_HOST="127.0.0.1",
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self._profile_writes(ctx.captured_queries), [])
+
+    def test_client_login_does_not_write_profile(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(self.client.login(username="an", password="matkhau-123"))
+        self.assertEqual(self._profile_writes(ctx.captured_queries), [])
+
+
+class ProfileMetricHistoryTests(TestCase):
+    """Lịch sử chỉ số chỉ ghi số đo thật, không ghi giá trị mặc định của hồ sơ mới."""
+
+    def test_new_profile_with_defaults_records_nothing(self):
+        user = User.objects.create_user(username="cuong", password="matkhau-123")
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        self.assertFalse(ProfileMetric.objects.filter(user=user).exists())
+
+    def test_first_real_measurement_is_recorded(self):
+        user = User.objects.create_user(username="cuong", password="matkhau-123")
+        profile = Profile.objects.get(user=user)
+        profile.weight_kg = 72
+        profile.save()
+        self.assertEqual(list(ProfileMetric.objects.filter(user=user).values_list("weight_kg", flat=True)), [72])
+
+    def test_new_profile_with_real_values_is_recorded(self):
+        user = User.objects.create_user(username="cuong", password="matkhau-123")
+        Profile.objects.filter(user=user).delete()
+        Profile.objects.create(user=user, weight_kg=58, height_cm=160)
+        self.assertEqual(ProfileMetric.objects.filter(user=user).count(), 1)
+
+
+class DeleteUserDataTests(TestCase):
+    """Xoá user có lịch sử theo lô (accounts.services.delete_user_data)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="binh", password="matkhau-123")
+        food = Food.objects.create(name="Xôi", calories_per_100g=230)
+        Goal.objects.create(user=self.user, type="lose_weight", target_value=60, start_date=date(2026, 1, 1))
+        for _ in range(5):
+            Meal.objects.create(user=self.user, food=food, meal_type="lunch", date=date(2026, 1, 2))
+            Workout.objects.create(user=self.user, type="walk", duration_min=20, date=date(2026, 1, 2))
+
+    def test_deletes_everything_in_chunks(self):
+        pk = self.user.pk
+        deleted = delete_user_data(pk, chunk_size=2)
+        self.assertGreaterEqual(deleted, 11)
+        self.assertFalse(User.objects.filter(pk=pk).exists())
+        for model in (Meal, Workout, Goal, Profile):
+            self.assertFalse(model.objects.filter(user_id=pk).exists(), model)
+        job = UserDeletion.objects.get(pk=pk)
+        self.assertEqual((job.state, job.deleted), ("done", deleted))
@@ -25,6 +25,7 @@ urlpatterns = [
     # Quản trị user thường
     path("admin-users/", views.users_list, name="admin_users"),
     path("admin-users/delete/<int:user_id>/", views.delete_user, name="delete_user"),
+    path("admin-users/delete/<int:user_id>/status/", views.delete_user_status, name="delete_user_status"),
 
     # Quên mật khẩu + OTP
     path("password-reset/", views.password_reset_request, name="password_reset_request"),
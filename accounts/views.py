@@ -1,6 +1,10 @@
-from django.http import HttpResponse
+import csv
+
+from django.core.paginator import Paginator
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth import get_user_model
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
@@ -10,9 +14,21 @@ from django.views.generic import TemplateView
 
 from .forms import SignUpForm, ProfileForm, PasswordResetRequestForm, PasswordResetVerifyForm
 from .models import Profile, PasswordResetOTP
+from .services import (
+    csv_rows,
+    deletion_progress,
+    otp_attempts_left,
+    record_otp_failure,
+    request_user_deletion,
+    staff_users_queryset,
+)
+from goals.models import Goal
 from django.core.mail import send_mail        
 from django.conf import settings     
 
+USERS_PER_PAGE = 50
+
+
 def signup(request):
     """
     Đăng ký tài khoản mới:
@@ -79,15 +95,67 @@ class DashboardView(TemplateView):
         return context
 
 
+class _Echo:
+    """File giả cho csv.writer: trả lại chuỗi để StreamingHttpResponse gửi dần."""
+    def write(self, value):
+        return value
+
+
 @user_passes_test(lambda u: u.is_staff)
 def users_list(request):
-    q = request.GET.get("q", "")
-    qs = User.objects.filter(is_superuser=False)
-    if q:
-        qs = qs.filter(username__icontains=q)
-    return render(request, "accounts/users_list.html", {"users": qs, "q": q})
+    """
+    Trang quản trị user cho staff: lọc / sắp xếp phía server, phân trang,
+    mỗi trang 1 truy vấn (số liệu lấy từ rollup + Subquery, xem accounts.services).
+    ?export=csv -> xuất toàn bộ kết quả đang lọc (stream, không giới hạn trang).
+    """
+    qs, sort = staff_users_queryset(request.GET)
+
+    if request.GET.get("export") == "csv":
+        writer = csv.writer(_Echo())
+        response = StreamingHttpResponse(
+            ("\ufeff" if i == 0 else "") + writer.writerow(row)
+            for i, row in enumerate(csv_rows(qs))
+        )
+        response["Content-Type"] = "text/csv; charset=utf-8"
+        response["Content-Disposition"] = 'attachment; filename="users.csv"'
+        return response
+
+    paginator = Paginator(qs, USERS_PER_PAGE)
+    users = paginator.get_page(request.GET.get("page"))
+    goal_labels = dict(Goal.GOAL_TYPE_CHOICES)
+    for u in users:
+        u.goal_label = goal_labels.get(u.goal_type, "")
+
+    # query string giữ bộ lọc cho link phân trang / sort / export
+    params = request.GET.copy()
+    params.pop("page", None)
+    params.pop("export", None)
+    base_qs = params.urlencode()
+    params.pop("sort", None)
+    filter_qs = params.urlencode()
+
+    return render(
+        request,
+        "accounts/users_list.html",
+        {
+            "users": users,
+            "q": request.GET.get("q", ""),
+            "status": request.GET.get("status", ""),
+            "goal": request.GET.get("goal", ""),
+            "idle": request.GET.get("idle", ""),
+            "sort": sort,
+            "base_qs": base_qs,
+            "filter_qs": filter_qs,
+        },
+    )
 
+@user_passes_test(lambda u: u.is_staff)
+@require_POST
 def delete_user(request, user_id):
+    """
+    Xoá user: khoá tài khoản ngay, dữ liệu (nhật ký, mục tiêu, ...) được xoá
+    theo lô bởi cron process_user_deletions – xem accounts.services.request_user_deletion.
+    """
     user = get_object_or_404(User, id=user_id)
 
     # Không cho xóa tài khoản admin
@@ -95,10 +163,23 @@ def delete_user(request, user_id):
         messages.error(request, "Không thể xóa tài khoản quản trị viên.")
         return redirect("accounts:admin_users")
 
-    user.delete()
-    messages.success(request, "Đã xóa tài khoản thành công.")
+    request_user_deletion(user)
+    messages.success(
+        request,
+        f"Đã khoá tài khoản {user.username}, dữ liệu sẽ được xoá trong ít phút.",
+    )
     return redirect("accounts:admin_users")
 
+
+@user_passes_test(lambda u: u.is_staff)
+def delete_user_status(request, user_id):
+    """Tiến độ xoá (JSON) để trang quản trị hỏi lại định kỳ."""
+    progress = deletion_progress(user_id)
+    if progress is None:
+        gone = not User.objects.filter(pk=user_id).exists()
+        progress = {"state": "done" if gone else "unknown"}
+    return JsonResponse(progress)
+
 def logout_view(request):
     logout(request)
     messages.info(request, "Bạn đã đăng xuất.")
@@ -125,7 +206,7 @@ def password_reset_request(request):
             message = (
                 f"Xin chào {user.username},\n\n"
                 f"Mã xác thực để đặt lại mật khẩu của bạn là: {otp.code}\n"
-                "Mã có hiệu lực trong 10 phút.\n\n"
+                f"Mã có hiệu lực trong {PasswordResetOTP.ttl_minutes()} phút.\n\n"
                 "Nếu bạn không yêu cầu đặt lại mật khẩu, hãy bỏ qua email này."
             )
             from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@librahealth.local")
@@ -160,34 +241,34 @@ def password_reset_verify(request):
         if form.is_valid():
             code = form.cleaned_data["code"]
 
-            # Lấy OTP mới nhất của user với mã này
-            try:
-                otp_obj = PasswordResetOTP.objects.filter(
-                    user=user,
-                    code=code,
-                    is_used=False,
-                ).latest("created_at")
-            except PasswordResetOTP.DoesNotExist:
-                messages.error(request, "Mã OTP không đúng.")
+            # Nhập sai quá nhiều lần -> khoá xác thực tới khi các mã hiện có hết hạn
+            if not otp_attempts_left(user.id):
+                messages.error(
+                    request,
+                    "Bạn đã nhập sai mã quá nhiều lần. Vui lòng thử lại sau "
+                    f"{PasswordResetOTP.ttl_minutes()} phút.",
+                )
+                return redirect("accounts:password_reset_request")
+
+            # OTP mới nhất còn hạn, chưa dùng, khớp mã (1 lần tra index)
+            otp_obj = PasswordResetOTP.find_valid(user, code)
+            if otp_obj is None:
+                left = record_otp_failure(user.id)
+                messages.error(request, f"Mã OTP không đúng hoặc đã hết hạn (còn {left} lần thử).")
                 return render(
                     request,
                     "accounts/password_reset_verify.html",
                     {"form": form, "user": user},
                 )
 
-            # Kiểm tra hết hạn
-            if otp_obj.is_expired():
-                messages.error(request, "Mã OTP đã hết hạn. Vui lòng yêu cầu mã mới.")
-                return redirect("accounts:password_reset_request")
-
             # Đổi mật khẩu
             new_password = form.cleaned_data["new_password1"]
             user.set_password(new_password)
             user.save()
 
-            # Đánh dấu OTP đã dùng
-            otp_obj.is_used = True
-            otp_obj.save()
+            # Đánh dấu OTP đã dùng (kèm các mã cũ còn treo của user)
+            # (bộ đếm nhập sai cũng về 0 theo)
+            PasswordResetOTP.objects.filter(user=user, is_used=False).update(is_used=True)
 
             # Xóa session
             try:
@@ -2,3 +2,7 @@ from django.apps import AppConfig
 class ChatbotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "chatbot"
+
+    def ready(self):
+        # Nạp signal receivers (xóa hội thoại đang lưu khi user bị xóa)
+        from . import signals  # noqa
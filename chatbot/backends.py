@@ -0,0 +1,95 @@
+# chatbot/backends.py
+"""
+Các "bộ trả lời" (backend) của chatbot, chạy lần lượt theo
+settings.CHATBOT_BACKENDS; backend đầu tiên trả về câu trả lời sẽ thắng.
+
+Mặc định:
+1. RetrievalBackend – tra bộ FAQ bằng chỉ mục BM25 offline.
+2. RuleBackend      – rule engine (chatbot.rules), luôn có câu trả lời.
+
+Muốn thêm backend khác (vd gọi LLM khi có OPENAI_API_KEY) chỉ cần viết
+class con của ChatBackend (gọi mạng thì override thêm areply cho chế độ
+ASGI) và thêm đường dẫn vào CHATBOT_BACKENDS.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .retrieval import get_index
+from .rules import reply_rule_based
+
+DEFAULT_BACKENDS = [
+    "chatbot.backends.RetrievalBackend",
+    "chatbot.backends.RuleBackend",
+]
+
+
+class ChatBackend:
+    """Giao diện chung: trả về (intent, reply) hoặc None nếu không trả lời được."""
+    name = "base"
+
+    def reply(self, message: str, *, intent: str, known=None):
+        raise NotImplementedError
+
+    async def areply(self, message: str, *, intent: str, known=None):
+        """
+        Bản async (view async dưới ASGI). Mặc định gọi reply() ngay trong event
+        loop – backend có sẵn chỉ tính toán trong RAM, dưới 1 ms. Backend gọi
+        mạng (LLM...) nên override bằng client async để không chặn event loop.
+        """
+        return self.reply(message, intent=intent, known=known)
+
+
+class RetrievalBackend(ChatBackend):
+    name = "faq"
+
+    # Câu chào/cảm ơn và các phép tính để rule engine xử lý
+    skip_intents = {"greet", "thanks", "bmi", "bmr", "tdee"}
+
+    def __init__(self):
+        self.min_score = float(getattr(settings, "CHATBOT_FAQ_MIN_SCORE", 4.0))
+        self.min_coverage = float(getattr(settings, "CHATBOT_FAQ_MIN_COVERAGE", 0.5))
+
+    def reply(self, message, *, intent, known=None):
+        if intent in self.skip_intents:
+            return None
+        hits = get_index().search(message, k=1)
+        if not hits:
+            return None
+        score, coverage, doc = hits[0]
+        if score < self.min_score or coverage < self.min_coverage:
+            return None
+        return self.name, doc["a"]
+
+
+class RuleBackend(ChatBackend):
+    name = "rules"
+
+    def reply(self, message, *, intent, known=None):
+        return intent, reply_rule_based(message, known=known, intent=intent)
+
+
+@lru_cache(maxsize=1)
+def get_backends():
+    paths = getattr(settings, "CHATBOT_BACKENDS", None) or DEFAULT_BACKENDS
+    return tuple(import_string(p)() for p in paths)
+
+
+def answer(message: str, *, intent: str, known=None):
+    """Chạy lần lượt các backend, trả về (intent, reply) đầu tiên."""
+    for backend in get_backends():
+        out = backend.reply(message, intent=intent, known=known)
+        if out:
+            return out
+    # không backend nào trả lời được -> rule engine
+    return intent, reply_rule_based(message, known=known, intent=intent)
+
+
+async def aanswer(message: str, *, intent: str, known=None):
+    """answer() cho view async."""
+    for backend in get_backends():
+        out = await backend.areply(message, intent=intent, known=known)
+        if out:
+            return out
+    return intent, reply_rule_based(message, known=known, intent=intent)
@@ -0,0 +1,151 @@
+# chatbot/context.py
+"""
+Ảnh chụp (snapshot) dữ liệu cá nhân của user cho chatbot:
+- chỉ số hồ sơ (cân nặng, chiều cao, BMI/BMR/TDEE...)
+- mục tiêu đang thực hiện
+- tổng kcal ăn vào / đốt hôm nay + trung bình 7 ngày
+
+Snapshot được dựng 1 lần rồi lưu vào Django cache theo version change feed
+của user (tracker.changes.user_version, đọc từ DB): mỗi lượt chat tốn 1
+truy vấn theo chỉ mục + 1 lần cache.get. Meal/Workout/Goal/Profile đổi ->
+version tăng -> key mới, nên worker nào cũng thấy dữ liệu mới kể cả khi
+cache là LocMem riêng từng process; bản cũ tự hết hạn theo TTL.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from accounts.models import Profile
+from goals.models import Goal
+from tracker.changes import auser_version, user_version
+from tracker.models import Meal, Workout
+from .extract import Entities
+
+SNAPSHOT_TTL = 60 * 30  # 30 phút; dữ liệu đổi thì key đổi theo version
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    day: date
+
+    # Hồ sơ
+    weight_kg: float = 0.0
+    height_cm: float = 0.0
+    age: int = 0
+    sex: Optional[str] = None        # "male" / "female"
+    activity: Optional[str] = None   # mã ACTIVITY_CHOICES
+    bmi: float = 0.0
+    bmr: float = 0.0
+    tdee: float = 0.0
+
+    # Mục tiêu đang thực hiện
+    goal_type: Optional[str] = None
+    goal_type_label: str = ""
+    goal_target_kg: Optional[float] = None
+    goal_start_weight_kg: Optional[float] = None
+    goal_deadline: Optional[date] = None
+    goal_daily_in: Optional[float] = None
+
+    # Sổ calo
+    today_in: float = 0.0
+    today_out: float = 0.0
+    avg_in_7d: float = 0.0
+    avg_out_7d: float = 0.0
+
+    @property
+    def has_profile(self) -> bool:
+        return self.weight_kg > 0 and self.height_cm > 0
+
+    def as_entities(self) -> Entities:
+        """Dữ liệu hồ sơ dưới dạng Entities để bù cho câu hỏi thiếu số liệu."""
+        if not self.has_profile:
+            return Entities()
+        return Entities(
+            weight_kg=self.weight_kg,
+            height_cm=self.height_cm,
+            age=self.age or None,
+            sex=self.sex,
+            activity=self.activity,
+        )
+
+
+def _key(user_id, day: date, version: int) -> str:
+    # gắn ngày vào key để qua ngày mới snapshot tự hết hiệu lực
+    return f"chatbot:ctx:{user_id}:{day.isoformat()}:{version}"
+
+
+def build_snapshot(user, today=None) -> UserSnapshot:
+    """Dựng snapshot từ DB (4 truy vấn: profile, goal, meal, workout)."""
+    if today is None:
+        today = timezone.localdate()
+    week_start = today - timedelta(days=6)
+
+    fields = {"day": today}
+
+    profile = Profile.objects.filter(user=user).first()
+    if profile:
+        fields.update(
+            weight_kg=float(profile.weight_kg or 0),
+            height_cm=float(profile.height_cm or 0),
+            age=int(profile.age or 0),
+            sex={"M": "male", "F": "female"}.get(profile.gender),
+            activity=profile.activity_level,
+            bmi=float(profile.bmi or 0),
+            bmr=float(profile.bmr or 0),
+            tdee=float(profile.tdee or 0),
+        )
+
+    goal = Goal.get_active_goal(user)
+    if goal:
+        fields.update(
+            goal_type=goal.type,
+            goal_type_label=goal.get_type_display(),
+            goal_target_kg=goal.target_value,
+            goal_start_weight_kg=goal.start_weight_kg,
+            goal_deadline=goal.deadline,
+            goal_daily_in=goal.daily_calorie_target_in,
+        )
+
+    meals = Meal.objects.filter(user=user, date__range=(week_start, today)).aggregate(
+        today=Sum("calories_in", filter=Q(date=today)),
+        week=Sum("calories_in"),
+    )
+    workouts = Workout.objects.filter(user=user, date__range=(week_start, today)).aggregate(
+        today=Sum("calories_out", filter=Q(date=today)),
+        week=Sum("calories_out"),
+    )
+    fields.update(
+        today_in=float(meals["today"] or 0),
+        today_out=float(workouts["today"] or 0),
+        avg_in_7d=float(meals["week"] or 0) / 7,
+        avg_out_7d=float(workouts["week"] or 0) / 7,
+    )
+    return UserSnapshot(**fields)
+
+
+def get_snapshot(user) -> UserSnapshot:
+    """Lấy snapshot từ cache, dựng mới nếu chưa có."""
+    today = timezone.localdate()
+    key = _key(user.pk, today, user_version(user.pk))
+    snap = cache.get(key)
+    if snap is None:
+        snap = build_snapshot(user, today=today)
+        cache.set(key, snap, SNAPSHOT_TTL)
+    return snap
+
+
+async def aget_snapshot(user) -> UserSnapshot:
+    """get_snapshot cho view async: cache async, dựng mới (ORM) trong thread."""
+    today = timezone.localdate()
+    key = _key(user.pk, today, await auser_version(user.pk))
+    snap = await cache.aget(key)
+    if snap is None:
+        snap = await sync_to_async(build_snapshot)(user, today=today)
+        await cache.aset(key, snap, SNAPSHOT_TTL)
+    return snap
+
@@ -0,0 +1,126 @@
+# chatbot/conversation.py
+"""
+Trạng thái hội thoại ngắn hạn cho /api/chat/.
+
+Mỗi hội thoại chỉ giữ 1 bản ghi nhỏ: các thực thể đã biết (cân nặng,
+chiều cao, tuổi, giới tính, mức vận động), ý định của lượt trước và số lượt.
+Bản ghi nằm trong cache alias "chat" (xem settings.CACHES):
+- TTL = CHAT_CONVERSATION_TTL, tự hết hạn khi user ngừng chat;
+- số hội thoại tối đa giới hạn bởi MAX_ENTRIES của cache (LocMemCache
+  loại bỏ bản ghi ít dùng gần nhất trước).
+Mỗi lượt chat = 1 cache.get + 1 cache.set, O(1).
+
+Khách chưa đăng nhập được nhận diện bằng cookie ký (GUEST_COOKIE) chứa id
+ngẫu nhiên, không tạo session: /api/chat/ công khai nên mỗi POST không
+cookie không được sinh thêm dòng django_session.
+"""
+import secrets
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .extract import Entities
+
+CHAT_CACHE_ALIAS = "chat"
+GUEST_COOKIE = "chat_guest"
+_GUEST_SALT = "chatbot.conversation"
+
+
+def _ttl() -> int:
+    return getattr(settings, "CHAT_CONVERSATION_TTL", 60 * 30)
+
+
+def _cache():
+    return caches[CHAT_CACHE_ALIAS]
+
+
+@dataclass
+class ConversationState:
+    entities: Entities = field(default_factory=Entities)
+    last_intent: Optional[str] = None
+    turns: int = 0
+
+    def to_cache(self) -> tuple:
+        # lưu tuple gọn thay vì pickle cả object
+        e = self.entities
+        return (e.weight_kg, e.height_cm, e.age, e.sex, e.activity, self.last_intent, self.turns)
+
+    @classmethod
+    def from_cache(cls, raw) -> "ConversationState":
+        if not raw:
+            return cls()
+        w, h, age, sex, activity, last_intent, turns = raw
+        return cls(
+            entities=Entities(weight_kg=w, height_cm=h, age=age, sex=sex, activity=activity),
+            last_intent=last_intent,
+            turns=turns,
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "entities": asdict(self.entities),
+            "last_intent": self.last_intent,
+            "turns": self.turns,
+        }
+
+
+def user_conversation_key(user_id) -> str:
+    return f"chatbot:conv:u{user_id}"
+
+
+def conversation_key(request, user=None) -> str:
+    """
+    Khóa hội thoại: theo user nếu đã đăng nhập, ngược lại theo id trong
+    cookie ký của khách (chưa có / sai chữ ký -> id mới). Không truy vấn DB;
+    view async truyền user đã lấy bằng request.auser().
+    """
+    if user is None:
+        user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user_conversation_key(user.pk)
+
+    guest_id = request.get_signed_cookie(GUEST_COOKIE, default=None, salt=_GUEST_SALT)
+    if not guest_id:
+        guest_id = secrets.token_urlsafe(16)
+    request.chat_guest_id = guest_id
+    return f"chatbot:conv:g{guest_id}"
+
+
+def set_guest_cookie(request, response):
+    """Gắn (gia hạn) cookie khách vào response nếu conversation_key đã cấp id."""
+    guest_id = getattr(request, "chat_guest_id", None)
+    if guest_id:
+        response.set_signed_cookie(
+            GUEST_COOKIE, guest_id, salt=_GUEST_SALT, max_age=_ttl(),
+            httponly=True, samesite="Lax", secure=settings.SESSION_COOKIE_SECURE,
+        )
+    return response
+
+
+def load_state(key: Optional[str]) -> ConversationState:
+    if not key:
+        return ConversationState()
+    return ConversationState.from_cache(_cache().get(key))
+
+
+def save_state(key: Optional[str], state: ConversationState) -> None:
+    if key:
+        _cache().set(key, state.to_cache(), _ttl())
+
+
+async def aload_state(key: Optional[str]) -> ConversationState:
+    if not key:
+        return ConversationState()
+    return ConversationState.from_cache(await _cache().aget(key))
+
+
+async def asave_state(key: Optional[str], state: ConversationState) -> None:
+    if key:
+        await _cache().aset(key, state.to_cache(), _ttl())
+
+
+def clear_state(key: Optional[str]) -> None:
+    if key:
+        _cache().delete(key)
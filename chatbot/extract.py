@@ -0,0 +1,234 @@
+# chatbot/extract.py
+"""
+Bộ tách thực thể (entity) cho tin nhắn chat: cân nặng, chiều cao, tuổi,
+giới tính, mức vận động.
+
+- Chuẩn hóa Unicode (NFC) rồi quét câu đúng 1 lần bằng 1 regex để lấy token.
+- Mỗi token chữ giữ cả dạng gốc lẫn dạng bỏ dấu ("nữ" -> "nu") để vừa nhận
+  được người gõ không dấu, vừa phân biệt được "nam" (giới tính) với "năm".
+- So khớp theo TOKEN chứ không theo chuỗi con, nên "nu" không còn dính vào
+  "menu", "nuoc"...
+- Kết quả được cache LRU theo nguyên văn tin nhắn.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from typing import Optional
+
+# Token: số (67, 1.72, 1,72) hoặc một từ (chữ cái Unicode)
+_TOKEN_RE = re.compile(r"(\d+(?:[.,]\d+)?)|([^\W\d_]+)")
+
+# Giới tính
+_FEMALE = {"nu", "female", "woman", "girl", "gai"}
+_MALE = {"nam", "male", "man", "boy", "trai"}
+
+# Mức vận động -> mã ACTIVITY_CHOICES trong accounts.models
+_ACTIVITY_WORDS = {
+    "it": "sedentary", "sedentary": "sedentary",
+    "nhe": "light", "light": "light",
+    "vua": "moderate", "moderate": "moderate",
+    "nang": "active", "nhieu": "active", "active": "active",
+}
+_ACTIVITY_VERY = {"rat", "very"}
+# Từ "dẫn" cho mức vận động: "vận động vừa", "hoạt động nhẹ", "activity light"
+_ACTIVITY_CUES = {"dong", "activity"}
+# Dạng có dấu của các từ mức vận động tiếng Việt (không cần từ dẫn)
+_ACTIVITY_ACCENTED = {"ít", "nhẹ", "vừa", "nặng", "nhiều"}
+
+_WEIGHT_UNITS = {"kg", "kgs", "kilo", "ky", "can"}
+_HEIGHT_CM_UNITS = {"cm", "phan"}
+_AGE_UNITS = {"tuoi", "yo", "years", "year"}
+_WEIGHT_CUES = {"nang", "weight"}
+_HEIGHT_CUES = {"cao", "height"}
+_AGE_CUES = {"tuoi", "age"}
+_UNITS = _WEIGHT_UNITS | _HEIGHT_CM_UNITS | _AGE_UNITS | {"m"}
+
+
+@dataclass(frozen=True)
+class Entities:
+    """Bản ghi thực thể đã tách từ 1 tin nhắn (None = không có trong câu)."""
+    weight_kg: Optional[float] = None
+    height_cm: Optional[float] = None
+    age: Optional[int] = None
+    sex: Optional[str] = None        # "male" / "female"
+    activity: Optional[str] = None   # sedentary / light / moderate / active / very
+
+    @property
+    def has_body(self) -> bool:
+        return bool(self.weight_kg and self.height_cm)
+
+    def merged(self, fallback: "Entities") -> "Entities":
+        """Giữ giá trị trong câu; trường nào thiếu thì lấy từ fallback."""
+        if fallback is None:
+            return self
+        return replace(self, **{
+            f.name: getattr(fallback, f.name)
+            for f in fields(self)
+            if getattr(self, f.name) is None
+        })
+
+
+def fold(s: str) -> str:
+    """Bỏ dấu tiếng Việt + lower: "Cân Nặng" -> "can nang"."""
+    s = unicodedata.normalize("NFD", (s or "").lower())
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    return s.replace("đ", "d")
+
+
+def _num(s: str) -> float:
+    return float(s.replace(",", "."))
+
+
+def _plausible_weight(v: float) -> bool:
+    return 20 <= v <= 300
+
+
+def _plausible_cm(v: float) -> bool:
+    return 50 <= v <= 250
+
+
+def _plausible_height(v: float) -> bool:
+    return 0.5 <= v <= 3 or _plausible_cm(v)
+
+
+def _body_pair(a: float, b: float):
+    """
+    2 số trơn -> (kg, cm). Người gõ ngược ("1.72 67") thì đổi chỗ; cặp
+    không hợp lý theo cả 2 chiều thì bỏ qua (None, None).
+    """
+    if _plausible_weight(a) and _plausible_height(b):
+        return a, b
+    if _plausible_weight(b) and _plausible_height(a):
+        return b, a
+    return None, None
+
+
+def _tokenize(text: str):
+    """
+    Trả về list (kind, raw, folded):
+    - kind = "n" với số (folded là float), "w" với từ.
+    """
+    t = unicodedata.normalize("NFC", (text or "").lower())
+    out = []
+    for m in _TOKEN_RE.finditer(t):
+        if m.group(1) is not None:
+            out.append(("n", m.group(1), _num(m.group(1))))
+        else:
+            raw = m.group(2)
+            out.append(("w", raw, fold(raw)))
+    return out
+
+
+def _word(tokens, i):
+    """Dạng bỏ dấu của token thứ i nếu là từ, ngược lại ''."""
+    if 0 <= i < len(tokens) and tokens[i][0] == "w":
+        return tokens[i][2]
+    return ""
+
+
+def _is_num(tokens, i):
+    return 0 <= i < len(tokens) and tokens[i][0] == "n"
+
+
+@lru_cache(maxsize=2048)
+def extract_entities(text: str) -> Entities:
+    """
+    Tách thực thể trong 1 lần duyệt token. Các dạng được hỗ trợ:
+    - "67kg 172cm", "67 kg, 1m72", "1.72m", "cao 1m72 nặng 67"
+    - "67 172" (2 số trơn -> kg, cm; chiều cao <= 3 hiểu là mét;
+      "1.72 67" được đổi chỗ, cặp vô lý bị bỏ)
+    - "21 tuổi", "tuổi 21", "nam" / "nữ" / "nu" / "female"
+    - "vận động vừa", "ít vận động", "rất nặng", "very active"
+    """
+    tokens = _tokenize(text)
+    weight = height = None
+    age = None
+    sex = None
+    activity = None
+    bare = []  # số chưa gắn nhãn
+
+    i, n = 0, len(tokens)
+    while i < n:
+        kind, raw, val = tokens[i]
+
+        if kind == "n":
+            nxt = _word(tokens, i + 1)
+            prev = _word(tokens, i - 1)
+            if nxt in _WEIGHT_UNITS:
+                weight = val
+                i += 2
+                continue
+            if nxt in _HEIGHT_CM_UNITS:
+                height = val
+                i += 2
+                continue
+            if nxt == "m":
+                # 1m72 / 1m 72 / 1.72m; 1m7 = 1m70. Chỉ ghép số sau khi phần
+                # mét là số nguyên và số sau không có đơn vị riêng ("1.72m 67kg")
+                cm = val * 100
+                step = 2
+                if raw.isdigit() and _is_num(tokens, i + 2) and _word(tokens, i + 3) not in _UNITS:
+                    digits = tokens[i + 2][1]
+                    if digits.isdigit() and len(digits) <= 2:
+                        cm += int(digits) * (10 if len(digits) == 1 else 1)
+                        step = 3
+                if _plausible_cm(cm):  # "chạy 100m" không phải chiều cao
+                    height = cm
+                i += step
+                continue
+            if nxt in _AGE_UNITS:
+                age = int(val)
+                i += 2
+                continue
+            if prev in _WEIGHT_CUES and weight is None:
+                weight = val
+            elif prev in _HEIGHT_CUES and height is None:
+                height = val
+            elif prev in _AGE_CUES and age is None:
+                age = int(val)
+            else:
+                bare.append(val)
+            i += 1
+            continue
+
+        # ----- token chữ -----
+        w = val
+        if w in _FEMALE:
+            sex = "female"
+        elif raw in _MALE:  # dạng gốc: "năm" / "nấm" / "nằm" bỏ dấu đều thành "nam"
+            sex = "male"
+        elif w in _ACTIVITY_VERY and _word(tokens, i + 1) in ("nang", "nhieu", "active"):
+            activity = "very"
+            i += 2
+            continue
+        elif w in _ACTIVITY_WORDS and not _is_num(tokens, i + 1):
+            # "nặng" đứng sau "cân" hoặc trước số là cân nặng, không phải vận động
+            prev = _word(tokens, i - 1)
+            cued = prev in _ACTIVITY_CUES or _word(tokens, i + 1) in ("van", "hoat")
+            if prev != "can" and (cued or raw in _ACTIVITY_ACCENTED or w in (
+                "sedentary", "light", "moderate", "active",
+            )):
+                activity = _ACTIVITY_WORDS[w]
+        i += 1
+
+    # 2 số trơn đầu tiên -> (kg, cm) như cách nhập "67 172"
+    if weight is None and height is None and len(bare) >= 2:
+        weight, height = _body_pair(bare[0], bare[1])
+    elif weight is None and height is not None:
+        weight = next((v for v in bare if _plausible_weight(v)), None)
+    elif height is None and weight is not None:
+        height = next((v for v in bare if _plausible_height(v)), None)
+
+    if height is not None and height <= 3:
+        height = height * 100
+    if height is not None and not _plausible_cm(height):
+        height = None
+
+    return Entities(
+        weight_kg=weight,
+        height_cm=round(height, 2) if height is not None else None,
+        age=age,
+        sex=sex,
+        activity=activity,
+    )
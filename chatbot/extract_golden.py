@@ -0,0 +1,77 @@
+# chatbot/extract_golden.py
+"""
+Bộ câu mẫu (golden corpus) cho chatbot.extract.extract_entities.
+Mỗi dòng: (tin nhắn, kết quả mong đợi). Trường không ghi = None.
+Dùng bởi: chatbot/tests.py và python manage.py bench_chat_extract
+"""
+
+GOLDEN = [
+    ("BMI 67kg 172cm", {"weight_kg": 67, "height_cm": 172}),
+    ("bmi 67 172", {"weight_kg": 67, "height_cm": 172}),
+    ("BMI 67kg, 1m72", {"weight_kg": 67, "height_cm": 172}),
+    ("bmi 1m72 67kg", {"weight_kg": 67, "height_cm": 172}),
+    ("BMI 67 kg 1.72m", {"weight_kg": 67, "height_cm": 172}),
+    ("bmi 55,5kg 1,6m", {"weight_kg": 55.5, "height_cm": 160}),
+    ("BMI nặng 67 cao 172", {"weight_kg": 67, "height_cm": 172}),
+    ("bmi can nang 67 chieu cao 1m72", {"weight_kg": 67, "height_cm": 172}),
+    ("cao 1m65 nặng 50", {"weight_kg": 50, "height_cm": 165}),
+    ("BMI 67 1.72", {"weight_kg": 67, "height_cm": 172}),
+    ("BMR 67kg 172cm 21 tuổi nam", {
+        "weight_kg": 67, "height_cm": 172, "age": 21, "sex": "male",
+    }),
+    ("bmr 50kg 160cm 30 tuoi nu", {
+        "weight_kg": 50, "height_cm": 160, "age": 30, "sex": "female",
+    }),
+    ("BMR 50kg 160cm tuổi 30 nữ", {
+        "weight_kg": 50, "height_cm": 160, "age": 30, "sex": "female",
+    }),
+    ("TDEE 67kg 172cm 21 tuổi nam vận động vừa", {
+        "weight_kg": 67, "height_cm": 172, "age": 21, "sex": "male",
+        "activity": "moderate",
+    }),
+    ("tdee 67kg 172cm 21 tuoi nam van dong nhe", {
+        "weight_kg": 67, "height_cm": 172, "age": 21, "sex": "male",
+        "activity": "light",
+    }),
+    ("TDEE 60kg 165cm 25 tuổi nữ ít vận động", {
+        "weight_kg": 60, "height_cm": 165, "age": 25, "sex": "female",
+        "activity": "sedentary",
+    }),
+    ("TDEE 80kg 180cm 35 tuổi male very active", {
+        "weight_kg": 80, "height_cm": 180, "age": 35, "sex": "male",
+        "activity": "very",
+    }),
+    ("TDEE 70kg 175cm 28 tuổi nam vận động rất nặng", {
+        "weight_kg": 70, "height_cm": 175, "age": 28, "sex": "male",
+        "activity": "very",
+    }),
+    # "nặng" là cân nặng, không phải mức vận động
+    ("tdee nặng 67 cao 172 21 tuổi nam", {
+        "weight_kg": 67, "height_cm": 172, "age": 21, "sex": "male",
+    }),
+    # "nu" không được khớp bên trong từ khác
+    ("xem menu bữa sáng", {}),
+    ("uống nước bao nhiêu là đủ", {}),
+    # "năm" không phải giới tính nam
+    ("tập gym 2 năm rồi", {}),
+    ("ăn nấm có tốt không", {}),
+    ("nằm ngủ sau khi ăn có sao không", {}),
+    ("BMI là gì?", {}),
+    ("xin chào", {}),
+    # tuổi không bị hiểu nhầm là chiều cao
+    ("TDEE 67kg 21 tuổi nam", {"weight_kg": 67, "age": 21, "sex": "male"}),
+    ("bmi 172cm 67", {"weight_kg": 67, "height_cm": 172}),
+    # 1 chữ số sau "m" là hàng chục cm
+    ("tôi 1m7 nặng 60", {"weight_kg": 60, "height_cm": 170}),
+    ("BMI 1m 7 60kg", {"weight_kg": 60, "height_cm": 170}),
+    # 2 số trơn gõ ngược thứ tự -> đổi chỗ; không hợp lý -> bỏ
+    ("BMI 1.72 67", {"weight_kg": 67, "height_cm": 172}),
+    ("bmi 5 7", {}),
+    # số thập phân trước "m" là đủ mét, không ghép với số có đơn vị riêng
+    ("bmi 1.72m 67kg", {"weight_kg": 67, "height_cm": 172}),
+    ("1,72m 67kg", {"weight_kg": 67, "height_cm": 172}),
+    ("cao 1m 60kg", {"weight_kg": 60, "height_cm": 100}),
+    # quãng đường không phải chiều cao
+    ("chạy 100m mất bao nhiêu kcal", {}),
+    ("bmi 67kg 400cm", {"weight_kg": 67}),
+]
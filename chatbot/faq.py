@@ -0,0 +1,187 @@
+# chatbot/faq.py
+"""
+Bộ câu hỏi thường gặp (FAQ) về sức khỏe & cách dùng Libra Health.
+Là nguồn dữ liệu cho chatbot.retrieval (chỉ mục BM25 chạy offline).
+
+Mỗi mục: "q" = câu hỏi mẫu (có thể kèm vài cách hỏi khác, ngăn bởi " | "),
+"a" = câu trả lời. Sửa/thêm mục ở đây thì chỉ mục sẽ tự build lại.
+Thông tin chỉ mang tính tham khảo, không thay thế tư vấn của bác sĩ.
+"""
+
+FAQ = [
+    # ----- Chỉ số cơ thể -----
+    {
+        "q": "BMI là gì | chỉ số khối cơ thể là gì | cách tính BMI",
+        "a": "✅ **BMI (Body Mass Index)** là chỉ số khối cơ thể, dùng để ước lượng mức gầy/bình thường/thừa cân.\n"
+             "Công thức: **BMI = cân nặng(kg) / (chiều cao(m)²)**.\n"
+             "Bạn có thể gửi: `BMI 67kg 172cm` để mình tính.",
+    },
+    {
+        "q": "BMI bao nhiêu là bình thường | BMI chuẩn người châu Á | phân loại BMI",
+        "a": "Theo chuẩn châu Á: **< 18.5** gầy, **18.5–22.9** bình thường, **23–24.9** thừa cân, "
+             "**25–29.9** béo phì độ I, **≥ 30** béo phì độ II.",
+    },
+    {
+        "q": "BMR là gì | tỷ lệ trao đổi chất cơ bản | năng lượng lúc nghỉ",
+        "a": "✅ **BMR (Basal Metabolic Rate)** là lượng calo cơ thể tiêu thụ khi nghỉ ngơi hoàn toàn (duy trì sống).\n"
+             "BMR phụ thuộc vào **giới tính, tuổi, chiều cao, cân nặng**.\n"
+             "Ví dụ bạn gửi: `BMR 67kg 172cm 21 tuổi nam`.",
+    },
+    {
+        "q": "TDEE là gì | tổng năng lượng tiêu hao mỗi ngày | một ngày cần bao nhiêu calo",
+        "a": "✅ **TDEE (Total Daily Energy Expenditure)** là tổng calo bạn tiêu thụ mỗi ngày (BMR × mức vận động).\n"
+             "Dùng để đặt mục tiêu **giảm cân / tăng cân / duy trì**.\n"
+             "Ví dụ: `TDEE 67kg 172cm 21 tuổi nam vận động vừa`.",
+    },
+    {
+        "q": "hệ số vận động là gì | chọn mức vận động nào | ít vận động nhẹ vừa nhiều",
+        "a": "Hệ số vận động dùng để nhân với BMR ra TDEE:\n"
+             "- Ít vận động (ngồi nhiều): **×1.2**\n"
+             "- Nhẹ (tập 1–3 buổi/tuần): **×1.375**\n"
+             "- Vừa (3–5 buổi/tuần): **×1.55**\n"
+             "- Nhiều (6–7 buổi/tuần): **×1.725**\n"
+             "- Rất nhiều (lao động nặng/tập 2 lần/ngày): **×1.9**",
+    },
+    {
+        "q": "vòng eo bao nhiêu là nguy hiểm | mỡ bụng | béo bụng",
+        "a": "Với người châu Á, vòng eo **≥ 90 cm (nam)** hoặc **≥ 80 cm (nữ)** là dấu hiệu mỡ bụng cao, "
+             "tăng nguy cơ tim mạch và tiểu đường. Giảm mỡ bụng cần thâm hụt calo + tập luyện đều, "
+             "không có cách \"giảm mỡ tại chỗ\".",
+    },
+    # ----- Cân nặng -----
+    {
+        "q": "giảm cân thế nào | cách giảm cân an toàn | giảm mỡ",
+        "a": "Giảm cân bền vững: ưu tiên **thâm hụt 300–500 kcal/ngày**, tăng **protein**, ăn nhiều rau, ngủ đủ.\n"
+             "Bạn muốn mình tính **TDEE** để đặt mục tiêu không? Gửi: `TDEE 67kg 172cm 21 tuổi nam vận động vừa`.",
+    },
+    {
+        "q": "mỗi tuần giảm bao nhiêu kg là an toàn | giảm cân nhanh có hại không",
+        "a": "Mức an toàn thường là **0.5–1 kg/tuần** (tương đương thâm hụt ~500–1000 kcal/ngày). "
+             "Giảm nhanh hơn dễ mất cơ, thiếu chất và tăng cân trở lại.",
+    },
+    {
+        "q": "1kg mỡ bằng bao nhiêu calo | bao nhiêu kcal để giảm 1kg",
+        "a": "Quy ước phổ biến: **1 kg mỡ ≈ 7700 kcal**. Libra Health cũng dùng con số này để tính "
+             "tổng kcal cần thâm hụt cho mục tiêu cân nặng.",
+    },
+    {
+        "q": "tăng cân thế nào | người gầy muốn tăng cân | tăng cơ",
+        "a": "Tăng cân khỏe: tăng **200–400 kcal/ngày** so với TDEE, ưu tiên protein + tinh bột tốt, tập kháng lực.\n"
+             "Bạn gửi mình `TDEE ...` để mình ước tính mức calo mục tiêu nhé.",
+    },
+    {
+        "q": "chững cân | không giảm được cân nữa | cân đứng yên",
+        "a": "Chững cân là bình thường sau vài tuần. Hãy: tính lại TDEE theo cân nặng mới, ghi chép bữa ăn chính xác hơn, "
+             "tăng vận động hằng ngày (đi bộ, bước chân) và ngủ đủ 7–8 tiếng.",
+    },
+    {
+        "q": "nên cân vào lúc nào | cân nặng dao động trong ngày",
+        "a": "Nên cân **buổi sáng sau khi đi vệ sinh, trước khi ăn**, cùng một cân, vài lần mỗi tuần và xem xu hướng trung bình. "
+             "Cân nặng có thể dao động 1–2 kg trong ngày do nước và thức ăn.",
+    },
+    # ----- Dinh dưỡng -----
+    {
+        "q": "mỗi ngày cần bao nhiêu protein | ăn bao nhiêu đạm",
+        "a": "Người trưởng thành nên ăn khoảng **1.2–1.6 g protein/kg cân nặng/ngày** khi tập luyện "
+             "(ví dụ 60 kg → 72–96 g). Nguồn tốt: trứng, cá, thịt nạc, đậu phụ, sữa chua.",
+    },
+    {
+        "q": "uống bao nhiêu nước mỗi ngày | uống nước đủ chưa",
+        "a": "Tham khảo: khoảng **30–35 ml nước/kg cân nặng/ngày** (60 kg ≈ 2 lít), uống thêm khi tập hoặc trời nóng. "
+             "Nước tiểu vàng nhạt là dấu hiệu đủ nước.",
+    },
+    {
+        "q": "tinh bột có làm béo không | có nên bỏ cơm | ăn cơm có béo không",
+        "a": "Tăng cân do **tổng calo** vượt nhu cầu, không riêng tinh bột. Không cần bỏ cơm; hãy kiểm soát khẩu phần, "
+             "ưu tiên gạo lứt, yến mạch, khoai và ăn kèm nhiều rau, đạm.",
+    },
+    {
+        "q": "ăn tối muộn có béo không | ăn đêm",
+        "a": "Thời điểm ăn ít quan trọng hơn tổng calo cả ngày. Tuy vậy ăn quá khuya dễ ăn thừa và ngủ kém, "
+             "nên ăn tối trước khi ngủ 2–3 tiếng.",
+    },
+    {
+        "q": "một bát phở bao nhiêu calo | phở bò bao nhiêu kcal",
+        "a": "Một bát phở bò cỡ vừa khoảng **400–500 kcal** tùy lượng bánh, thịt và nước béo. "
+             "Bạn có thể ghi bữa ăn trong mục **Dinh dưỡng** để cộng kcal chính xác theo gram.",
+    },
+    {
+        "q": "một bát cơm trắng bao nhiêu calo | cơm bao nhiêu kcal",
+        "a": "Cơm trắng khoảng **130 kcal/100 g**; một bát vừa (~150–180 g) khoảng **200–240 kcal**.",
+    },
+    {
+        "q": "nhịn ăn gián đoạn là gì | intermittent fasting | ăn 16 8",
+        "a": "Nhịn ăn gián đoạn (ví dụ 16:8 – ăn trong 8 tiếng, nhịn 16 tiếng) giúp một số người dễ kiểm soát calo. "
+             "Hiệu quả giảm cân vẫn đến từ thâm hụt calo; không phù hợp với người tiểu đường, đau dạ dày, phụ nữ mang thai.",
+    },
+    {
+        "q": "ăn bao nhiêu rau mỗi ngày | chất xơ",
+        "a": "Nên ăn ít nhất **400 g rau + trái cây mỗi ngày** (khoảng 5 phần), giúp no lâu, tốt cho tiêu hóa và đường huyết.",
+    },
+    {
+        "q": "đồ uống có đường | trà sữa bao nhiêu calo | nước ngọt",
+        "a": "Một ly trà sữa trân châu có thể **300–500 kcal**, một lon nước ngọt ~140 kcal. "
+             "Đồ uống có đường là nguồn calo \"ẩn\" dễ làm hỏng mục tiêu giảm cân.",
+    },
+    # ----- Tập luyện -----
+    {
+        "q": "mỗi tuần nên tập bao nhiêu | tập bao lâu là đủ",
+        "a": "Khuyến nghị cho người trưởng thành: **150–300 phút vận động vừa** (hoặc 75–150 phút cường độ cao) mỗi tuần, "
+             "cộng **2 buổi tập sức mạnh**.",
+    },
+    {
+        "q": "chạy bộ đốt bao nhiêu calo | đi bộ đốt bao nhiêu calo",
+        "a": "Ước tính: chạy bộ ~ **cân nặng(kg) × 1 kcal mỗi km**, đi bộ thấp hơn một chút. "
+             "Libra Health tính calo tập theo chỉ số MET, thời gian và cân nặng của bạn.",
+    },
+    {
+        "q": "MET là gì | chỉ số MET",
+        "a": "MET (Metabolic Equivalent) là mức tiêu hao năng lượng so với lúc ngồi nghỉ (1 MET). "
+             "Calo ≈ MET × 3.5 × cân nặng(kg) / 200 × số phút. Ví dụ chạy bộ ~9.8 MET, đi bộ ~3.5 MET.",
+    },
+    {
+        "q": "mỗi ngày nên đi bao nhiêu bước | 10000 bước",
+        "a": "Khoảng **7.000–10.000 bước/ngày** là mục tiêu tốt cho sức khỏe tim mạch. Bạn có thể nhập số bước "
+             "khi ghi buổi tập để cộng thêm calo tiêu hao.",
+    },
+    {
+        "q": "tập gym hay chạy bộ để giảm cân | cardio hay tạ",
+        "a": "Kết hợp cả hai là tốt nhất: **cardio** giúp đốt calo, **tập tạ** giữ/tăng cơ để trao đổi chất không bị giảm "
+             "khi ăn thâm hụt.",
+    },
+    {
+        "q": "ngủ bao nhiêu tiếng | thiếu ngủ có béo không",
+        "a": "Người trưởng thành nên ngủ **7–9 tiếng/đêm**. Thiếu ngủ làm tăng cảm giác đói và thèm đồ ngọt, "
+             "khiến việc kiểm soát cân nặng khó hơn.",
+    },
+    # ----- Cách dùng Libra Health -----
+    {
+        "q": "cách ghi bữa ăn | nhập món ăn | thêm bữa ăn ở đâu",
+        "a": "Vào mục **Dinh dưỡng** → **Thêm bữa ăn**, chọn món và nhập khối lượng (gram). "
+             "Hệ thống tự tính kcal theo kcal/100 g của món.",
+    },
+    {
+        "q": "cách ghi buổi tập | nhập bài tập | thêm workout",
+        "a": "Vào mục **Tập luyện** → **Thêm buổi tập**, chọn loại hình, thời gian, quãng đường/bước chân. "
+             "Calo tiêu hao được tính tự động theo cân nặng trong hồ sơ.",
+    },
+    {
+        "q": "cách tạo mục tiêu | đặt mục tiêu cân nặng",
+        "a": "Vào mục **Mục tiêu** → **Tạo mục tiêu**, chọn giảm/tăng/duy trì, cân nặng mục tiêu và hạn hoàn thành. "
+             "Hệ thống lấy cân nặng và TDEE từ hồ sơ để gợi ý calo mỗi ngày.",
+    },
+    {
+        "q": "cập nhật hồ sơ | đổi cân nặng chiều cao | sửa thông tin cá nhân",
+        "a": "Vào **Hồ sơ** để cập nhật tuổi, giới tính, chiều cao, cân nặng và mức vận động. "
+             "BMI, BMR, TDEE sẽ được tính lại tự động khi bạn lưu.",
+    },
+    {
+        "q": "xuất báo cáo | tải csv pdf | báo cáo thống kê",
+        "a": "Vào mục **Báo cáo**, chọn khoảng ngày rồi bấm **Xuất CSV** hoặc **Xuất PDF** để tải dữ liệu tập luyện và dinh dưỡng.",
+    },
+    {
+        "q": "quên mật khẩu | lấy lại mật khẩu | đặt lại mật khẩu",
+        "a": "Ở trang đăng nhập chọn **Quên mật khẩu**, nhập tên đăng nhập hoặc email để nhận **mã OTP 6 số** (hiệu lực 10 phút), "
+             "rồi đặt mật khẩu mới.",
+    },
+]
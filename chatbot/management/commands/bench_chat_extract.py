@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.extract import Entities, extract_entities
+from chatbot.extract_golden import GOLDEN
+
+
+class Command(BaseCommand):
+    help = "Kiểm tra golden corpus + đo tốc độ bộ tách thực thể của chatbot"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=2000, help="Số vòng lặp qua corpus")
+
+    def handle(self, *args, **opts):
+        # 1) Kiểm tra kết quả
+        fails = []
+        for text, expected in GOLDEN:
+            extract_entities.cache_clear()
+            got = extract_entities(text)
+            want = Entities(**expected)
+            if got != want:
+                fails.append(f"  {text!r}\n    mong đợi: {want}\n    nhận được: {got}")
+
+        if fails:
+            raise CommandError("Golden corpus sai %d/%d câu:\n%s" % (len(fails), len(GOLDEN), "\n".join(fails)))
+        self.stdout.write(self.style.SUCCESS(f"Golden corpus: {len(GOLDEN)}/{len(GOLDEN)} câu đúng."))
+
+        # 2) Benchmark
+        rounds = opts["rounds"]
+        texts = [t for t, _ in GOLDEN]
+        total = rounds * len(texts)
+
+        cold = extract_entities.__wrapped__
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for t in texts:
+                cold(t)
+        cold_s = time.perf_counter() - t0
+
+        extract_entities.cache_clear()
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for t in texts:
+                extract_entities(t)
+        warm_s = time.perf_counter() - t0
+
+        self.stdout.write(
+            f"Không cache : {total / cold_s:,.0f} tin/giây ({cold_s / total * 1e6:.1f} µs/tin)\n"
+            f"Có LRU cache: {total / warm_s:,.0f} tin/giây ({warm_s / total * 1e6:.2f} µs/tin)\n"
+            f"{extract_entities.cache_info()}"
+        )
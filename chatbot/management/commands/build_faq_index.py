@@ -0,0 +1,67 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from chatbot.faq import FAQ
+from chatbot.retrieval import FaqIndex, build_index_bytes, default_index_path, write_index
+
+# Câu hỏi mẫu để đo tốc độ truy vấn
+SAMPLE_QUERIES = [
+    "BMI là gì?",
+    "uống bao nhiêu nước 1 ngày",
+    "phở bao nhiêu calo",
+    "mình muốn giảm cân",
+    "quên mật khẩu thì làm sao",
+    "giảm 1kg cần bao nhiêu kcal",
+    "tôi nên ăn bao nhiêu rau",
+    "thời tiết hà nội",
+]
+
+
+class Command(BaseCommand):
+    help = "Build chỉ mục BM25 cho FAQ chatbot (chạy khi deploy); --bench để đo tốc độ"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None, help="Đường dẫn file chỉ mục")
+        parser.add_argument("--bench", type=int, default=0, help="Số vòng truy vấn để benchmark")
+
+    def handle(self, *args, **opts):
+        path = Path(opts["path"]) if opts["path"] else default_index_path()
+
+        t0 = time.perf_counter()
+        write_index(path)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        idx = FaqIndex.load(path)
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã build {path}: {len(FAQ)} mục, {len(idx.terms)} term, "
+            f"{idx.meta['n_postings']} posting, {path.stat().st_size} byte"
+        ))
+        self.stdout.write(f"Build: {build_ms:.2f} ms | mmap load: {load_ms:.3f} ms")
+
+        rounds = opts["bench"]
+        if rounds <= 0:
+            return
+
+        t0 = time.perf_counter()
+        for _ in range(20):
+            build_index_bytes()
+        self.stdout.write(f"Build (trung bình 20 lần, chỉ trong RAM): {(time.perf_counter() - t0) / 20 * 1000:.2f} ms")
+
+        lat = []
+        for _ in range(rounds):
+            for q in SAMPLE_QUERIES:
+                s = time.perf_counter()
+                idx.search(q, k=3)
+                lat.append(time.perf_counter() - s)
+        lat.sort()
+        total = sum(lat)
+        p50 = lat[len(lat) // 2] * 1e6
+        p99 = lat[int(len(lat) * 0.99) - 1] * 1e6
+        self.stdout.write(
+            f"Truy vấn: {len(lat) / total:,.0f} query/giây | p50 {p50:.1f} µs | p99 {p99:.1f} µs"
+        )
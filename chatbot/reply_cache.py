@@ -0,0 +1,67 @@
+# chatbot/reply_cache.py
+"""
+Cache nhỏ trong bộ nhớ cho các câu trả lời "tĩnh" (kiểu FAQ: "BMI là gì",
+"xin chào", ...). Câu trả lời chỉ phụ thuộc nội dung tin nhắn nên tin nhắn
+giống nhau (sau khi chuẩn hóa) được trả ngay, không chạy lại rule engine.
+
+Chỉ lưu khi câu không chứa số liệu cá nhân (cân nặng, tuổi, ...) và ý
+định thuộc STATIC_INTENTS.
+"""
+import re
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+
+STATIC_INTENTS = {
+    "greet", "thanks",
+    "define_bmi", "define_bmr", "define_tdee",
+    "lose_weight", "gain_weight", "nutrition", "workout",
+    "fallback",
+    "faq",  # câu trả lời lấy từ bộ FAQ (chatbot.backends.RetrievalBackend)
+}
+
+_MAX_ITEMS = 512
+_items = OrderedDict()
+_lock = Lock()
+_stats = {"hits": 0, "misses": 0}
+
+_SPACES_RE = re.compile(r"[\s?!.,]+")
+
+
+def normalize(text: str) -> str:
+    """ "  BMI  là gì ??" -> "bmi là gì" (giữ dấu vì rule engine phân biệt "ăn"/"an") """
+    t = unicodedata.normalize("NFC", (text or "").lower())
+    return _SPACES_RE.sub(" ", t).strip()
+
+
+def get(key: str):
+    """Trả về (intent, reply) hoặc None."""
+    with _lock:
+        hit = _items.get(key)
+        if hit is None:
+            _stats["misses"] += 1
+            return None
+        _items.move_to_end(key)
+        _stats["hits"] += 1
+        return hit
+
+
+def put(key: str, intent: str, reply: str) -> None:
+    if intent not in STATIC_INTENTS:
+        return
+    with _lock:
+        _items[key] = (intent, reply)
+        _items.move_to_end(key)
+        while len(_items) > _MAX_ITEMS:
+            _items.popitem(last=False)
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "size": len(_items)}
+
+
+def clear() -> None:
+    with _lock:
+        _items.clear()
+        _stats.update(hits=0, misses=0)
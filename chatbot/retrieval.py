@@ -0,0 +1,204 @@
+# chatbot/retrieval.py
+"""
+Chỉ mục BM25 cho bộ FAQ (chatbot.faq) – chạy hoàn toàn offline.
+
+- Token = từ đã bỏ dấu + cặp từ liền kề (bigram), vì từ tiếng Việt thường
+  gồm 2 âm tiết ("giảm cân", "dinh dưỡng").
+- Trọng số BM25 của từng (term, doc) được tính sẵn lúc build, nên truy vấn
+  chỉ là cộng dồn vài số float -> dưới 1 ms.
+- Chỉ mục được ghi ra file nhị phân (settings.CHATBOT_FAQ_INDEX_PATH) và
+  mở lại bằng mmap; file tự build lại khi nội dung FAQ thay đổi.
+
+Định dạng file:
+    MAGIC(8) | meta_len(uint32) | meta JSON | padding | doc_ids(uint32[]) | weights(float32[])
+"""
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+from .extract import fold
+from .faq import FAQ
+
+MAGIC = b"LHBM25\x01\x00"
+K1 = 1.2
+B = 0.75
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str):
+    """Unigram + bigram trên chuỗi đã bỏ dấu."""
+    words = _WORD_RE.findall(fold(text))
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def corpus_hash(docs=None) -> str:
+    docs = FAQ if docs is None else docs
+    raw = json.dumps([K1, B, docs], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def default_index_path() -> Path:
+    path = getattr(settings, "CHATBOT_FAQ_INDEX_PATH", None)
+    return Path(path) if path else Path(settings.BASE_DIR) / "var" / "chatbot_faq.bm25"
+
+
+# ==============================
+# Build
+# ==============================
+
+def build_index_bytes(docs=None) -> bytes:
+    """Dựng chỉ mục BM25 từ FAQ, trả về nội dung file nhị phân."""
+    docs = FAQ if docs is None else docs
+
+    doc_tfs = []
+    for d in docs:
+        # câu hỏi mẫu quan trọng hơn câu trả lời -> đếm 2 lần
+        toks = tokenize(d["q"]) * 2 + tokenize(d["a"])
+        doc_tfs.append(Counter(toks))
+
+    n_docs = len(docs)
+    lengths = [sum(tf.values()) for tf in doc_tfs]
+    avgdl = (sum(lengths) / n_docs) if n_docs else 0.0
+
+    postings = defaultdict(list)
+    for doc_id, tf in enumerate(doc_tfs):
+        for term, f in tf.items():
+            postings[term].append((doc_id, f))
+
+    ids = array("I")
+    weights = array("f")
+    terms = {}
+    for term in sorted(postings):
+        plist = postings[term]
+        df = len(plist)
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        terms[term] = [len(ids), df]
+        for doc_id, f in plist:
+            norm = f + K1 * (1 - B + B * lengths[doc_id] / avgdl)
+            ids.append(doc_id)
+            weights.append(idf * f * (K1 + 1) / norm)
+
+    meta = {
+        "hash": corpus_hash(docs),
+        "byteorder": sys.byteorder,
+        "n_docs": n_docs,
+        "n_postings": len(ids),
+        "terms": terms,
+    }
+    meta_raw = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    head = MAGIC + struct.pack("<I", len(meta_raw)) + meta_raw
+    head += b"\0" * (-len(head) % 4)  # căn lề 4 byte cho cast("I"/"f")
+    return head + ids.tobytes() + weights.tobytes()
+
+
+def write_index(path=None, docs=None) -> Path:
+    path = Path(path or default_index_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    tmp.write_bytes(build_index_bytes(docs))
+    os.replace(tmp, path)  # ghi nguyên tử, worker khác không đọc phải file dở
+    return path
+
+
+# ==============================
+# Query
+# ==============================
+
+class FaqIndex:
+    def __init__(self, buf, docs=None, _mm=None):
+        self.docs = FAQ if docs is None else docs
+        self._mm = _mm  # giữ tham chiếu để mmap không bị đóng
+        mv = memoryview(buf)
+        if bytes(mv[:8]) != MAGIC:
+            raise ValueError("Sai định dạng chỉ mục FAQ")
+        (meta_len,) = struct.unpack("<I", mv[8:12])
+        meta = json.loads(bytes(mv[12:12 + meta_len]).decode("utf-8"))
+        start = 12 + meta_len
+        start += -start % 4
+        n = meta["n_postings"]
+        self.meta = meta
+        self.terms = meta["terms"]
+        self.ids = mv[start:start + 4 * n].cast("I")
+        self.weights = mv[start + 4 * n:start + 8 * n].cast("f")
+
+    @property
+    def fresh(self) -> bool:
+        return self.meta["hash"] == corpus_hash(self.docs) and self.meta["byteorder"] == sys.byteorder
+
+    @classmethod
+    def load(cls, path=None):
+        """Mở file chỉ mục bằng mmap (chỉ đọc)."""
+        with open(path or default_index_path(), "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mm, _mm=mm)
+
+    def search(self, query: str, k: int = 3):
+        """
+        Trả về list (score, coverage, doc) tốt nhất.
+        coverage = tỷ lệ từ (unigram) của câu hỏi xuất hiện trong doc.
+        """
+        toks = set(tokenize(query))
+        n_words = sum(1 for t in toks if "_" not in t) or 1
+        scores = defaultdict(float)
+        hits = defaultdict(int)
+        ids, weights, terms = self.ids, self.weights, self.terms
+        for term in toks:
+            entry = terms.get(term)
+            if entry is None:
+                continue
+            off, cnt = entry
+            unigram = "_" not in term
+            for p in range(off, off + cnt):
+                d = ids[p]
+                scores[d] += weights[p]
+                if unigram:
+                    hits[d] += 1
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(s, hits[d] / n_words, self.docs[d]) for d, s in best]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index() -> FaqIndex:
+    """
+    Chỉ mục dùng chung trong process: mở file mmap nếu còn khớp FAQ,
+    ngược lại build lại (và ghi file nếu thư mục ghi được).
+    """
+    global _index
+    if _index is not None:
+        return _index
+    with _lock:
+        if _index is not None:
+            return _index
+        path = default_index_path()
+        idx = None
+        if path.exists():
+            try:
+                idx = FaqIndex.load(path)
+                if not idx.fresh:
+                    idx = None
+            except (OSError, ValueError):
+                idx = None
+        if idx is None:
+            try:
+                idx = FaqIndex.load(write_index(path))
+            except OSError:
+                # không ghi được đĩa -> giữ chỉ mục trong RAM
+                idx = FaqIndex(build_index_bytes())
+        _index = idx
+        return _index
@@ -0,0 +1,272 @@
+# chatbot/rules.py
+"""
+Rule engine của chatbot (chế độ FREE): nhận diện ý định và trả lời
+BMI / BMR / TDEE, định nghĩa, gợi ý dinh dưỡng – tập luyện, cùng các câu
+hỏi cá nhân dựa trên snapshot của user.
+"""
+import re
+
+from accounts.models import ACTIVITY_FACTOR
+from .extract import extract_entities, fold
+
+# Ý định có phép tính -> câu hỏi nối tiếp có thể dùng lại
+CALC_INTENTS = ("bmi", "bmr", "tdee")
+
+# ==============================
+# Helpers
+# ==============================
+
+def norm(s: str) -> str:
+    return (s or "").strip().lower()
+
+def _bmi(weight_kg: float, height_cm: float) -> float:
+    h_m = height_cm / 100.0
+    return weight_kg / (h_m * h_m)
+
+def _bmi_asian_category(bmi: float) -> str:
+    # chuẩn châu Á (tham khảo phổ biến)
+    if bmi < 18.5:
+        return "Gầy"
+    if bmi < 23:
+        return "Bình thường"
+    if bmi < 25:
+        return "Thừa cân (tiền béo phì)"
+    if bmi < 30:
+        return "Béo phì độ I"
+    return "Béo phì độ II"
+
+def _bmr_mifflin(weight_kg: float, height_cm: float, age: int, sex: str) -> float:
+    # Mifflin-St Jeor: Nam = 10w + 6.25h - 5a + 5 ; Nữ = ... -161
+    base = 10 * weight_kg + 6.25 * height_cm - 5 * age
+    if sex == "female":
+        return base - 161
+    return base + 5
+
+def _tdee_multiplier(activity: str) -> float:
+    # mức vận động phổ biến (mã theo ACTIVITY_CHOICES); mặc định "vừa"
+    return ACTIVITY_FACTOR.get(activity or "moderate", ACTIVITY_FACTOR["moderate"])
+
+# Dấu hiệu câu hỏi về dữ liệu của chính user (đã bỏ dấu). Không có thì để
+# rule chung trả lời: "nên tập mấy buổi một tuần" không phải hỏi số liệu.
+_PERSONAL_WORDS = {"toi", "minh", "tao", "my", "me"}
+_PERSONAL_PHRASES = ("hom nay", "tuan nay", "7 ngay qua", "7 ngay gan")
+
+
+def _is_personal(f: str, words: set) -> bool:
+    return bool(_PERSONAL_WORDS & words) or any(p in f for p in _PERSONAL_PHRASES)
+
+
+def reply_personal(user_text: str, snap) -> str | None:
+    """
+    Trả lời từ dữ liệu của chính user (chế độ đã đăng nhập).
+    Trả về None nếu câu hỏi không thuộc nhóm cá nhân.
+    """
+    f = fold(norm(user_text))
+    words = set(re.findall(r"\w+", f))
+    if not _is_personal(f, words):
+        return None
+
+    # "hôm nay mình ăn bao nhiêu kcal?"
+    if "hom nay" in f and ({"kcal", "calo", "calories", "an", "dot"} & words):
+        lines = [
+            f"📅 Hôm nay bạn đã ăn **{snap.today_in:.0f} kcal** "
+            f"và đốt **{snap.today_out:.0f} kcal** khi tập."
+        ]
+        if snap.tdee:
+            net = snap.today_in - snap.tdee - snap.today_out
+            state = "thâm hụt" if net < 0 else "dư"
+            lines.append(
+                f"So với TDEE {snap.tdee:.0f} kcal: đang **{state} {abs(net):.0f} kcal**."
+            )
+        if snap.goal_daily_in:
+            left = snap.goal_daily_in - snap.today_in
+            if left > 0:
+                lines.append(f"Bạn còn khoảng **{left:.0f} kcal** để chạm mức mục tiêu {snap.goal_daily_in:.0f} kcal/ngày.")
+            else:
+                lines.append(f"Bạn đã vượt mức mục tiêu {snap.goal_daily_in:.0f} kcal/ngày **{-left:.0f} kcal**.")
+        return "\n".join(lines)
+
+    # "7 ngày qua / tuần này mình ăn trung bình bao nhiêu?"
+    if "trung binh" in f or "7 ngay" in f or "tuan nay" in f:
+        return (
+            f"📊 Trung bình 7 ngày gần nhất: ăn **{snap.avg_in_7d:.0f} kcal/ngày**, "
+            f"đốt **{snap.avg_out_7d:.0f} kcal/ngày** khi tập."
+        )
+
+    # "mục tiêu của mình còn bao xa?"
+    if "muc tieu" in f or "goal" in words:
+        if not snap.goal_type:
+            return (
+                "Bạn chưa có mục tiêu đang thực hiện. "
+                "Vào mục **Mục tiêu** để tạo mục tiêu cân nặng nhé."
+            )
+        lines = [f"🎯 Mục tiêu: **{snap.goal_type_label}** tới **{snap.goal_target_kg:g} kg**."]
+        if snap.weight_kg and snap.goal_target_kg:
+            remain = abs(snap.weight_kg - snap.goal_target_kg)
+            lines.append(f"Cân nặng hiện tại {snap.weight_kg:g} kg → còn **{remain:.1f} kg**.")
+        if snap.goal_deadline:
+            days_left = (snap.goal_deadline - snap.day).days
+            if days_left >= 0:
+                lines.append(f"Còn {days_left} ngày đến hạn ({snap.goal_deadline.strftime('%d/%m/%Y')}).")
+            else:
+                lines.append(f"Đã trễ hạn {-days_left} ngày.")
+        if snap.goal_daily_in:
+            lines.append(f"Gợi ý calo nạp mỗi ngày ~ {snap.goal_daily_in:.0f} kcal.")
+        return "\n".join(lines)
+
+    return None
+
+def detect_intent(t: str) -> str:
+    """Nhận diện ý định của câu (t đã qua _norm)."""
+    if re.fullmatch(r"(hi|hello|hey|xin chào|chào|chao|alo|lô|lo)\b.*", t):
+        return "greet"
+    if "cảm ơn" in t or "cam on" in t or "thanks" in t:
+        return "thanks"
+    if "bmi là gì" in t or re.search(r"\bbmi\b.*là gì", t):
+        return "define_bmi"
+    if "bmr là gì" in t or re.search(r"\bbmr\b.*là gì", t):
+        return "define_bmr"
+    if "tdee là gì" in t or re.search(r"\btdee\b.*là gì", t):
+        return "define_tdee"
+    if "bmi" in t:
+        return "bmi"
+    if "bmr" in t:
+        return "bmr"
+    if "tdee" in t:
+        return "tdee"
+    if "giảm cân" in t or "giam can" in t:
+        return "lose_weight"
+    if "tăng cân" in t or "tang can" in t:
+        return "gain_weight"
+    if "ăn" in t or "dinh dưỡng" in t or "dinh duong" in t:
+        return "nutrition"
+    if "tập" in t or "tap" in t or "gym" in t:
+        return "workout"
+    return "fallback"
+
+def reply_rule_based(user_text: str, known=None, intent=None) -> str:
+    """
+    known: Entities lấy từ hồ sơ user / lượt chat trước để bù vào
+    những số liệu mà câu hỏi không nhắc tới.
+    intent: ý định đã nhận diện sẵn (None -> tự nhận diện).
+    """
+    t = norm(user_text)
+    ents = extract_entities(t).merged(known)
+    intent = intent or detect_intent(t)
+
+    # 0) chào hỏi / xã giao
+    if intent == "greet":
+        return (
+            "Chào bạn 👋 Mình là Trợ lý sức khỏe của Libra Health.\n"
+            "Bạn có thể hỏi về **BMI, BMR, TDEE**, dinh dưỡng, tập luyện hoặc cách dùng web.\n"
+            "Ví dụ:\n"
+            "- `BMI 67kg 172cm`\n"
+            "- `BMR là gì?`\n"
+            "- `TDEE 67kg 172cm 21 tuổi nam vận động vừa`"
+        )
+
+    if intent == "thanks":
+        return "Không có gì 😊 Nếu cần tính BMI/BMR/TDEE hoặc gợi ý ăn uống/tập luyện, bạn cứ nhắn nhé!"
+
+    # 1) hỏi định nghĩa
+    if intent == "define_bmi":
+        return (
+            "✅ **BMI (Body Mass Index)** là chỉ số khối cơ thể, dùng để ước lượng mức gầy/bình thường/thừa cân.\n"
+            "Công thức: **BMI = cân nặng(kg) / (chiều cao(m)²)**.\n"
+            "Bạn có thể gửi: `BMI 67kg 172cm` để mình tính."
+        )
+
+    if intent == "define_bmr":
+        return (
+            "✅ **BMR (Basal Metabolic Rate)** là lượng calo cơ thể tiêu thụ khi nghỉ ngơi hoàn toàn (duy trì sống).\n"
+            "BMR phụ thuộc vào **giới tính, tuổi, chiều cao, cân nặng**.\n"
+            "Ví dụ bạn gửi: `BMR 67kg 172cm 21 tuổi nam`."
+        )
+
+    if intent == "define_tdee":
+        return (
+            "✅ **TDEE (Total Daily Energy Expenditure)** là tổng calo bạn tiêu thụ mỗi ngày (BMR × mức vận động).\n"
+            "Dùng để đặt mục tiêu **giảm cân / tăng cân / duy trì**.\n"
+            "Ví dụ: `TDEE 67kg 172cm 21 tuổi nam vận động vừa`."
+        )
+
+    # 2) tính BMI
+    if intent == "bmi":
+        w, h = ents.weight_kg, ents.height_cm
+        if w and h:
+            bmi = _bmi(w, h)
+            cat = _bmi_asian_category(bmi)
+            return f"✅ BMI của bạn là **{bmi:.2f}** (**{cat}** theo chuẩn châu Á)."
+        return "Bạn gửi giúp mình **cân nặng + chiều cao** nha. Ví dụ: `BMI 67kg 172cm`."
+
+    # 3) tính BMR
+    if intent == "bmr":
+        w, h, age, sex = ents.weight_kg, ents.height_cm, ents.age, ents.sex
+
+        if not (w and h and age and sex):
+            return (
+                "Để tính **BMR**, bạn cần cho mình đủ: **cân nặng, chiều cao, tuổi, giới tính**.\n"
+                "Ví dụ: `BMR 67kg 172cm 21 tuổi nam`"
+            )
+
+        bmr = _bmr_mifflin(w, h, age, sex)
+        return f"✅ BMR ước tính của bạn là **{bmr:.0f} kcal/ngày** (công thức Mifflin–St Jeor)."
+
+    # 4) tính TDEE
+    if intent == "tdee":
+        w, h, age, sex = ents.weight_kg, ents.height_cm, ents.age, ents.sex
+        # mức vận động (ít/nhẹ/vừa/nặng/rất nặng), mặc định "vừa"
+        activity = ents.activity
+
+        if not (w and h and age and sex):
+            return (
+                "Để tính **TDEE**, bạn cần: **cân nặng, chiều cao, tuổi, giới tính, mức vận động**.\n"
+                "Ví dụ: `TDEE 67kg 172cm 21 tuổi nam vận động vừa`"
+            )
+
+        bmr = _bmr_mifflin(w, h, age, sex)
+        mul = _tdee_multiplier(activity)
+        tdee = bmr * mul
+
+        return (
+            f"✅ TDEE ước tính của bạn là **{tdee:.0f} kcal/ngày**.\n"
+            f"(BMR ≈ {bmr:.0f} × hệ số vận động {mul})\n"
+            "Gợi ý nhanh:\n"
+            "- **Giảm cân**: ăn thấp hơn TDEE ~ 300–500 kcal/ngày\n"
+            "- **Tăng cân**: ăn cao hơn TDEE ~ 200–400 kcal/ngày\n"
+            "- **Duy trì**: ăn gần bằng TDEE"
+        )
+
+    # 5) dinh dưỡng / tập luyện chung
+    if intent == "lose_weight":
+        return (
+            "Giảm cân bền vững: ưu tiên **thâm hụt 300–500 kcal/ngày**, tăng **protein**, ăn nhiều rau, ngủ đủ.\n"
+            "Bạn muốn mình tính **TDEE** để đặt mục tiêu không? Gửi: `TDEE 67kg 172cm 21 tuổi nam vận động vừa`."
+        )
+
+    if intent == "gain_weight":
+        return (
+            "Tăng cân khỏe: tăng **200–400 kcal/ngày** so với TDEE, ưu tiên protein + tinh bột tốt, tập kháng lực.\n"
+            "Bạn gửi mình `TDEE ...` để mình ước tính mức calo mục tiêu nhé."
+        )
+
+    if intent == "nutrition":
+        return (
+            "Về dinh dưỡng: bạn có thể theo dõi bữa ăn trong mục **Dinh dưỡng** để cộng tổng kcal trong ngày.\n"
+            "Nếu bạn cho mình mục tiêu (giảm/tăng/duy trì) + TDEE, mình gợi ý mức kcal/ngày phù hợp."
+        )
+
+    if intent == "workout":
+        return (
+            "Về tập luyện: bạn có thể nhập bài tập và thời lượng trong mục **Tập luyện** để ước tính calo tiêu hao.\n"
+            "Bạn đang muốn **giảm mỡ** hay **tăng cơ**? Mình gợi ý lịch tập đơn giản cho bạn."
+        )
+
+    # 6) fallback
+    return (
+        "Mình hỗ trợ các vấn đề về **BMI, BMR, TDEE, dinh dưỡng, tập luyện** và cách dùng Libra Health.\n"
+        "Bạn thử gửi:\n"
+        "- `BMI 67kg 172cm`\n"
+        "- `BMR là gì?`\n"
+        "- `TDEE 67kg 172cm 21 tuổi nam vận động vừa`"
+    )
@@ -0,0 +1,13 @@
+# chatbot/signals.py
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .conversation import clear_state, user_conversation_key
+
+
+@receiver(post_delete, sender=User)
+def drop_chat_state(sender, instance, **kwargs):
+    # User bị xoá -> bỏ hội thoại đang lưu. Snapshot (chatbot.context) khoá
+    # theo version change feed nên không cần xoá, tự hết hạn theo TTL.
+    clear_state(user_conversation_key(instance.pk))
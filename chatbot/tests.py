@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from .extract import Entities, extract_entities
+from .extract_golden import GOLDEN
+
+
+class ExtractEntitiesTests(SimpleTestCase):
+    """chatbot.extract trên golden corpus (chatbot/extract_golden.py)."""
+
+    def setUp(self):
+        extract_entities.cache_clear()
+
+    def test_golden_corpus(self):
+        for text, expected in GOLDEN:
+            with self.subTest(text=text):
+                self.assertEqual(extract_entities(text), Entities(**expected))
+
+    def test_merged_keeps_message_values(self):
+        got = extract_entities("bmi 70kg").merged(Entities(weight_kg=60, height_cm=170))
+        self.assertEqual((got.weight_kg, got.height_cm), (70, 170))
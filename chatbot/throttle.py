@@ -0,0 +1,86 @@
+# chatbot/throttle.py
+"""
+Giới hạn tần suất gọi /api/chat/ bằng thuật toán token bucket.
+
+Mỗi client (user đã đăng nhập hoặc IP) có 1 "xô" chứa tối đa
+CHAT_RATE_BURST token, được nạp lại CHAT_RATE_PER_MINUTE token/phút.
+Mỗi tin nhắn tiêu 1 token; hết token -> 429 kèm Retry-After.
+
+Trạng thái xô lưu trong Django cache (locmem / DB / file đều chạy được,
+không cần Redis). Với nhiều worker dùng chung DB/file cache, việc đọc-ghi
+không nguyên tử nên có thể lọt thêm vài request khi rất đông – chấp nhận
+được cho mục đích chống spam.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _rate():
+    per_min = float(getattr(settings, "CHAT_RATE_PER_MINUTE", 30))
+    burst = float(getattr(settings, "CHAT_RATE_BURST", 10))
+    return per_min / 60.0, burst
+
+
+def client_ip(request) -> str:
+    # Đầu X-Forwarded-For là giá trị client tự gửi -> không tin. Sau N proxy
+    # tin cậy (TRUSTED_PROXY_COUNT), IP thật là phần tử thứ N tính từ cuối
+    # (mỗi proxy nối thêm IP nó nhận được); không có proxy -> REMOTE_ADDR.
+    proxies = getattr(settings, "TRUSTED_PROXY_COUNT", 0)
+    if proxies > 0:
+        hops = [h.strip() for h in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if h.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.META.get("REMOTE_ADDR", "") or "unknown"
+
+
+def client_ident(request, user=None) -> str:
+    # view async truyền user đã lấy bằng request.auser()
+    if user is None:
+        user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"u{user.pk}"
+    return f"ip{client_ip(request)}"
+
+
+def take_token(ident: str, now=None):
+    """
+    Lấy 1 token cho client.
+    Trả về (allowed, retry_after_giây).
+    """
+    if now is None:
+        now = time.time()
+    key = f"chatbot:rl:{ident}"
+    allowed, retry_after, state, ttl = _take(cache.get(key), now)
+    cache.set(key, state, ttl)
+    return allowed, retry_after
+
+
+async def atake_token(ident: str, now=None):
+    """Như take_token, dùng API async của cache (view async)."""
+    if now is None:
+        now = time.time()
+    key = f"chatbot:rl:{ident}"
+    allowed, retry_after, state, ttl = _take(await cache.aget(key), now)
+    await cache.aset(key, state, ttl)
+    return allowed, retry_after
+
+
+def _take(state, now):
+    """(trạng thái xô trong cache, now) -> (allowed, retry_after, trạng thái mới, ttl)."""
+    refill, burst = _rate()
+    tokens, ts = state or (burst, now)
+    tokens = min(burst, tokens + (now - ts) * refill)
+
+    if tokens >= 1:
+        allowed, retry_after = True, 0
+        tokens -= 1
+    else:
+        allowed = False
+        retry_after = math.ceil((1 - tokens) / refill) if refill > 0 else 60
+
+    # giữ key đủ lâu để xô đầy lại rồi tự hết hạn
+    ttl = math.ceil(burst / refill) + 1 if refill > 0 else 3600
+    return allowed, retry_after, (tokens, now), ttl
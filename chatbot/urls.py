@@ -1,9 +1,11 @@
 # chatbot/urls.py
+from django.conf import settings
 from django.urls import path
-from .views import health_chat
+from .views import health_chat, health_chat_async
 
 app_name = "chatbot"
 
 urlpatterns = [
-    path("", health_chat, name="health_chat"),
+    # ASGI (ASYNC_VIEWS) -> bản async, WSGI -> bản sync
+    path("", health_chat_async if settings.ASYNC_VIEWS else health_chat, name="health_chat"),
 ]
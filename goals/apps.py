@@ -2,3 +2,7 @@ from django.apps import AppConfig
 class GoalsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "goals"
+
+    def ready(self):
+        # cập nhật tổng chạy tiến độ khi Meal / Workout / cân nặng thay đổi
+        from . import signals  # noqa: F401
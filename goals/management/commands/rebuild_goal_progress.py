@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from goals.models import Goal
+from goals.progress import rebuild
+
+
+class Command(BaseCommand):
+    help = "Tính lại tổng chạy tiến độ (kcal ăn/đốt, cân nặng mới nhất) cho các mục tiêu"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Chỉ tính cho username này")
+        parser.add_argument("--all", action="store_true", help="Gồm cả mục tiêu đã kết thúc")
+
+    def handle(self, *args, **opts):
+        goals = Goal.objects.all()
+        if not opts.get("all"):
+            goals = goals.filter(status="in_progress")
+        if opts.get("user"):
+            goals = goals.filter(user__username=opts["user"])
+
+        n = 0
+        for goal in goals.iterator():
+            rebuild(goal)
+            n += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Đã tính lại tiến độ cho {n} mục tiêu."))
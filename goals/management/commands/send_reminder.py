@@ -1,32 +1,42 @@
+from itertools import groupby
+
 from django.core.management.base import BaseCommand
 from django.core.mail import send_mail
-from django.contrib.auth import get_user_model
 from goals.models import Goal
+from goals.progress import progress_for
+from healthmanager import metrics
 
-User = get_user_model()
 
 class Command(BaseCommand):
     help = "Gửi email nhắc nhở tập luyện / dinh dưỡng cho các mục tiêu đang thực hiện"
 
     def handle(self, *args, **kwargs):
-        # Chỉ lấy user có email
-        users = User.objects.filter(is_active=True).exclude(email="").exclude(email__isnull=True)
+        # Toàn bộ goal đang thực hiện của user có email: 1 truy vấn, gom theo user
+        goals = list(
+            Goal.objects.filter(status="in_progress", user__is_active=True)
+            .exclude(user__email="")
+            .exclude(user__email__isnull=True)
+            .select_related("user__profile")
+            .order_by("user_id", "-created")
+        )
 
-        if not users.exists():
+        if not goals:
             self.stdout.write("Không có user nào có email để gửi.")
             return
 
-        for user in users:
-            # Lấy các Goal đang ở trạng thái 'in_progress'
-            goals = Goal.objects.filter(user=user, status="in_progress")
-            if not goals.exists():
-                continue
+        progress = progress_for(goals)
+        sent = failed = 0
+
+        for _, user_goals in groupby(goals, key=lambda g: g.user_id):
+            user_goals = list(user_goals)
+            user = user_goals[0].user
 
             lines = []
-            for g in goals:
+            for g in user_goals:
                 type_label = dict(Goal.GOAL_TYPE_CHOICES).get(g.type, g.type)
                 lines.append(
-                    f"- Mục tiêu: {type_label}, mục tiêu: {g.target_value}, tiến độ: {g.progress_pct}%"
+                    f"- Mục tiêu: {type_label}, mục tiêu: {g.target_value}, "
+                    f"tiến độ: {progress[g.pk].progress_pct}%"
                 )
 
             message = (
@@ -36,12 +46,22 @@ class Command(BaseCommand):
                 + "\n\nCố gắng duy trì thói quen tốt nhé!"
             )
 
-            send_mail(
-                subject="Nhắc nhở sức khỏe hôm nay",
-                message=message,
-                from_email=None,  # sẽ dùng DEFAULT_FROM_EMAIL trong settings
-                recipient_list=[user.email],
-                fail_silently=False,
-            )
+            # 1 địa chỉ lỗi không chặn các user còn lại
+            try:
+                send_mail(
+                    subject="Nhắc nhở sức khỏe hôm nay",
+                    message=message,
+                    from_email=None,  # sẽ dùng DEFAULT_FROM_EMAIL trong settings
+                    recipient_list=[user.email],
+                    fail_silently=False,
+                )
+            except Exception as exc:
+                failed += 1
+                metrics.REMINDER_EMAILS.inc("failed")
+                self.stderr.write(f"Gửi cho {user.email} lỗi: {exc}")
+            else:
+                sent += 1
+                metrics.REMINDER_EMAILS.inc("sent")
 
-        self.stdout.write(self.style.SUCCESS("Đã gửi email nhắc nhở cho các user có mục tiêu đang thực hiện."))
+        metrics.flush()  # process cron tắt ngay sau đó -> ghi số liệu cho /metrics
+        self.stdout.write(self.style.SUCCESS(f"Đã gửi {sent} email nhắc nhở ({failed} lỗi)."))
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:06
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_totals(apps, schema_editor):
+    # Tính tổng chạy ban đầu cho các goal đã có (sau đó goals.signals cập nhật dần)
+    Goal = apps.get_model("goals", "Goal")
+    Meal = apps.get_model("tracker", "Meal")
+    Workout = apps.get_model("tracker", "Workout")
+    ProfileMetric = apps.get_model("accounts", "ProfileMetric")
+
+    for goal in Goal.objects.all().iterator():
+        rng = {"user_id": goal.user_id, "date__gte": goal.start_date}
+        if goal.deadline:
+            rng["date__lte"] = goal.deadline
+        points = ProfileMetric.objects.filter(user_id=goal.user_id, date__gt=goal.start_date)
+        if goal.deadline:
+            points = points.filter(date__lte=goal.deadline)
+        Goal.objects.filter(pk=goal.pk).update(
+            kcal_in_total=Meal.objects.filter(**rng).aggregate(s=Sum("calories_in"))["s"] or 0.0,
+            kcal_out_total=Workout.objects.filter(**rng).aggregate(s=Sum("calories_out"))["s"] or 0.0,
+            latest_weight_kg=points.order_by("-date", "-id").values_list("weight_kg", flat=True).first(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0004_alter_goal_start_date'),
+        ('tracker', '0003_food_meal_quantity_gram_alter_meal_calories_in_and_more'),
+        ('accounts', '0006_profilemetric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='kcal_in_total',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='kcal_out_total',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='latest_weight_kg',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-19 16:20
+
+from django.db import migrations, models
+
+
+def backfill_meal_days(apps, schema_editor):
+    Goal = apps.get_model("goals", "Goal")
+    Meal = apps.get_model("tracker", "Meal")
+
+    for goal in Goal.objects.all().iterator():
+        rng = {"user_id": goal.user_id, "date__gte": goal.start_date}
+        if goal.deadline:
+            rng["date__lte"] = goal.deadline
+        Goal.objects.filter(pk=goal.pk).update(
+            meal_days=Meal.objects.filter(**rng).values("date").distinct().count(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0005_goal_progress_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='meal_days',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_meal_days, migrations.RunPython.noop),
+    ]
@@ -4,7 +4,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-from accounts.models import Profile
+from accounts.models import Profile, ProfileMetric
 
 
 class Goal(models.Model):
@@ -68,6 +68,12 @@ class Goal(models.Model):
 
     last_reminder_sent = models.DateField(null=True, blank=True)
 
+    # Tổng chạy cho tiến độ (goals.progress), cập nhật dần qua goals.signals
+    kcal_in_total = models.FloatField(default=0.0, editable=False)
+    kcal_out_total = models.FloatField(default=0.0, editable=False)
+    latest_weight_kg = models.FloatField(null=True, blank=True, editable=False)
+    meal_days = models.PositiveIntegerField(default=0, editable=False)  # số ngày có ghi bữa ăn
+
     class Meta:
         ordering = ['-created']
 
@@ -140,7 +146,11 @@ class Goal(models.Model):
         except Profile.DoesNotExist:
             profile = None
 
-        if profile and profile.weight_kg:
+        # Cân nặng có hiệu lực vào ngày bắt đầu (lịch sử chỉ số), fallback hồ sơ
+        point = ProfileMetric.as_of(self.user, self.start_date) if self.start_date else None
+        if point and point.weight_kg:
+            self.start_weight_kg = point.weight_kg
+        elif profile and profile.weight_kg:
             self.start_weight_kg = profile.weight_kg
 
         # Dùng TDEE trong profile nếu có để gợi ý calo
@@ -0,0 +1,285 @@
+# goals/progress.py
+"""
+Bộ máy tính tiến độ mục tiêu (dùng chung cho goals_overview,
+compute_goal_progress và email nhắc nhở).
+
+Mỗi Goal giữ sẵn các tổng chạy (running totals):
+- kcal_in_total  : tổng kcal ăn vào (Meal) trong khung mục tiêu
+- kcal_out_total : tổng kcal đốt (Workout) trong khung mục tiêu
+- latest_weight_kg: cân nặng đo gần nhất từ ngày bắt đầu (ProfileMetric)
+- meal_days      : số ngày có ghi ít nhất 1 bữa ăn trong khung mục tiêu
+
+Các tổng này được cộng/trừ dần (goals.signals) mỗi khi Meal / Workout /
+điểm đo cân nặng thay đổi (riêng meal_days đếm lại cho ngày bị ảnh hưởng), nên đọc tiến độ là O(1): không cần SUM lại
+toàn bộ nhật ký.
+
+Năng lượng ròng = kcal ăn vào − TDEE × số ngày có ghi bữa ăn − kcal đốt khi
+tập: ngày không ghi gì là "không biết", không phải "ăn 0 kcal", nên không
+bị tính thâm hụt cả TDEE. Chưa ghi bữa nào -> không tính tiến độ theo năng
+lượng.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from django.db.models import Count, F, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Goal
+
+# Sau hạn: đạt >= 99% xem như hoàn thành
+COMPLETE_THRESHOLD = 99.0
+
+
+@dataclass(frozen=True)
+class GoalProgress:
+    progress_pct: float
+    status: str               # in_progress / completed / failed
+    text: str
+    basis: str                # "weight" (theo cân đo được) / "energy" (theo năng lượng ròng)
+    net_kcal: float           # âm = thâm hụt
+    kcal_in: float
+    kcal_out: float
+    days_elapsed: int
+    meal_days: int
+    days_left: Optional[int]
+    current_weight_kg: Optional[float]
+
+    def as_dict(self):
+        return {"progress_pct": self.progress_pct, "status": self.status, "text": self.text}
+
+
+# ==============================
+# Cập nhật tăng dần
+# ==============================
+
+def _goals_covering(user_id, day):
+    return Goal.objects.filter(user_id=user_id, start_date__lte=day).filter(
+        Q(deadline__isnull=True) | Q(deadline__gte=day)
+    )
+
+
+def apply_delta(user_id, day, field: str, delta: float) -> None:
+    """Cộng delta vào kcal_in_total / kcal_out_total của các goal chứa ngày `day`."""
+    if not delta or day is None:
+        return
+    _goals_covering(user_id, day).update(**{field: F(field) + delta})
+
+
+def recount_meal_days(user_id, day) -> None:
+    """
+    Đếm lại meal_days (số ngày có bữa ăn, COUNT DISTINCT date) cho các goal chứa
+    ngày `day`, ngay trong 1 câu UPDATE. Không cộng/trừ ±1: QuerySet.delete xoá
+    hết các Meal cùng ngày rồi mới phát post_delete cho từng dòng, nên không
+    signal nào biết mình có phải bữa "cuối cùng" của ngày hay không.
+    """
+    from tracker.models import Meal
+
+    if day is None:
+        return
+    days = (
+        Meal.objects.filter(
+            user_id=OuterRef("user_id"),
+            date__gte=OuterRef("start_date"),
+            date__lte=Coalesce(OuterRef("deadline"), Value(date.max)),
+        )
+        .order_by()
+        .values("user_id")
+        .annotate(n=Count("date", distinct=True))
+        .values("n")
+    )
+    _goals_covering(user_id, day).update(meal_days=Coalesce(Subquery(days), 0))
+
+
+def apply_weigh_in(user_id, day, weight_kg) -> None:
+    """
+    Điểm đo cân nặng mới nhất -> cân nặng hiện tại của các goal đang chứa ngày đó.
+    (Điểm đo nhập bù cho ngày cũ hơn thì goals.signals gọi rebuild thay vì hàm này.)
+    """
+    _goals_covering(user_id, day).filter(start_date__lt=day).update(latest_weight_kg=weight_kg)
+
+
+def rebuild(goal: Goal, save=True) -> Goal:
+    """Tính lại các tổng chạy từ đầu (khi tạo goal mới hoặc sửa dữ liệu hàng loạt)."""
+    from accounts.models import ProfileMetric
+    from tracker.models import Meal, Workout
+
+    rng = {"user_id": goal.user_id, "date__gte": goal.start_date}
+    if goal.deadline:
+        rng["date__lte"] = goal.deadline
+
+    goal.kcal_in_total = Meal.objects.filter(**rng).aggregate(s=Sum("calories_in"))["s"] or 0.0
+    goal.kcal_out_total = Workout.objects.filter(**rng).aggregate(s=Sum("calories_out"))["s"] or 0.0
+    goal.meal_days = Meal.objects.filter(**rng).values("date").distinct().count()
+    # Điểm đo sau ngày bắt đầu (điểm đo đúng ngày bắt đầu chính là cân nặng ban đầu)
+    points = ProfileMetric.objects.filter(user_id=goal.user_id, date__gt=goal.start_date)
+    if goal.deadline:
+        points = points.filter(date__lte=goal.deadline)
+    goal.latest_weight_kg = (
+        points.order_by("-date", "-id").values_list("weight_kg", flat=True).first()
+    )
+
+    if save and goal.pk:
+        Goal.objects.filter(pk=goal.pk).update(
+            kcal_in_total=goal.kcal_in_total,
+            kcal_out_total=goal.kcal_out_total,
+            latest_weight_kg=goal.latest_weight_kg,
+            meal_days=goal.meal_days,
+        )
+    return goal
+
+
+# ==============================
+# Đọc tiến độ (O(1))
+# ==============================
+
+def _days_elapsed(goal: Goal, today: date) -> int:
+    if not goal.start_date or today < goal.start_date:
+        return 0
+    end = min(today, goal.deadline) if goal.deadline else today
+    return (end - goal.start_date).days + 1
+
+
+def _daily_tdee(goal: Goal, tdee=None) -> float:
+    if goal.daily_calorie_target_out:
+        return float(goal.daily_calorie_target_out)
+    if tdee is not None:
+        return float(tdee or 0)
+    profile = getattr(goal.user, "profile", None)
+    return float(getattr(profile, "tdee", 0) or 0)
+
+
+def progress_of(goal: Goal, today=None, tdee=None) -> GoalProgress:
+    """
+    Tiến độ 1 mục tiêu từ các tổng chạy đã lưu trên Goal.
+    - Có cân đo sau ngày bắt đầu -> tiến độ theo số kg đã thay đổi.
+    - Chưa có -> theo năng lượng ròng so với tổng kcal cần thâm hụt/thặng dư.
+    """
+    if today is None:
+        today = timezone.localdate()
+
+    kcal_in = float(goal.kcal_in_total or 0)
+    kcal_out = float(goal.kcal_out_total or 0)
+    days = _days_elapsed(goal, today)
+    meal_days = min(goal.meal_days or 0, days)
+    net = kcal_in - _daily_tdee(goal, tdee) * meal_days - kcal_out
+
+    start_w = goal.start_weight_kg
+    cur_w = goal.latest_weight_kg if goal.latest_weight_kg else start_w
+    need_kg = goal.lost_kg
+    required_kcal = goal.total_required_deficit_kcal or 0
+
+    pct = 0.0
+    basis = "energy"
+    if goal.type == "maintain":
+        # Duy trì: giữ cân trong ±1kg, tiến độ theo thời gian
+        basis = "weight"
+        in_range = cur_w is None or start_w is None or abs(cur_w - start_w) <= 1.0
+        if in_range and goal.total_days > 0:
+            pct = days / goal.total_days * 100
+    elif goal.latest_weight_kg and start_w is not None and need_kg > 0:
+        basis = "weight"
+        done_kg = (start_w - cur_w) if goal.type == "lose_weight" else (cur_w - start_w)
+        pct = done_kg / need_kg * 100
+    elif required_kcal > 0 and meal_days:
+        achieved = -net if goal.type == "lose_weight" else net
+        pct = achieved / required_kcal * 100
+    pct = round(max(0.0, min(pct, 100.0)), 1)
+
+    # ----- Text mô tả -----
+    parts = []
+    if basis == "weight" and cur_w is not None and goal.type != "maintain":
+        parts.append(f"Cân nặng {start_w:g} → {cur_w:g} kg (mục tiêu {goal.target_value:g} kg).")
+    if meal_days:
+        state = "thâm hụt" if net < 0 else "dư"
+        if required_kcal > 0:
+            parts.append(f"Năng lượng ròng: {state} {abs(net):.0f} / {required_kcal:.0f} kcal cần.")
+        else:
+            parts.append(f"Năng lượng ròng: {state} {abs(net):.0f} kcal.")
+
+    days_left = None
+    if goal.deadline:
+        days_left = (goal.deadline - today).days
+        if days_left > 0:
+            parts.append(f"Còn {days_left} ngày đến hạn.")
+        elif days_left == 0:
+            parts.append("Hôm nay là hạn cuối của mục tiêu.")
+        else:
+            parts.append(f"Đã trễ hạn {abs(days_left)} ngày.")
+
+    text = " ".join(parts) if parts else "Chưa đủ dữ liệu để tính tiến độ."
+
+    # ----- Trạng thái -----
+    status = goal.status
+    if status == "in_progress":
+        if pct >= 100 and basis == "weight" and goal.type != "maintain":
+            # đã cân đạt mục tiêu trước hạn
+            status = "completed"
+        elif goal.deadline and today > goal.deadline:
+            status = "completed" if pct >= COMPLETE_THRESHOLD else "failed"
+
+    return GoalProgress(
+        progress_pct=pct,
+        status=status,
+        text=text,
+        basis=basis,
+        net_kcal=round(net, 1),
+        kcal_in=kcal_in,
+        kcal_out=kcal_out,
+        days_elapsed=days,
+        meal_days=meal_days,
+        days_left=days_left,
+        current_weight_kg=cur_w,
+    )
+
+
+# ==============================
+# Nhiều goal / memo theo request
+# ==============================
+
+def progress_for(goals, today=None) -> dict:
+    """
+    Tiến độ cho nhiều goal cùng lúc: {goal.pk: GoalProgress}.
+    Truyền QuerySet -> 1 truy vấn duy nhất (kèm user + profile để lấy TDEE).
+    """
+    if today is None:
+        today = timezone.localdate()
+    if isinstance(goals, QuerySet):
+        goals = goals.select_related("user__profile")
+    return {g.pk: progress_of(g, today=today) for g in goals}
+
+
+@dataclass
+class UserGoals:
+    """Toàn bộ goal của 1 user (mới nhất trước) kèm tiến độ từng goal."""
+    goals: list
+    progress: dict
+    today: date
+
+    @property
+    def active(self) -> Optional[Goal]:
+        # đọc g.status hiện tại -> đúng cả sau khi view gọi mark_completed/failed
+        return next((g for g in self.goals if g.status == "in_progress"), None)
+
+    def of(self, goal: Goal) -> GoalProgress:
+        return self.progress[goal.pk]
+
+
+def goals_for(user, request=None, today=None) -> UserGoals:
+    """
+    Goal + tiến độ của user, 1 truy vấn. Có `request` thì kết quả được nhớ
+    trên request, các view/service gọi lại trong cùng request không query nữa.
+    """
+    memo = getattr(request, "_user_goals", None)
+    if memo is not None and memo[0] == user.pk:
+        return memo[1]
+
+    goals = list(
+        Goal.objects.filter(user=user).select_related("user__profile").order_by("-created")
+    )
+    today = today or timezone.localdate()
+    value = UserGoals(goals=goals, progress=progress_for(goals, today=today), today=today)
+    if request is not None:
+        request._user_goals = (user.pk, value)
+    return value
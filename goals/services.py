@@ -1,11 +1,11 @@
 # goals/services.py
 from dataclasses import dataclass
-from datetime import date
 from django.db.models import Sum
 from django.utils import timezone
 from tracker.models import Workout,Meal
 from accounts.models import Profile
 from .models import Goal
+from .progress import progress_of
 from datetime import timedelta
 
 def _get_current_weight(user):
@@ -21,67 +21,13 @@ def _get_current_weight(user):
 
 def compute_goal_progress(goal: Goal):
     """
-    Tính tiến độ mục tiêu dựa trên kcal đốt được trong Workout.
+    Tiến độ mục tiêu (dict progress_pct / status / text) cho thẻ mục tiêu.
 
-    - Lấy tất cả Workout của user trong khoảng [start_date, deadline]
-    - Tổng calories_out / tổng kcal cần đốt (goal.total_required_deficit_kcal)
-      => phần trăm tiến độ.
-    - Sinh ra text mô tả cho thẻ mục tiêu trong overview.
+    Đọc từ các tổng chạy trên Goal (goals.progress): có cân đo sau ngày bắt
+    đầu thì tính theo số kg đã thay đổi, chưa có thì theo năng lượng ròng
+    (kcal ăn vào − TDEE − kcal đốt). Không truy vấn lại Meal / Workout.
     """
-
-    today = date.today()
-
-    # ===== 1. Kcal cần cho toàn bộ mục tiêu =====
-    total_required_kcal = goal.total_required_deficit_kcal or 0  # vd: 15400 kcal
-    total_kcal = 0
-    kcal_pct = 0.0
-
-    if (
-        total_required_kcal > 0
-        and goal.start_date is not None
-        and goal.deadline is not None
-    ):
-        qs = Workout.objects.filter(
-            user=goal.user,
-            date__gte=goal.start_date,
-            date__lte=goal.deadline,
-        )
-        total_kcal = qs.aggregate(total=Sum("calories_out"))["total"] or 0
-        kcal_pct = min(total_kcal / total_required_kcal * 100.0, 100.0)
-
-    # ===== 2. Text mô tả =====
-    parts = []
-
-    if total_required_kcal > 0:
-        parts.append(
-            f"Đã đốt khoảng {int(total_kcal)} / {int(total_required_kcal)} kcal mục tiêu."
-        )
-
-    if goal.deadline:
-        days_left = (goal.deadline - today).days
-        if days_left > 0:
-            parts.append(f"Còn {days_left} ngày đến hạn.")
-        elif days_left == 0:
-            parts.append("Hôm nay là hạn cuối của mục tiêu.")
-        else:
-            parts.append(f"Đã trễ hạn {abs(days_left)} ngày.")
-
-    text = " ".join(parts) if parts else "Chưa đủ dữ liệu để tính tiến độ."
-
-    # ===== 3. Xác định trạng thái =====
-    progress_pct = kcal_pct
-    status = "in_progress"
-
-    if progress_pct >= 100:
-        status = "completed"
-    elif goal.deadline and today > goal.deadline and progress_pct < 80:
-        status = "failed"
-
-    return {
-        "progress_pct": progress_pct,
-        "status": status,
-        "text": text,
-    }
+    return progress_of(goal).as_dict()
 
 
 def goals_kpis(user):
@@ -0,0 +1,95 @@
+# goals/signals.py
+"""
+Giữ các tổng chạy trên Goal (kcal_in_total, kcal_out_total, latest_weight_kg,
+meal_days) khớp với nhật ký: mỗi lần lưu / xoá Meal, Workout hay có điểm đo cân nặng
+mới chỉ cộng/trừ phần chênh lệch, không SUM lại toàn bộ (meal_days thì đếm lại
+cho các goal chứa ngày của bữa ăn, xem progress.recount_meal_days).
+
+Lưu ý: bulk_create / bulk_update / QuerySet.update không phát signal ->
+gọi goals.progress.rebuild sau các thao tác hàng loạt.
+"""
+from datetime import datetime
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import ProfileMetric
+from tracker.models import Meal, Workout
+
+from . import progress
+from .models import Goal
+
+ENERGY_FIELDS = {
+    Meal: ("calories_in", "kcal_in_total"),
+    Workout: ("calories_out", "kcal_out_total"),
+}
+
+
+def _day(value):
+    # DateField default=timezone.now -> instance mới có thể giữ datetime
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def _rebuild_user_goals(user_id):
+    for goal in Goal.objects.filter(user_id=user_id):
+        progress.rebuild(goal)
+
+
+@receiver(post_save, sender=Meal)
+@receiver(post_save, sender=Workout)
+def energy_saved(sender, instance, created, **kwargs):
+    src, total = ENERGY_FIELDS[sender]
+    new = (instance.user_id, _day(instance.date), getattr(instance, src) or 0.0)
+    old = None if created else getattr(instance, "_loaded_energy", None)
+
+    if not created and old is None:
+        # không biết giá trị cũ (instance không load từ DB / bị defer)
+        _rebuild_user_goals(instance.user_id)
+    elif old and old[:2] == new[:2]:
+        progress.apply_delta(new[0], new[1], total, new[2] - (old[2] or 0.0))
+    else:
+        if old:
+            progress.apply_delta(old[0], _day(old[1]), total, -(old[2] or 0.0))
+        progress.apply_delta(new[0], new[1], total, new[2])
+
+    if sender is Meal and (created or (old and old[:2] != new[:2])):
+        if old:
+            progress.recount_meal_days(old[0], _day(old[1]))
+        progress.recount_meal_days(new[0], new[1])
+
+    instance._loaded_energy = new
+
+
+@receiver(post_delete, sender=Meal)
+@receiver(post_delete, sender=Workout)
+def energy_deleted(sender, instance, **kwargs):
+    src, total = ENERGY_FIELDS[sender]
+    old = getattr(instance, "_loaded_energy", None) or (
+        instance.user_id, instance.date, getattr(instance, src)
+    )
+    progress.apply_delta(old[0], _day(old[1]), total, -(old[2] or 0.0))
+    if sender is Meal:
+        progress.recount_meal_days(old[0], _day(old[1]))
+
+
+@receiver(post_save, sender=ProfileMetric)
+def weigh_in_saved(sender, instance, **kwargs):
+    if instance.weight_kg is None:
+        return
+    day = _day(instance.date)
+    later = ProfileMetric.objects.filter(user_id=instance.user_id, date__gt=day).exists()
+    if later:
+        # nhập bù cho ngày cũ -> điểm đo "mới nhất" của từng goal có thể khác nhau
+        _rebuild_user_goals(instance.user_id)
+    else:
+        progress.apply_weigh_in(instance.user_id, day, instance.weight_kg)
+
+
+@receiver(post_save, sender=Goal)
+def goal_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Goal mới hoặc đổi khung thời gian -> tính lại từ đầu
+    if created or update_fields is None or {"start_date", "deadline"} & set(update_fields):
+        progress.rebuild(instance)
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from tracker.models import Food, Meal, Workout
+
+from . import progress
+from .models import Goal
+
+START = date(2026, 1, 1)
+
+
+class GoalRunningTotalsTests(TestCase):
+    """Tổng chạy trên Goal (goals.signals) phải khớp với progress.rebuild."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="binh", password="x")
+        self.food = Food.objects.create(name="Cơm tấm", calories_per_100g=200)
+        self.goal = Goal.objects.create(
+            user=self.user, type="lose_weight", target_value=60, start_weight_kg=65,
+            start_date=START, deadline=START + timedelta(days=29), daily_calorie_target_out=2000,
+        )
+
+    def _meal(self, day, grams=100):
+        return Meal.objects.create(
+            user=self.user, food=self.food, meal_type="lunch", quantity_gram=grams, date=day
+        )
+
+    def _assert_matches_rebuild(self):
+        self.goal.refresh_from_db()
+        fresh = progress.rebuild(Goal.objects.get(pk=self.goal.pk), save=False)
+        self.assertEqual(self.goal.meal_days, fresh.meal_days)
+        self.assertAlmostEqual(self.goal.kcal_in_total, fresh.kcal_in_total)
+        self.assertAlmostEqual(self.goal.kcal_out_total, fresh.kcal_out_total)
+
+    def test_meal_days_counts_distinct_days(self):
+        self._meal(START)
+        self._meal(START)
+        self._meal(START + timedelta(days=1))
+        self._meal(START - timedelta(days=1))  # ngoài khung mục tiêu
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.meal_days, 2)
+        self.assertAlmostEqual(self.goal.kcal_in_total, 600)
+        self._assert_matches_rebuild()
+
+    def test_bulk_delete_same_day_meals(self):
+        self._meal(START)
+        self._meal(START)
+        self._meal(START + timedelta(days=1))
+        Meal.objects.filter(user=self.user, date=START).delete()
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.meal_days, 1)
+        self._assert_matches_rebuild()
+
+    def test_moving_meal_to_another_day(self):
+        meal = self._meal(START)
+        self._meal(START)
+        meal.date = START + timedelta(days=2)
+        meal.save()
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.meal_days, 2)
+        self._assert_matches_rebuild()
+
+    def test_energy_progress(self):
+        self._meal(START, grams=750)  # 1500 kcal
+        Workout.objects.create(user=self.user, type="gym", duration_min=60, date=START)
+        self.goal.refresh_from_db()
+        p = progress.progress_of(self.goal, today=START)
+        self.assertEqual(p.basis, "energy")
+        self.assertEqual(p.meal_days, 1)
+        self.assertAlmostEqual(p.net_kcal, round(1500 - 2000 - self.goal.kcal_out_total, 1))
+        self.assertGreater(p.progress_pct, 0)
+        self.assertEqual(p.status, "in_progress")
+
+    def test_no_meals_no_energy_progress(self):
+        p = progress.progress_of(self.goal, today=START + timedelta(days=5))
+        self.assertEqual(p.progress_pct, 0.0)
+        self.assertEqual(p.meal_days, 0)
+
+    def test_delete_user_with_goal_and_meals(self):
+        self._meal(START)
+        self._meal(START)
+        pk = self.user.pk
+        self.user.delete()
+        self.assertFalse(Goal.objects.filter(user_id=pk).exists())
@@ -7,67 +7,34 @@ from django.db.models import Sum
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 
+from healthmanager.conditional import user_data_page
+
 from .forms import GoalForm
 from .models import Goal
-from .services import goals_kpis, compute_goal_progress  # nếu không dùng có thể xoá
+from .progress import goals_for
 from tracker.models import Workout, Meal
 
 
-# ====== HÀM PHỤ: TÍNH TIẾN ĐỘ CHO 1 MỤC TIÊU ======
-def _calc_goal_progress(goal: Goal, user, today):
-    """
-    Trả về: (progress_pct, burned_kcal, total_required_kcal, days_left)
-    """
-    g_start = goal.start_date
-    g_deadline = goal.deadline or today
-
-    if not g_start or g_start > g_deadline:
-        return 0.0, 0.0, goal.total_required_deficit_kcal, 0
-
-    # chỉ tính tới hôm nay hoặc tới deadline (lấy mốc nhỏ hơn)
-    calc_end = min(today, g_deadline)
-
-    total_kcal = goal.total_required_deficit_kcal or 0.0
-
-    burned = (
-        Workout.objects.filter(
-            user=user,
-            date__range=(g_start, calc_end),
-        ).aggregate(s=Sum("calories_out"))["s"]
-        or 0.0
-    )
-
-    if total_kcal > 0:
-        progress_pct = min(burned / total_kcal * 100.0, 100.0)
-    else:
-        progress_pct = 0.0
-
-    days_left = max((g_deadline - today).days, 0)
-
-    return progress_pct, burned, total_kcal, days_left
-
-
 @login_required
 def goals_overview(request):
     user = request.user
     today = timezone.localdate()
 
     # ==== 0. TỰ ĐỘNG CẬP NHẬT TRẠNG THÁI CHO CÁC MỤC TIÊU ĐÃ TỚI HẠN ====
-    in_progress_goals = Goal.objects.filter(user=user, status="in_progress")
-    for g in in_progress_goals:
-        progress_pct, burned, total_kcal, _ = _calc_goal_progress(g, user, today)
-
-        # Nếu có deadline và đã quá hạn
-        if g.deadline and today > g.deadline:
-            # Nếu đã đạt >= 99% kcal yêu cầu => xem như hoàn thành
-            if total_kcal > 0 and burned >= total_kcal * 0.99:
-                g.mark_completed()
-            else:
-                # chưa đủ tiến độ mà đã quá hạn => thất bại
-                g.mark_failed()
+    # (quá hạn: đạt >= 99% => hoàn thành, chưa đủ => thất bại; xem goals.progress)
+    # Toàn bộ goal + tiến độ lấy bằng 1 truy vấn, nhớ lại trên request.
+    user_goals = goals_for(user, request, today=today)
+    for g in user_goals.goals:
+        if g.status != "in_progress":
+            continue
+        status = user_goals.of(g).status
+        if status == "completed":
+            g.mark_completed()
+        elif status == "failed":
+            g.mark_failed()
 
     # ==== 1. Lấy active goal (mục tiêu đang thực hiện) sau khi đã auto-update ====
-    active_goal = Goal.get_active_goal(user)
+    active_goal = user_goals.active
 
     # ==== 2. Xác định khoảng ngày để tính KPI ====
     if active_goal and active_goal.start_date:
@@ -96,16 +63,13 @@ def goals_overview(request):
     total_out = workouts_qs.aggregate(s=Sum("calories_out"))["s"] or 0
     sessions = workouts_qs.count()
 
-    # Chuỗi ngày log liên tục (có meal hoặc workout)
+    # Chuỗi ngày log liên tục (có meal hoặc workout) – lấy tập ngày 1 lần
+    logged_dates = set(meals_qs.values_list("date", flat=True)) | set(
+        workouts_qs.values_list("date", flat=True)
+    )
     streak = 0
     d = kpi_end
-    while d >= kpi_start:
-        has_log = (
-            meals_qs.filter(date=d).exists()
-            or workouts_qs.filter(date=d).exists()
-        )
-        if not has_log:
-            break
+    while d >= kpi_start and d in logged_dates:
         streak += 1
         d -= timedelta(days=1)
 
@@ -116,24 +80,15 @@ def goals_overview(request):
         "streak_days": streak,
     }
 
-    # ==== 4. Tính tiến độ mục tiêu theo kcal đã đốt (chỉ cho goal đang in_progress) ====
+    # ==== 4. Tiến độ mục tiêu đang thực hiện (đọc từ tổng chạy, không SUM lại) ====
     if active_goal:
-        progress_pct, burned, total_kcal, days_left = _calc_goal_progress(
-            active_goal, user, today
-        )
-        active_goal.progress_pct = progress_pct
-
-        if total_kcal > 0:
-            active_goal.progress_text = (
-                f"Đã đốt khoảng {int(burned)} / {int(total_kcal)} kcal mục tiêu. "
-                f"Còn {days_left} ngày đến hạn."
-            )
-        else:
-            active_goal.progress_text = ""
+        progress = user_goals.of(active_goal)
+        active_goal.progress_pct = progress.progress_pct
+        active_goal.progress_text = progress.text
     # nếu không có active_goal thì cứ để None
 
     # ==== 5. Lấy danh sách tất cả mục tiêu (lịch sử) ====
-    items = Goal.objects.filter(user=user).order_by("-created")
+    items = user_goals.goals
 
     return render(
         request,
@@ -227,6 +182,7 @@ def goals_finish(request, pk, result):
 
 
 @login_required
+@user_data_page
 def goals_history(request):
     """
     Lịch sử các mục tiêu đã kết thúc (completed / failed).
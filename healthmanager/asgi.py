@@ -1,4 +1,16 @@
+"""
+Entry point ASGI (song song với healthmanager.wsgi).
+
+Chạy: uvicorn healthmanager.asgi:application --workers 2
+  hoặc gunicorn healthmanager.asgi:application -k uvicorn.workers.UvicornWorker
+
+Chế độ này bật ASYNC_VIEWS: /api/chat/ dùng view async, chờ backend chậm
+(vd gọi LLM) mà không giữ thread.
+"""
 import os
+
 from django.core.asgi import get_asgi_application
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthmanager.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 application = get_asgi_application()
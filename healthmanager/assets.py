@@ -0,0 +1,98 @@
+# healthmanager/assets.py
+"""
+Gộp CSS / JS của project thành bundle trong static/bundles/ (rút gọn CSS).
+
+Bundle được build ra ASSET_BUILD_DIR và cung cấp qua BundleFinder (thêm vào
+STATICFILES_FINDERS), nên:
+- dev: runserver / WhiteNoise tìm thấy bundle như file tĩnh thường (build
+  lại khi file nguồn đổi);
+- deploy: collectstatic chép bundle -> gắn hash, sinh .gz / .br
+  (healthmanager.storage), phục vụ với Cache-Control immutable.
+
+Chỉ rút gọn CSS (bỏ comment + khoảng trắng, không cần thư viện ngoài). JS
+chỉ gộp, giữ nguyên văn: bỏ thụt lề / dòng "//" sẽ làm hỏng template literal
+và chuỗi nhiều dòng, còn phần khoảng trắng đó gzip / brotli đã nén gần hết.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.files.storage import FileSystemStorage
+
+# tên bundle -> file nguồn (theo thứ tự gộp), tương đối với static/
+BUNDLES = {
+    "bundles/site.css": ["css/health.css"],
+    "bundles/chat.css": ["css/chatbox.css"],
+    "bundles/chat.js": ["js/chatbox.js"],
+}
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON = re.compile(r"(?<=[\w)])\s*:\s+(?=[^{}]*;|[^{}]*})")
+
+
+def minify_css(text: str) -> str:
+    text = _CSS_COMMENT.sub("", text)
+    text = _CSS_SPACE.sub(" ", text)
+    text = _CSS_PUNCT.sub(r"\1", text)
+    text = _CSS_COLON.sub(":", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text: str) -> str:
+    # không rút gọn (xem docstring module), chỉ đảm bảo xuống dòng giữa các file
+    return text if text.endswith("\n") else text + "\n"
+
+
+def _source_path(name):
+    path = finders.find(name)
+    if not path:
+        raise FileNotFoundError(f"Không tìm thấy file nguồn của bundle: {name}")
+    return Path(path)
+
+
+def build_dir() -> Path:
+    return Path(getattr(settings, "ASSET_BUILD_DIR", settings.BASE_DIR / "var" / "bundles"))
+
+
+def build(name) -> Path:
+    """Build 1 bundle nếu file nguồn mới hơn bản đã build; trả về đường dẫn bản build."""
+    sources = [_source_path(src) for src in BUNDLES[name]]
+    target = build_dir() / name
+    if target.exists() and target.stat().st_mtime >= max(p.stat().st_mtime for p in sources):
+        return target
+    minify = minify_css if name.endswith(".css") else minify_js
+    parts = [minify(p.read_text(encoding="utf-8")) for p in sources]
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    tmp.write_text(("\n" if name.endswith(".js") else "").join(parts), encoding="utf-8")
+    tmp.replace(target)
+    return target
+
+
+def build_all():
+    return {name: build(name) for name in BUNDLES}
+
+
+def read(name) -> str:
+    """Nội dung bundle (để inline vào trang, vd CSS quan trọng trong <head>)."""
+    return build(name).read_text(encoding="utf-8")
+
+
+class BundleFinder(BaseFinder):
+    """Staticfiles finder cho các bundle trong BUNDLES (build khi được hỏi tới)."""
+
+    def find(self, path, all=False):
+        if path not in BUNDLES:
+            return []
+        built = str(build(path))
+        return [built] if all else built
+
+    def list(self, ignore_patterns):
+        build_all()
+        storage = FileSystemStorage(location=build_dir())
+        for name in BUNDLES:
+            yield name, storage
@@ -0,0 +1,87 @@
+# healthmanager/conditional.py
+"""
+GET có điều kiện (ETag / Last-Modified -> 304) cho các trang chỉ đọc dữ liệu
+của chính user: báo cáo, sức khỏe, lịch sử mục tiêu, danh sách bữa ăn /
+buổi tập.
+
+"Lần cuối dữ liệu đổi" của user đọc thẳng từ DB: dòng change feed mới nhất
+của user (tracker.changes; Meal / Workout / Goal / Profile, lịch sử chỉ số
+ghi như 1 lần lưu Profile) – 1 truy vấn theo chỉ mục (user, id), mọi worker
+thấy cùng 1 giá trị. Feed của user đã bị dọn hết -> version 0, dữ liệu cũ
+hơn CHANGE_LOG_DAYS nên Last-Modified lấy 0h hôm nay.
+
+ETag ghép từ: version change feed đó, URL (kể cả query), ngày hiện tại (trang có số liệu
+"hôm nay", "còn N ngày"), phiên đăng nhập + CSRF token đang dùng (trang cũ
+chứa token cũ) và APP_VERSION (deploy mới đổi template). Trang không đổi
+-> 304 trước khi view chạy: không truy vấn tổng hợp, không render template.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from tracker.models import ChangeLog
+
+
+def last_change(user_id):
+    """(version, thời điểm) của thay đổi mới nhất của user; (0, None) nếu không có."""
+    return (
+        ChangeLog.objects.filter(user_id=user_id).order_by("-id").values_list("id", "created_at").first()
+        or (0, None)
+    )
+
+
+def _request_last_change(request):
+    # ETag và Last-Modified cùng cần -> 1 truy vấn mỗi request
+    if not hasattr(request, "_last_change"):
+        request._last_change = last_change(request.user.pk)
+    return request._last_change
+
+
+def _skip(request):
+    # có flash message đang chờ hiển thị (cookie storage) -> phải render lại
+    return not request.user.is_authenticated or "messages" in request.COOKIES
+
+
+def _last_modified(request, *args, **kwargs):
+    if _skip(request):
+        return None
+    changed = _request_last_change(request)[1]
+    # trang đổi theo ngày: không cũ hơn 0h hôm nay
+    midnight = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time()))
+    return max(changed, midnight) if changed else midnight
+
+
+def _etag(request, *args, **kwargs):
+    if _skip(request):
+        return None
+    parts = [
+        str(request.user.pk),
+        str(_request_last_change(request)[0]),
+        request.get_full_path(),
+        timezone.localdate().isoformat(),
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME, ""),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        getattr(settings, "APP_VERSION", ""),
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def user_data_page(view):
+    """
+    Decorator cho view GET chỉ đọc dữ liệu của request.user (đặt dưới
+    login_required). Trả 304 khi dữ liệu chưa đổi; trình duyệt luôn hỏi lại
+    server (no-cache) và không cache dùng chung (private).
+    """
+    conditional = condition(etag_func=_etag, last_modified_func=_last_modified)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = conditional(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
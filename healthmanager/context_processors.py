@@ -0,0 +1,10 @@
+# healthmanager/context_processors.py
+from django.conf import settings
+
+
+def app_version(request):
+    """Phiên bản + thời hạn cache fragment cho {% cache %} trong template."""
+    return {
+        "APP_VERSION": settings.APP_VERSION,
+        "FRAGMENT_CACHE_SECONDS": settings.FRAGMENT_CACHE_SECONDS,
+    }
@@ -0,0 +1,95 @@
+# healthmanager/db.py
+"""
+Tiện ích database dùng chung cho cả project:
+
+- apply_sqlite_pragmas: hook connection_created, chỉnh SQLite cho chạy
+  production (WAL, synchronous=NORMAL, mmap, cache, busy_timeout – xem
+  settings.SQLITE_PRAGMAS). Kết nối chỉ-đọc chỉ nhận các pragma đọc.
+- ReadReplicaRouter + read_replica: các trang báo cáo / tổng hợp (chỉ đọc,
+  truy vấn nặng) đọc từ alias "replica" nếu được cấu hình (SQLite: kết nối
+  mode=ro tới cùng file; PostgreSQL: DATABASE_READ_URL / DB_READ_HOST).
+  Ngoài các view đó mọi truy vấn vẫn đi "default".
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+READ_ALIAS = "replica"
+
+# ContextVar thay vì threading.local: đúng cho cả thread lẫn async view
+_reading = ContextVar("healthmanager_db_reading", default=False)
+
+# Đổi chế độ ghi log/đồng bộ -> kết nối chỉ-đọc không chạy được
+_WRITE_PRAGMAS = {"journal_mode", "synchronous"}
+
+
+def is_read_only(connection) -> bool:
+    return "mode=ro" in str(connection.settings_dict.get("NAME", ""))
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    read_only = is_read_only(connection)
+    pragmas = dict(getattr(settings, "SQLITE_PRAGMAS", {}))
+    if read_only:
+        pragmas = {k: v for k, v in pragmas.items() if k not in _WRITE_PRAGMAS}
+        pragmas["query_only"] = "ON"
+    # chạy thẳng trên kết nối sqlite3 (chưa có cursor Django ở bước này)
+    for name, value in pragmas.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def has_replica() -> bool:
+    return READ_ALIAS in connections.databases
+
+
+@contextmanager
+def reading():
+    """Trong khối này, truy vấn đọc đi alias replica (nếu có)."""
+    token = _reading.set(True)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def read_replica(view):
+    """Decorator cho view chỉ đọc (báo cáo, xuất file, trang tổng hợp), sync hoặc async."""
+    if iscoroutinefunction(view):
+        # ContextVar đi theo sang thread của sync_to_async -> ORM async cũng đọc replica
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            with reading():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    """Ghi luôn vào default; đọc vào replica chỉ khi đang trong reading()."""
+
+    def db_for_read(self, model, **hints):
+        if _reading.get() and has_replica():
+            return READ_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # object đọc từ replica (instance._state.db == "replica") vẫn lưu vào default
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica là bản sao của default -> object 2 bên liên kết được với nhau
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db != READ_ALIAS
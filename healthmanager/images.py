@@ -0,0 +1,148 @@
+# healthmanager/images.py
+"""
+Tối ưu ảnh tĩnh (static/img) lúc build.
+
+Mỗi ảnh nguồn (png / jpg) sinh ra:
+- bản AVIF + WebP ở các bề rộng trong WIDTHS, không vượt quá bề rộng hiển
+  thị lớn nhất của ảnh (MAX_WIDTHS, mặc định bề rộng gốc):
+  img/hospital.w480.avif, img/hospital.w1000.webp, ...
+- bản cùng định dạng gốc CHỈ cho cỡ icon (EXTRA_WIDTHS, dùng trong
+  <link rel="icon">); trình duyệt không hỗ trợ AVIF / WebP nhận ảnh gốc;
+- ảnh gốc được nén lại (PNG palette 256 màu, JPEG progressive) nếu nhỏ hơn.
+
+Việc sinh ảnh chạy trong collectstatic (healthmanager.storage) nên các biến
+thể cũng được gắn hash + nén như file tĩnh khác; template dùng
+{% picture %} / {% image_variant %} (healthmanager.templatetags.images).
+"""
+import io
+import re
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow chưa cài -> bỏ qua bước tối ưu, template dùng ảnh gốc
+    Image = None
+
+SOURCE_PATTERN = re.compile(r"^img/.+\.(png|jpe?g)$", re.IGNORECASE)
+VARIANT_PATTERN = re.compile(r"\.w\d+\.\w+$")
+
+# bề rộng (px) cho ảnh nội dung; icon / logo có thêm cỡ nhỏ riêng
+WIDTHS = (480, 960, 1600)
+EXTRA_WIDTHS = {
+    "img/favicon.png": (32, 180),
+    "img/logo.png": (96,),
+}
+# bề rộng hiển thị lớn nhất (px, đã tính màn hình 2x); không sinh bản lớn hơn
+MAX_WIDTHS = {
+    "img/favicon.png": 480,
+    "img/logo.png": 96,
+}
+FORMATS = ("avif", "webp")
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "png": "image/png", "jpg": "image/jpeg"}
+
+_SAVE_OPTIONS = {
+    "avif": {"quality": 55, "speed": 8},
+    "webp": {"quality": 80, "method": 4},
+    "png": {"optimize": True},
+    "jpg": {"quality": 82, "optimize": True, "progressive": True},
+}
+
+
+def is_source(name) -> bool:
+    return bool(SOURCE_PATTERN.match(name)) and not VARIANT_PATTERN.search(name)
+
+
+def source_format(name) -> str:
+    return "png" if name.lower().endswith(".png") else "jpg"
+
+
+def variant_name(name, width, fmt) -> str:
+    """img/hospital.png, 480, "webp" -> img/hospital.w480.webp"""
+    stem = name.rsplit(".", 1)[0]
+    return f"{stem}.w{width}.{fmt}"
+
+
+def formats_available():
+    if Image is None:
+        return ()
+    return tuple(fmt for fmt in FORMATS if features.check(fmt))
+
+
+def target_widths(name, original_width):
+    limit = min(original_width, MAX_WIDTHS.get(name, original_width))
+    widths = {w for w in WIDTHS + EXTRA_WIDTHS.get(name, ()) if w < limit}
+    widths.add(limit)
+    return sorted(widths)
+
+
+def _encode(image, fmt):
+    buf = io.BytesIO()
+    if fmt == "jpg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    elif fmt == "png" and image.mode != "L":
+        # PNG RGBA 24-bit gần như không nhỏ đi khi optimize; palette 256 màu
+        # đủ cho ảnh minh hoạ / icon và nhẹ hơn vài lần
+        image = image.convert("RGBA").quantize(256, method=Image.Quantize.FASTOCTREE)
+    image.save(buf, format="JPEG" if fmt == "jpg" else fmt.upper(), **_SAVE_OPTIONS[fmt])
+    return buf.getvalue()
+
+
+def build_variants(name, data):
+    """
+    Ảnh nguồn (bytes) -> list[(tên file, bytes)]: các biến thể + ảnh gốc nén
+    lại (chỉ khi nhỏ hơn). Không có Pillow -> list rỗng.
+    """
+    if Image is None:
+        return []
+    with Image.open(io.BytesIO(data)) as src:
+        src.load()
+        if src.mode not in ("RGB", "RGBA", "L", "LA"):
+            src = src.convert("RGBA" if "transparency" in src.info else "RGB")
+        original_fmt = source_format(name)
+        recompressed = _encode(src, original_fmt)
+        out = [(name, recompressed)] if len(recompressed) < len(data) else []
+        icons = EXTRA_WIDTHS.get(name, ())
+        for width in target_widths(name, src.width):
+            if width == src.width:
+                image = src
+            else:
+                image = src.resize((width, round(src.height * width / src.width)), Image.LANCZOS)
+            for fmt in formats_available():
+                out.append((variant_name(name, width, fmt), _encode(image, fmt)))
+            if width in icons:
+                out.append((variant_name(name, width, original_fmt), _encode(image, original_fmt)))
+    return out
+
+
+# ==============================
+# Dùng trong template
+# ==============================
+
+def exists(name) -> bool:
+    """
+    Biến thể có trong manifest của collectstatic không. Khi dev (chưa chạy
+    collectstatic, không có manifest) -> False: template dùng ảnh gốc.
+    """
+    hashed = getattr(staticfiles_storage, "hashed_files", None)
+    return bool(hashed) and name in hashed
+
+
+@lru_cache(maxsize=128)
+def dimensions(name):
+    """(rộng, cao) của ảnh nguồn, hoặc None nếu không đọc được."""
+    if Image is None:
+        return None
+    path = finders.find(name)
+    if not path:
+        try:
+            path = staticfiles_storage.path(name)
+        except NotImplementedError:
+            return None
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except OSError:
+        return None
@@ -0,0 +1,227 @@
+# healthmanager/instrumentation.py
+"""
+Đo hiệu năng từng request (bật bằng INSTRUMENTATION_ENABLED=True):
+
+- thời gian xử lý, số truy vấn + tổng thời gian DB (execute_wrapper gắn vào
+  mọi kết nối khi mở, xem install_query_wrapper), truy vấn lặp: cùng câu SQL + cùng tham số (trùng hẳn) hoặc cùng câu
+  SQL chạy >= INSTRUMENTATION_REPEAT_THRESHOLD lần với tham số khác (dấu hiệu
+  N+1), số lần cache hit/miss, kích thước response;
+- mỗi request ghi 1 dòng log JSON (logger "healthmanager.requests"); request
+  chậm hơn SLOW_REQUEST_MS ghi mức WARNING kèm các câu SQL bị lặp;
+- giữ N mẫu gần nhất của từng view trong RAM (mỗi process 1 bản) để trang
+  staff /ops/perf/ tính p50/p95/p99 (xem view_stats).
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger("healthmanager.requests")
+
+_current = ContextVar("healthmanager_request_stats", default=None)
+_MISS = object()
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_ms: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    exact: Counter = field(default_factory=Counter)    # (sql, params) -> số lần
+    shapes: Counter = field(default_factory=Counter)   # sql -> số lần
+
+    def duplicates(self) -> int:
+        """Số truy vấn thừa: cùng SQL + cùng tham số chạy lại."""
+        return sum(n - 1 for n in self.exact.values() if n > 1)
+
+    def repeated(self, threshold):
+        """Câu SQL chạy >= threshold lần trong 1 request (N+1), nhiều nhất trước."""
+        return [(sql, n) for sql, n in self.shapes.most_common() if n >= threshold]
+
+
+def record_cache(hit: bool) -> None:
+    """Ghi nhận 1 lần đọc cache cho request hiện tại (no-op khi không đo)."""
+    stats = _current.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_ms += (time.perf_counter() - t0) * 1000
+        stats.queries += 1
+        shape = _NUMBER_RE.sub("?", sql)  # IN (1, 2, 3) / LIMIT 21 -> cùng 1 dạng
+        stats.shapes[shape] += 1
+        try:
+            stats.exact[(sql, repr(params))] += 1
+        except Exception:
+            pass
+
+
+def _instrument_cache(backend):
+    """Bọc get/get_many của 1 instance cache (mỗi thread 1 instance) để đếm hit/miss."""
+    if getattr(backend, "_instrumented", False):
+        return
+    get, get_many = backend.get, backend.get_many
+
+    def counted_get(key, default=None, version=None):
+        value = get(key, _MISS, version=version)
+        record_cache(value is not _MISS)
+        return default if value is _MISS else value
+
+    def counted_get_many(keys, version=None):
+        keys = list(keys)
+        found = get_many(keys, version=version)
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+
+    backend.get, backend.get_many = counted_get, counted_get_many
+    backend._instrumented = True
+
+
+# ==============================
+# Histogram cuộn theo view
+# ==============================
+
+_samples = defaultdict(lambda: deque(maxlen=getattr(settings, "INSTRUMENTATION_WINDOW", 500)))
+_lock = threading.Lock()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(k, len(sorted_values) - 1)]
+
+
+def view_stats():
+    """Thống kê mỗi view trên cửa sổ mẫu gần nhất, view chậm (p95) trước."""
+    with _lock:
+        snapshot = {view: list(rows) for view, rows in _samples.items()}
+    out = []
+    for view, rows in snapshot.items():
+        times = sorted(r["ms"] for r in rows)
+        n = len(rows)
+        hits = sum(r["cache_hits"] for r in rows)
+        lookups = hits + sum(r["cache_misses"] for r in rows)
+        out.append({
+            "view": view,
+            "count": n,
+            "p50_ms": round(_percentile(times, 50), 2),
+            "p95_ms": round(_percentile(times, 95), 2),
+            "p99_ms": round(_percentile(times, 99), 2),
+            "max_ms": round(times[-1], 2),
+            "avg_queries": round(sum(r["queries"] for r in rows) / n, 1),
+            "max_queries": max(r["queries"] for r in rows),
+            "avg_db_ms": round(sum(r["db_ms"] for r in rows) / n, 2),
+            "duplicate_queries": sum(r["duplicates"] for r in rows),
+            "cache_hit_rate": round(hits / lookups, 3) if lookups else None,
+            "avg_bytes": round(sum(r["bytes"] or 0 for r in rows) / n),
+        })
+    out.sort(key=lambda r: r["p95_ms"], reverse=True)
+    return out
+
+
+def reset_stats() -> None:
+    with _lock:
+        _samples.clear()
+
+
+# ==============================
+# Middleware
+# ==============================
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created: gắn _query_wrapper vào mọi kết nối (đúng cả với view async)."""
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = float(getattr(settings, "SLOW_REQUEST_MS", 500))
+        self.repeat_threshold = int(getattr(settings, "INSTRUMENTATION_REPEAT_THRESHOLD", 5))
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _start(self):
+        stats = RequestStats()
+        for alias in settings.CACHES:
+            _instrument_cache(caches[alias])
+        return stats, _current.set(stats), time.perf_counter()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token, t0 = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, stats, (time.perf_counter() - t0) * 1000)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, t0 = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, stats, (time.perf_counter() - t0) * 1000)
+        return response
+
+    def _record(self, request, response, stats, ms):
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name or match.route) if match else "<unresolved>"
+        size = None if response.streaming else len(response.content)
+        repeated = stats.repeated(self.repeat_threshold)
+
+        row = {
+            "view": view,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "ms": round(ms, 2),
+            "queries": stats.queries,
+            "db_ms": round(stats.db_ms, 2),
+            "duplicates": stats.duplicates(),
+            "cache_hits": stats.cache_hits,
+            "cache_misses": stats.cache_misses,
+            "bytes": size,
+        }
+        with _lock:
+            _samples[view].append(row)
+
+        if ms >= self.slow_ms or repeated:
+            row = {**row, "slow": ms >= self.slow_ms,
+                   "repeated_sql": [{"sql": sql[:300], "count": n} for sql, n in repeated[:5]]}
+            logger.warning(json.dumps(row, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(row, ensure_ascii=False))
@@ -0,0 +1,282 @@
+# healthmanager/metrics.py
+"""
+Số liệu vận hành theo định dạng text của Prometheus, phục vụ ở /metrics.
+
+Không phụ thuộc prometheus_client. Mỗi process giữ counter / histogram trong
+RAM; khi chạy nhiều worker (gunicorn) đặt METRICS_DIR: mỗi process ghi ảnh
+chụp số liệu của mình ra {METRICS_DIR}/<pid>.json (tối đa mỗi
+METRICS_FLUSH_SECONDS giây, ghi nguyên tử) và /metrics cộng dồn mọi file.
+File của process đã tắt được giữ lại để counter không bị tụt; xoá thư mục
+khi deploy lại. Lệnh cron (send_reminder) ghi file khi kết thúc.
+
+Đường nóng chỉ là 1 lần lấy lock + cộng số trong dict.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_lock = threading.Lock()
+_registry = {}          # name -> metric (thứ tự khai báo = thứ tự xuất)
+_values = {}            # (name, labels) -> float             (counter)
+_hists = {}             # (name, labels) -> [bucket..., sum, count] (histogram)
+_pid = os.getpid()
+_last_flush = 0.0
+
+
+def _reset_if_forked():
+    # gunicorn --preload: process con thừa hưởng số liệu của process cha -> đếm lại từ 0
+    global _pid, _last_flush
+    if os.getpid() != _pid:
+        _values.clear()
+        _hists.clear()
+        _pid = os.getpid()
+        _last_flush = 0.0
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        _registry[name] = self
+
+    def inc(self, *labelvalues, amount=1.0):
+        key = (self.name, tuple(str(v) for v in labelvalues))
+        with _lock:
+            _reset_if_forked()
+            _values[key] = _values.get(key, 0.0) + amount
+        _maybe_flush()
+
+
+class Histogram:
+    type = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        _registry[name] = self
+
+    def observe(self, value, *labelvalues):
+        key = (self.name, tuple(str(v) for v in labelvalues))
+        i = bisect_left(self.buckets, value)  # bucket đầu tiên có le >= value
+        with _lock:
+            _reset_if_forked()
+            row = _hists.get(key)
+            if row is None:
+                row = _hists[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+        _maybe_flush()
+
+
+# ==============================
+# Các số liệu của ứng dụng
+# ==============================
+
+REQUEST_LATENCY = Histogram(
+    "lockun_http_request_duration_seconds", "Thời gian xử lý request theo tên URL", ["view", "method"],
+)
+REQUESTS = Counter("lockun_http_requests_total", "Số request theo tên URL và mã trạng thái", ["view", "status"])
+DB_QUERIES = Histogram(
+    "lockun_http_request_db_queries", "Số truy vấn DB mỗi request", ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+CHAT_MESSAGES = Counter("lockun_chat_messages_total", "Tin nhắn gửi tới chatbot", ["mode"])
+EXPORT_BYTES = Histogram(
+    "lockun_report_export_bytes", "Kích thước file báo cáo xuất ra", ["format"],
+    buckets=(1e3, 1e4, 1e5, 1e6, 1e7),
+)
+EXPORT_SECONDS = Histogram("lockun_report_export_duration_seconds", "Thời gian tạo file báo cáo", ["format"])
+REMINDER_EMAILS = Counter("lockun_reminder_emails_total", "Email nhắc nhở đã gửi / lỗi", ["result"])
+TRACKER_ENTRIES = Counter("lockun_tracker_entries_total", "Bữa ăn / buổi tập được ghi / xoá", ["kind", "action"])
+
+
+def observe_export(fmt, started, nbytes):
+    EXPORT_SECONDS.observe(time.perf_counter() - started, fmt)
+    EXPORT_BYTES.observe(nbytes, fmt)
+
+
+# ==============================
+# Gom số liệu nhiều process
+# ==============================
+
+def _metrics_dir():
+    path = getattr(settings, "METRICS_DIR", None)
+    return Path(path) if path else None
+
+
+def _snapshot():
+    with _lock:
+        _reset_if_forked()
+        return {
+            "counters": [[k[0], list(k[1]), v] for k, v in _values.items()],
+            "histograms": [[k[0], list(k[1]), list(v)] for k, v in _hists.items()],
+        }
+
+
+def flush() -> None:
+    """Ghi số liệu của process này ra METRICS_DIR (no-op nếu không cấu hình)."""
+    directory = _metrics_dir()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{os.getpid()}.json"
+    tmp = target.with_suffix(".tmp")
+    tmp.write_text(json.dumps(_snapshot()), encoding="utf-8")
+    os.replace(tmp, target)
+
+
+def _maybe_flush():
+    global _last_flush
+    now = time.monotonic()
+    if now - _last_flush >= getattr(settings, "METRICS_FLUSH_SECONDS", 5):
+        _last_flush = now
+        try:
+            flush()
+        except OSError:
+            pass  # không để lỗi ghi số liệu làm hỏng request
+
+
+atexit.register(lambda: _metrics_dir() and flush())
+
+
+def _collect():
+    """Số liệu cộng dồn của mọi process: (counters, histograms)."""
+    snapshots = [_snapshot()]
+    directory = _metrics_dir()
+    if directory is not None and directory.is_dir():
+        own = f"{os.getpid()}.json"
+        for path in directory.glob("*.json"):
+            if path.name == own:
+                continue  # process này: dùng số liệu trong RAM (mới hơn)
+            try:
+                snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+
+    counters, hists = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(labels))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, row in snap["histograms"]:
+            key = (name, tuple(labels))
+            cur = hists.get(key)
+            hists[key] = list(row) if cur is None else [a + b for a, b in zip(cur, row)]
+    return counters, hists
+
+
+def _escape(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _num(value):
+    return repr(float(value)) if isinstance(value, float) and not float(value).is_integer() else str(int(value))
+
+
+def render() -> str:
+    counters, hists = _collect()
+    lines = []
+    for name, metric in _registry.items():
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        if metric.type == "counter":
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_labels(metric.labels, labels)} {_num(value)}")
+            continue
+        for (n, labels), row in sorted(hists.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for le, count in zip(metric.buckets, row):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(metric.labels, labels, [('le', _num(le))])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(metric.labels, labels, [('le', '+Inf')])} {row[-1]}")
+            lines.append(f"{name}_sum{_labels(metric.labels, labels)} {_num(row[-2])}")
+            lines.append(f"{name}_count{_labels(metric.labels, labels)} {row[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# ==============================
+# Middleware: thời gian + số truy vấn theo tên URL
+# ==============================
+
+_queries = ContextVar("healthmanager_metrics_queries", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    box = _queries.get()
+    if box is not None:
+        box[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    connection_created: gắn bộ đếm truy vấn vào mọi kết nối. Gắn ở kết nối
+    (không bọc theo request) để đếm được cả truy vấn của view async – ORM
+    chạy trong thread của sync_to_async, ContextVar đi theo sang đó.
+    """
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        box = [0]
+        token = _queries.set(box)
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self._observe(request, response, box[0], t0)
+        return response
+
+    async def __acall__(self, request):
+        box = [0]
+        token = _queries.set(box)
+        t0 = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self._observe(request, response, box[0], t0)
+        return response
+
+    def _observe(self, request, response, queries, t0):
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name or match.route) if match else "<unresolved>"
+        REQUEST_LATENCY.observe(time.perf_counter() - t0, view, request.method)
+        REQUESTS.inc(view, response.status_code)
+        DB_QUERIES.observe(queries, view)
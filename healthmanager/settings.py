@@ -12,6 +12,9 @@ load_dotenv(BASE_DIR / ".env.example", override=False)
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "unsafe-dev")
 
+# Phiên bản đang chạy (Render tự đặt RENDER_GIT_COMMIT) – dùng trong ETag trang
+APP_VERSION = os.getenv("APP_VERSION") or os.getenv("RENDER_GIT_COMMIT", "dev")
+
 # Trên Render nên set biến môi trường DEBUG=False
 DEBUG = os.getenv("DEBUG", "True").strip().lower() in ("true", "1", "yes")
 
@@ -68,8 +71,8 @@ INSTALLED_APPS = [
 # ==============================
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    # Whitenoise để serve static trên Render / production
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Whitenoise để serve static trên Render / production (bản chạy được cả ASGI)
+    "healthmanager.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -78,51 +81,216 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# ==============================
+# Đo hiệu năng từng request (tuỳ chọn) – xem healthmanager/instrumentation.py
+# ==============================
+# Log JSON mỗi request (logger "healthmanager.requests"), thống kê p50/p95/p99
+# theo view ở /ops/perf/ (staff).
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "False").strip().lower() in ("true", "1", "yes")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+INSTRUMENTATION_WINDOW = int(os.getenv("INSTRUMENTATION_WINDOW", "500"))  # số mẫu giữ cho mỗi view
+INSTRUMENTATION_REPEAT_THRESHOLD = int(os.getenv("INSTRUMENTATION_REPEAT_THRESHOLD", "5"))
+
+if INSTRUMENTATION_ENABLED:
+    # đứng đầu để đo trọn cả các middleware còn lại
+    MIDDLEWARE.insert(0, "healthmanager.instrumentation.InstrumentationMiddleware")
+
+# ==============================
+# Số liệu Prometheus ở /metrics – xem healthmanager/metrics.py
+# ==============================
+# METRICS_DIR: thư mục chung cho mọi worker gunicorn (xoá khi deploy lại);
+# bỏ trống = chỉ số liệu của process đang trả lời.
+# /metrics chỉ cho staff hoặc scraper gửi "Authorization: Bearer <METRICS_TOKEN>".
+# METRICS_ALLOW_LOCALHOST: cho thêm request từ 127.0.0.1 / ::1 – KHÔNG bật khi
+# chạy sau reverse proxy cùng máy (mọi request đều tới từ loopback).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").strip().lower() in ("true", "1", "yes")
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOW_LOCALHOST = os.getenv("METRICS_ALLOW_LOCALHOST", "False").strip().lower() in ("true", "1", "yes")
+
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, "healthmanager.metrics.MetricsMiddleware")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"message": {"format": "%(message)s"}},
+    "handlers": {"console": {"class": "logging.StreamHandler", "formatter": "message"}},
+    "loggers": {
+        "healthmanager.requests": {
+            "handlers": ["console"],
+            "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 ROOT_URLCONF = "healthmanager.urls"
 
 # ==============================
 # Templates
 # ==============================
+# Template đã parse được giữ trong RAM (cached loader; DEBUG vẫn tự nạp lại
+# khi sửa file). Phần tĩnh của layout / trang giới thiệu dùng {% cache %}
+# theo ngôn ngữ + APP_VERSION, sống FRAGMENT_CACHE_SECONDS giây (DEBUG: 0 =
+# không cache, sửa template thấy ngay).
+FRAGMENT_CACHE_SECONDS = int(os.getenv("FRAGMENT_CACHE_SECONDS", "0" if DEBUG else "86400"))
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
+                "django.template.context_processors.i18n",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "healthmanager.context_processors.app_version",
+            ],
+            # {% load images %}: <picture> AVIF / WebP cho ảnh tĩnh
+            "libraries": {
+                "assets": "healthmanager.templatetags.assets",
+                "images": "healthmanager.templatetags.images",
+            },
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = "healthmanager.wsgi.application"
+ASGI_APPLICATION = "healthmanager.asgi.application"
+# View async (chat, API tổng hợp JSON): healthmanager/asgi.py tự bật; chạy WSGI
+# thì giữ False để /api/chat/ dùng bản sync (không tốn event loop mỗi request)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False").strip().lower() in ("true", "1", "yes")
 
 # ==============================
-# Database (PostgreSQL)
+# Database (PostgreSQL, hoặc SQLite cho bản tự host nhỏ)
 # ==============================
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("DB_NAME", "healthdb"),
-        "USER": os.getenv("DB_USER", "postgres"),
-        "PASSWORD": os.getenv("DB_PASSWORD", "123456789"),
-        "HOST": os.getenv("DB_HOST", "127.0.0.1"),
-        "PORT": os.getenv("DB_PORT", "5432"),
+# DB_ENGINE=postgresql (mặc định, đọc DB_*) | sqlite (file SQLITE_PATH).
+# DATABASE_URL (nếu có) luôn được ưu tiên, kể cả "sqlite:////đường/dẫn.db".
+# Quản lý kết nối (áp dụng cho cả DB_* lẫn DATABASE_URL):
+# - DB_CONN_MAX_AGE: số giây giữ kết nối giữa các request (0 = mở/đóng mỗi
+#   request, "none" = giữ mãi). Mặc định 600.
+# - DB_CONN_HEALTH_CHECKS: kiểm tra kết nối cũ còn sống trước khi dùng lại.
+# (Pool psycopg 3 của Django - OPTIONS["pool"] - cần Django >= 5.1; bản đang
+# ghim trong requirements.txt là 5.0.6 nên chưa dùng, kết nối bền ở trên thay thế.)
+_conn_max_age = os.getenv("DB_CONN_MAX_AGE", "600").strip().lower()
+DB_CONN_MAX_AGE = None if _conn_max_age in ("none", "") else int(_conn_max_age)
+DB_CONN_HEALTH_CHECKS = os.getenv("DB_CONN_HEALTH_CHECKS", "True").strip().lower() in ("true", "1", "yes")
+
+DB_ENGINE = os.getenv("DB_ENGINE", "postgresql").strip().lower()
+
+if DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("DB_NAME", "healthdb"),
+            "USER": os.getenv("DB_USER", "postgres"),
+            "PASSWORD": os.getenv("DB_PASSWORD", "123456789"),
+            "HOST": os.getenv("DB_HOST", "127.0.0.1"),
+            "PORT": os.getenv("DB_PORT", "5432"),
+        }
     }
-}
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL:
     DATABASES["default"] = dj_database_url.config(
         default=DATABASE_URL,
-        conn_max_age=600,        # giữ kết nối pool, đỡ tốn tài nguyên
-        ssl_require=not DEBUG,   # Render thường dùng SSL
+        ssl_require=not DEBUG and not DATABASE_URL.startswith("sqlite"),  # Render thường dùng SSL
     )
 
+DATABASES["default"]["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = DB_CONN_HEALTH_CHECKS
+
+# ----- SQLite: pragma cho chạy production (áp dụng bởi healthmanager.db) -----
+# WAL: đọc không chặn ghi; synchronous=NORMAL an toàn với WAL và ghi nhanh hơn
+# nhiều; busy_timeout: chờ khoá thay vì lỗi "database is locked" ngay.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_KB", "65536")),  # âm = đơn vị KiB
+    "temp_store": "MEMORY",
+}
+
+# ----- Kết nối chỉ-đọc cho trang báo cáo / tổng hợp (healthmanager.db) -----
+# SQLite: tự mở thêm kết nối mode=ro tới cùng file (DB_READ_REPLICA=False để tắt).
+# PostgreSQL: DATABASE_READ_URL hoặc DB_READ_HOST trỏ tới bản sao chỉ đọc.
+DB_READ_REPLICA = os.getenv("DB_READ_REPLICA", "True").strip().lower() in ("true", "1", "yes")
+_default_db = DATABASES["default"]
+_replica = None
+if _default_db["ENGINE"] == "django.db.backends.sqlite3":
+    if str(_default_db["NAME"]) != ":memory:":
+        _replica = {**_default_db, "NAME": f"file:{Path(_default_db['NAME']).resolve()}?mode=ro"}
+elif os.getenv("DATABASE_READ_URL"):
+    _replica = {
+        **_default_db,
+        **dj_database_url.parse(os.getenv("DATABASE_READ_URL"), ssl_require=not DEBUG),
+        "CONN_MAX_AGE": _default_db["CONN_MAX_AGE"],
+        "CONN_HEALTH_CHECKS": _default_db["CONN_HEALTH_CHECKS"],
+    }
+elif os.getenv("DB_READ_HOST"):
+    _replica = {
+        **_default_db,
+        "HOST": os.getenv("DB_READ_HOST"),
+        "PORT": os.getenv("DB_READ_PORT", _default_db.get("PORT", "")),
+    }
+
+if _replica and DB_READ_REPLICA:
+    _replica["TEST"] = {"MIRROR": "default"}  # chạy test: replica dùng chung DB test
+    DATABASES["replica"] = _replica
+
+DATABASE_ROUTERS = ["healthmanager.db.ReadReplicaRouter"]
+
+# ==============================
+# Cache
+# ==============================
+# - "default": cache chung (snapshot chatbot, ...)
+# - "chat": trạng thái hội thoại chatbot; MAX_ENTRIES giới hạn số hội thoại
+#   giữ trong bộ nhớ, LocMemCache loại bỏ hội thoại ít dùng gần nhất trước.
+# Đổi backend qua biến môi trường (vd DatabaseCache / FileBasedCache).
+CHAT_CONVERSATION_TTL = int(os.getenv("CHAT_CONVERSATION_TTL", "1800"))  # giây
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "healthmanager-default"),
+    },
+    # {% cache %} trong template tự dùng alias này
+    "template_fragments": {
+        "BACKEND": os.getenv("FRAGMENT_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("FRAGMENT_CACHE_LOCATION", "healthmanager-fragments"),
+    },
+    "chat": {
+        "BACKEND": os.getenv("CHAT_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CHAT_CACHE_LOCATION", "healthmanager-chat"),
+        "TIMEOUT": CHAT_CONVERSATION_TTL,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CHAT_CONVERSATION_MAX", "5000")),
+            "CULL_FREQUENCY": 10,  # khi đầy, bỏ 1/10 số hội thoại cũ nhất
+        },
+    },
+}
+
 # ==============================
 # Mật khẩu & Bảo mật
 # ==============================
@@ -133,6 +301,10 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# OTP đặt lại mật khẩu: thời hạn mã và số lần nhập sai tối đa
+PASSWORD_RESET_OTP_TTL_MINUTES = int(os.getenv("PASSWORD_RESET_OTP_TTL_MINUTES", "10"))
+PASSWORD_RESET_OTP_MAX_ATTEMPTS = int(os.getenv("PASSWORD_RESET_OTP_MAX_ATTEMPTS", "5"))
+
 # ==============================
 # Ngôn ngữ & Múi giờ
 # ==============================
@@ -147,7 +319,24 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Bundle CSS / JS đã gộp + rút gọn (healthmanager.assets) được build ra đây và
+# cung cấp cho runserver / collectstatic qua BundleFinder
+STATICFILES_FINDERS = [
+    "django.contrib.staticfiles.finders.FileSystemFinder",
+    "django.contrib.staticfiles.finders.AppDirectoriesFinder",
+    "healthmanager.assets.BundleFinder",
+]
+ASSET_BUILD_DIR = BASE_DIR / "var" / "bundles"
+# collectstatic: sinh biến thể AVIF / WebP / thu nhỏ cho static/img, rồi hash
+# tên file + nén sẵn .gz / .br như WhiteNoise (healthmanager.storage; .br cần
+# gói Brotli). WhiteNoise tự chọn bản nén theo Accept-Encoding.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "healthmanager.storage.OptimizedStaticFilesStorage"},
+}
+# File có hash trong tên: WhiteNoise luôn trả "max-age=315360000, public, immutable".
+# File không hash (truy cập thẳng tên gốc) chỉ cache ngắn để deploy mới có hiệu lực.
+WHITENOISE_MAX_AGE = 0 if DEBUG else int(os.getenv("WHITENOISE_MAX_AGE", "3600"))
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -188,10 +377,42 @@ EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "10"))
 # ==============================
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
+# Giới hạn tần suất /api/chat/ (token bucket theo user / IP)
+CHAT_RATE_PER_MINUTE = float(os.getenv("CHAT_RATE_PER_MINUTE", "30"))
+CHAT_RATE_BURST = float(os.getenv("CHAT_RATE_BURST", "10"))
+# Số reverse proxy tin cậy đứng trước app (Render: 1). 0 = bỏ qua
+# X-Forwarded-For, chỉ dùng REMOTE_ADDR (client tự đặt được header này)
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+
+# Chuỗi backend trả lời chat: tra FAQ (BM25 offline) trước, rule engine sau
+CHATBOT_BACKENDS = [
+    "chatbot.backends.RetrievalBackend",
+    "chatbot.backends.RuleBackend",
+]
+CHATBOT_FAQ_INDEX_PATH = BASE_DIR / "var" / "chatbot_faq.bm25"
+
+# Tìm kiếm (tracker.search): "auto" = full-text PostgreSQL nếu có unaccent,
+# ngược lại chỉ mục trong process; "memory" để ép dùng chỉ mục trong process
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+
+# API đồng bộ cho app mobile (tracker/sync.py): số thao tác tối đa mỗi lần gọi
+SYNC_MAX_BATCH = int(os.getenv("SYNC_MAX_BATCH", "500"))
+
+# Change feed (tracker/changes.py): số ngày giữ lịch sử thay đổi / dấu xoá
+# (version cũ hơn -> bên đọc quét lại toàn bộ); số dòng tối đa mỗi trang API
+CHANGE_LOG_DAYS = int(os.getenv("CHANGE_LOG_DAYS", "90"))
+CHANGE_FEED_PAGE_SIZE = int(os.getenv("CHANGE_FEED_PAGE_SIZE", "500"))
+
 # ==============================
 # Cronjob (Tự động gửi nhắc nhở)
 # ==============================
 CRONJOBS = [
     # Gửi nhắc nhở lúc 7 giờ sáng mỗi ngày
     ("0 7 * * *", "django.core.management.call_command", ["send_reminder"]),
+    # Xoá user đang chờ xoá (trang quản trị) mỗi phút
+    ("* * * * *", "django.core.management.call_command", ["process_user_deletions"]),
+    # Dọn OTP đã dùng / hết hạn mỗi giờ
+    ("15 * * * *", "django.core.management.call_command", ["purge_otps"]),
+    # Dọn change feed cũ mỗi đêm
+    ("30 3 * * *", "django.core.management.call_command", ["prune_change_log"]),
 ]
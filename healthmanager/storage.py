@@ -0,0 +1,36 @@
+# healthmanager/storage.py
+from django.core.files.base import ContentFile
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from . import images
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Như storage của WhiteNoise (hash tên file + gzip/brotli) nhưng trước đó
+    sinh biến thể AVIF / WebP / thu nhỏ cho ảnh trong img/ (healthmanager.images).
+    Biến thể được thêm vào danh sách file của collectstatic nên cũng được
+    gắn hash -> WhiteNoise phục vụ với Cache-Control immutable, max-age 10 năm.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name in sorted(p for p in paths if images.is_source(p)):
+                storage, path = paths[name]
+                for variant, data in self._variants(name, storage, path):
+                    if self.exists(variant):
+                        self.delete(variant)
+                    self._save(variant, ContentFile(data))
+                    # đọc lại từ STATIC_ROOT (ảnh gốc: bản đã nén lại)
+                    paths[variant] = (self, variant)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _variants(self, name, storage, path):
+        with storage.open(path) as fh:
+            return images.build_variants(name, fh.read())
+
+    def create_compressor(self, extensions=None, **kwargs):
+        # AVIF / WebP đã nén sẵn: gzip / brotli không nhỏ hơn, không ghi .gz / .br
+        extensions = (*(extensions or Compressor.SKIP_COMPRESS_EXTENSIONS), *images.FORMATS)
+        return super().create_compressor(extensions=extensions, **kwargs)
@@ -0,0 +1,48 @@
+# healthmanager/templatetags/assets.py
+"""
+{% load assets %}
+
+{% inline_bundle 'bundles/site.css' %}
+    -> <style> chứa bundle đã rút gọn (CSS của phần đầu trang, không tốn thêm
+       request chặn render). url(...) tương đối được đổi sang URL static
+       tuyệt đối (có hash khi đã collectstatic).
+
+URL của bundle tải sau (vd bundles/chat.js) lấy bằng {% static %} như file
+tĩnh thường.
+"""
+import posixpath
+import re
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from healthmanager import assets
+
+register = template.Library()
+
+_CSS_URL = re.compile(r"""url\((['"]?)(?!data:|https?:|/|#)([^'")]+)\1\)""")
+
+
+def _absolute_urls(name, css):
+    base = posixpath.dirname(name)
+
+    def repl(match):
+        target = posixpath.normpath(posixpath.join(base, match.group(2)))
+        return f"url({match.group(1)}{static(target)}{match.group(1)})"
+
+    return _CSS_URL.sub(repl, css)
+
+
+@lru_cache(maxsize=16)
+def _inline_css_cached(name):
+    return _absolute_urls(name, assets.read(name))
+
+
+@register.simple_tag
+def inline_bundle(name):
+    # DEBUG: đọc lại mỗi lần (file nguồn có thể vừa sửa); production: 1 lần / process
+    css = _absolute_urls(name, assets.read(name)) if settings.DEBUG else _inline_css_cached(name)
+    return mark_safe(f"<style>{css}</style>")
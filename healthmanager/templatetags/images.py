@@ -0,0 +1,70 @@
+# healthmanager/templatetags/images.py
+"""
+{% load images %}
+
+{% picture 'img/hospital.png' alt="..." class="img-fluid" sizes="(min-width: 768px) 50vw, 100vw" %}
+    -> <picture> với <source> AVIF / WebP (srcset theo bề rộng) và <img> dự
+       phòng (ảnh gốc đã nén lại), kèm width/height để trang không
+       nhảy layout, mặc định loading="lazy".
+
+{% image_variant 'img/favicon.png' 32 %}
+    -> URL của 1 biến thể (định dạng gốc, chỉ có ở cỡ icon EXTRA_WIDTHS),
+       vd cho <link rel="icon">.
+
+Biến thể do collectstatic sinh ra (healthmanager.images); chưa có (dev) thì
+cả 2 tag dùng ảnh gốc.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from healthmanager import images
+
+register = template.Library()
+
+
+def _srcset(name, widths, fmt):
+    entries = [
+        (static(images.variant_name(name, w, fmt)), w)
+        for w in widths
+        if images.exists(images.variant_name(name, w, fmt))
+    ]
+    return ", ".join(f"{url} {w}w" for url, w in entries)
+
+
+@register.simple_tag
+def image_variant(name, width, fmt=None):
+    variant = images.variant_name(name, width, fmt or images.source_format(name))
+    return static(variant if images.exists(variant) else name)
+
+
+@register.simple_tag
+def picture(name, alt="", sizes="100vw", loading="lazy", **attrs):
+    size = images.dimensions(name)
+    if size:
+        attrs.setdefault("width", size[0])
+        attrs.setdefault("height", size[1])
+    attrs.update(alt=alt, loading=loading, decoding="async")
+    if loading == "eager":
+        attrs.setdefault("fetchpriority", "high")  # ảnh đầu trang (LCP)
+
+    sources = []
+    if size:
+        widths = images.target_widths(name, size[0])
+        for fmt in images.FORMATS:
+            srcset = _srcset(name, widths, fmt)
+            if srcset:
+                sources.append((images.MIME_TYPES[fmt], srcset, sizes))
+
+    img = format_html(
+        '<img src="{}" {}>',
+        static(name),
+        format_html_join(" ", '{}="{}"', sorted(attrs.items())),
+    )
+    if not sources:
+        return img
+    return format_html(
+        "<picture>{}{}</picture>",
+        format_html_join("", '<source type="{}" srcset="{}" sizes="{}">', sources),
+        img,
+    )
@@ -21,22 +21,8 @@ urlpatterns = [
     # Trang chính & tĩnh
     path("", DashboardView.as_view(), name="dashboard"),
     path("search/", views.search, name="search"),
+    path("ops/perf/", views.perf_stats, name="perf_stats"),
+    path("metrics", views.metrics, name="metrics"),
     path("about/", TemplateView.as_view(template_name="pages/about.html"), name="about"),
-    path(
-        "services/",
-        TemplateView.as_view(
-            template_name="pages/services.html",
-            extra_context={
-                "departments": [
-                    "Khoa tai mũi họng",
-                    "Khoa xương cơ khớp",
-                    "Phẫu thuật tim mạch",
-                    "Tiêu hóa",
-                    "Thẩm mỹ",
-                    "Cấp cứu ngoại khoa",
-                ]
-            },
-        ),
-        name="services",
-    ),
+    path("services/", TemplateView.as_view(template_name="pages/services.html"), name="services"),
 ]
@@ -1,20 +1,57 @@
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth.views import redirect_to_login
+from django.core.paginator import Paginator
 from django.shortcuts import render
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from healthmanager import instrumentation, metrics as app_metrics
+from tracker.search import search as search_user_data
+
+SEARCH_PER_PAGE = 20
+
 
 def search(request: HttpRequest):
+    """
+    Tìm trong bữa ăn, buổi tập, mục tiêu của chính user + danh mục món ăn
+    (xếp hạng, phân trang) – xem tracker.search.
+    """
     q = (request.GET.get("q") or "").strip()
-    results = []
-
-    if q:
-        kw = q.lower()
-        if any(k in kw for k in ["tập", "workout", "gym"]):
-            results.append({"title": "Nhật ký tập luyện", "url": "/tracker/workouts/"})
-        if any(k in kw for k in ["ăn", "meal", "dinh dưỡng", "calo", "thịt", "rau"]):
-            results.append({"title": "Nhật ký dinh dưỡng", "url": "/tracker/meals/"})
-        if any(k in kw for k in ["mục tiêu", "goal", "giảm cân", "tăng cơ"]):
-            results.append({"title": "Mục tiêu sức khỏe", "url": "/goals/"})
-        if any(k in kw for k in ["báo cáo", "report", "thống kê"]):
-            results.append({"title": "Báo cáo", "url": "/reports/"})
-
-    context = {"q": q, "results": results}
+    if q and not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    total, hits = search_user_data(request.user, q) if q else (0, [])
+    page = Paginator(hits, SEARCH_PER_PAGE).get_page(request.GET.get("page"))
+
+    context = {"q": q, "results": page, "total": total}
     return render(request, "search_results.html", context)
+
+
+@user_passes_test(lambda u: u.is_staff)
+def perf_stats(request: HttpRequest):
+    """
+    p50/p95/p99, số truy vấn, truy vấn lặp, tỉ lệ cache hit theo view
+    (mẫu gần nhất của process đang trả lời). ?reset=1 để xoá số liệu cũ.
+    """
+    if request.GET.get("reset"):
+        instrumentation.reset_stats()
+    return JsonResponse({
+        "enabled": settings.INSTRUMENTATION_ENABLED,
+        "window": settings.INSTRUMENTATION_WINDOW,
+        "views": instrumentation.view_stats(),
+    }, json_dumps_params={"ensure_ascii": False, "indent": 2})
+
+
+def metrics(request: HttpRequest):
+    """Số liệu dạng text của Prometheus (gộp mọi worker nếu có METRICS_DIR)."""
+    token = settings.METRICS_TOKEN
+    allowed = (
+        bool(token) and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    ) or request.user.is_staff
+    # sau reverse proxy cùng máy mọi request đều từ loopback -> chỉ khi bật rõ ràng
+    if not allowed and settings.METRICS_ALLOW_LOCALHOST:
+        allowed = request.META.get("REMOTE_ADDR") in ("127.0.0.1", "::1")
+    if not allowed:
+        return HttpResponseForbidden("forbidden")
+    return HttpResponse(app_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -5,4 +5,6 @@ urlpatterns = [
     path("", views.reports_dashboard, name="reports_dashboard"),
     path("csv/", views.export_csv, name="export_csv"),
     path("pdf/", views.export_pdf, name="export_pdf"),
+    path("api/summary/", views.summary_api, name="reports_summary_api"),
+    path("api/today/", views.today_api, name="reports_today_api"),
 ]
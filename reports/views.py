@@ -1,12 +1,17 @@
 # reports/views.py
 from datetime import date, timedelta, datetime
-import io, csv
+import io, csv, time
+from functools import wraps
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.utils import timezone
 from django.db.models import Sum
-from goals.models import Goal 
+from django.views.decorators.http import require_GET
+from goals.progress import goals_for
+from healthmanager.conditional import user_data_page
+from healthmanager.db import read_replica
+from healthmanager.metrics import observe_export
 from tracker.models import Workout, Meal
 from accounts.models import Profile
 
@@ -38,6 +43,8 @@ def _get_tdee(user) -> float:
 
 # ================== views ==================
 @login_required
+@user_data_page
+@read_replica
 def reports_dashboard(request):
     """
     Báo cáo tổng hợp:
@@ -104,14 +111,9 @@ def reports_dashboard(request):
     net_avg = net_total / days_logged if days_logged > 0 else 0
 
     # ---- Mục tiêu (nếu có) ----
-    try:
-        active_goal = user.goal_set.get(status="in_progress")
-        goal_text = active_goal.get_type_display()
-        deficit_per_day = active_goal.required_kcal_deficit_per_day()  # nếu bạn có hàm này
-    except:
-        active_goal = None
-        goal_text = None
-        deficit_per_day = None
+    active_goal = goals_for(user, request).active
+    goal_text = active_goal.get_type_display() if active_goal else None
+    deficit_per_day = active_goal.required_deficit_per_day if active_goal else None
 
     return render(
         request,
@@ -139,11 +141,13 @@ def reports_dashboard(request):
 
 
 @login_required
+@read_replica
 def export_csv(request):
     """
     Xuất CSV theo đúng khoảng ngày đang lọc (?start, ?end)
     Gồm 2 phần: Workouts và Meals, mỗi phần có header riêng.
     """
+    started = time.perf_counter()
     user = request.user
     today = timezone.localdate()
     default_start = today - timedelta(days=13)
@@ -167,9 +171,10 @@ def export_csv(request):
     # Meals
     writer.writerow([f"Meals từ {start} đến {end}"])
     writer.writerow(["Date","Meal","Food","Portion","Calories IN"])
-    for m in Meal.objects.filter(user=user, date__range=(start, end)).order_by("date","id"):
+    for m in Meal.objects.filter(user=user, date__range=(start, end)).select_related("food").order_by("date","id"):
         writer.writerow([m.date, m.meal_type, m.food, m.portion, m.calories_in])
 
+    observe_export("csv", started, len(response.content))
     return response
 
 # ============= PDF (tùy chọn, giống lọc ngày ở trên) =============
@@ -181,6 +186,7 @@ except Exception:
     A4 = None
 
 @login_required
+@read_replica
 def export_pdf(request):
     """
     Xuất PDF theo đúng khoảng ngày đang lọc (?start, ?end).
@@ -188,6 +194,7 @@ def export_pdf(request):
     """
     if canvas is None:
         return HttpResponse("reportlab chưa được cài. Chạy: pip install reportlab", status=501)
+    started = time.perf_counter()
 
     user = request.user
     today = timezone.localdate()
@@ -231,7 +238,7 @@ def export_pdf(request):
     y -= 18
     p.setFont("Helvetica", 10)
 
-    for m in Meal.objects.filter(user=user, date__range=(start, end)).order_by("date", "id"):
+    for m in Meal.objects.filter(user=user, date__range=(start, end)).select_related("food").order_by("date", "id"):
         line = f"{m.date}  -  {m.get_meal_type_display()}  -  {m.food}  -  {m.calories_in} kcal"
         p.drawString(60, y, line)
         y -= 14
@@ -248,9 +255,12 @@ def export_pdf(request):
     resp = HttpResponse(content_type="application/pdf")
     resp["Content-Disposition"] = f'attachment; filename="report_{start}_{end}.pdf"'
     resp.write(pdf)
+    observe_export("pdf", started, len(pdf))
     return resp
 
 @login_required
+@user_data_page
+@read_replica
 def health_overview(request):
     """
     Trang QUẢN LÝ SỨC KHỎE CÁ NHÂN:
@@ -282,14 +292,14 @@ def health_overview(request):
     if profile and profile.tdee:
         tdee = float(profile.tdee)
 
-    # Net calories = ăn vào - TDEE + đốt
-    # Nếu net < 0 => đang thâm hụt (giảm cân)
-    net_cal_today = cal_in_today - tdee + cal_out_today
+    # Net calories = ăn vào - TDEE - đốt (calo tập luyện là năng lượng tiêu
+    # thêm ngoài TDEE). Nếu net < 0 => đang thâm hụt (giảm cân)
+    net_cal_today = cal_in_today - tdee - cal_out_today
 
     # Mục tiêu đang thực hiện (nếu có)
-    active_goal = None
-    if hasattr(Goal, "get_active_goal"):
-        active_goal = Goal.get_active_goal(user)
+    user_goals = goals_for(user, request)
+    active_goal = user_goals.active
+    goal_progress = user_goals.of(active_goal) if active_goal else None
 
     # Tính BMI text đơn giản
     bmi_text = ""
@@ -312,6 +322,108 @@ def health_overview(request):
         "cal_out_today": cal_out_today,
         "net_cal_today": net_cal_today,
         "active_goal": active_goal,
+        "goal_progress": goal_progress,
         "bmi_text": bmi_text,
     }
-    return render(request, "health/overview.html", context)
\ No newline at end of file
+    return render(request, "health/overview.html", context)
+
+
+# ================== JSON API (async) ==================
+# Số liệu cho biểu đồ / widget gọi bằng fetch. View async: dưới ASGI mỗi
+# request chờ DB không giữ 1 thread riêng.
+
+def api_login_required(view):
+    """
+    login_required cho view async trả JSON: chưa đăng nhập -> 401 thay vì
+    chuyển trang (login_required của Django 5.0 chưa hỗ trợ view async).
+    View nhận thêm tham số user.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"error": "login required"}, status=401)
+        return await view(request, user, *args, **kwargs)
+    return wrapper
+
+
+async def _aget_tdee(user) -> float:
+    """_get_tdee cho view async."""
+    prof = await Profile.objects.filter(user=user).afirst()
+    if prof is not None:
+        if prof.tdee and prof.tdee > 0:
+            return float(prof.tdee)
+        if getattr(prof, "bmr", 0) and prof.bmr > 0:
+            return round(prof.bmr * 1.375, 0)
+    return 2000.0
+
+
+@require_GET
+@api_login_required
+@read_replica
+async def summary_api(request, user):
+    """
+    Calories IN / OUT / NET theo ngày trong khoảng ?start=&end= (YYYY-MM-DD,
+    mặc định 14 ngày gần nhất) – cùng số liệu với reports_dashboard.
+    """
+    today = timezone.localdate()
+    start = _parse_ymd(request.GET.get("start", ""), today - timedelta(days=13))
+    end   = _parse_ymd(request.GET.get("end", ""), today)
+    if start > end:
+        start, end = end, start
+
+    kcal_in_by_day = {
+        m["date"]: float(m["kcal_in"] or 0)
+        async for m in Meal.objects.filter(user=user, date__range=(start, end))
+        .values("date").annotate(kcal_in=Sum("calories_in"))
+    }
+    kcal_out_by_day = {
+        w["date"]: float(w["kcal_out"] or 0)
+        async for w in Workout.objects.filter(user=user, date__range=(start, end))
+        .values("date").annotate(kcal_out=Sum("calories_out"))
+    }
+
+    days = []
+    total_in, total_out = 0, 0
+    for d in _daterange(start, end):
+        ki = round(kcal_in_by_day.get(d, 0.0), 1)
+        ko = round(kcal_out_by_day.get(d, 0.0), 1)
+        days.append({"date": d.isoformat(), "cal_in": ki, "cal_out": ko, "net": round(ki - ko, 1)})
+        total_in  += ki
+        total_out += ko
+
+    net_total = total_in - total_out
+    return JsonResponse({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "tdee": await _aget_tdee(user),
+        "days": days,
+        "total_in": round(total_in, 1),
+        "total_out": round(total_out, 1),
+        "net_total": round(net_total, 1),
+        "net_avg": round(net_total / len(days), 1) if days else 0,
+    })
+
+
+@require_GET
+@api_login_required
+@read_replica
+async def today_api(request, user):
+    """Calo IN / OUT / NET hôm nay – cùng công thức với health_overview."""
+    today = timezone.localdate()
+    meals_today = await Meal.objects.filter(user=user, date=today).aaggregate(total_in=Sum("calories_in"))
+    workouts_today = await Workout.objects.filter(user=user, date=today).aaggregate(total_out=Sum("calories_out"))
+    profile = await Profile.objects.filter(user=user).afirst()
+
+    cal_in_today = float(meals_today.get("total_in") or 0)
+    cal_out_today = float(workouts_today.get("total_out") or 0)
+    tdee = float(profile.tdee) if profile and profile.tdee else 2000.0
+
+    return JsonResponse({
+        "date": today.isoformat(),
+        "tdee": tdee,
+        "cal_in": cal_in_today,
+        "cal_out": cal_out_today,
+        # Net = ăn vào - TDEE - đốt; < 0 => đang thâm hụt
+        "net": cal_in_today - tdee - cal_out_today,
+    })
@@ -1,52 +1,123 @@
 // static/js/chatbox.js
-document.addEventListener("DOMContentLoaded", () => {
-  const chatBox   = document.getElementById("chatbox");
-  const chatBody  = document.getElementById("chat-body");
-  const chatForm  = document.getElementById("chat-form");
-  const chatInput = document.getElementById("chat-input");
-  const chatToggle= document.getElementById("chat-toggle");
-
-  // Nếu không có chatbox trên trang thì thoát luôn (tránh lỗi JS)
-  if (!chatBox || !chatBody || !chatForm || !chatInput || !chatToggle) {
-    return;
+// Widget chat AI – trợ lý chỉ nói về sức khỏe & Libra Health.
+// Không nằm trong trang: base.html chỉ có nút #ai-fab, file này (bundle
+// bundles/chat.js) được tải khi người dùng rê chuột / bấm nút lần đầu.
+(function () {
+  const fab = document.getElementById("ai-fab");
+  if (!fab || window.LibraChat) return;
+
+  const panel = document.createElement("div");
+  panel.id = "ai-panel";
+  panel.className = "ai-chat-panel";
+  panel.innerHTML =
+    '<div class="ai-chat-header">Trợ lý sức khỏe' +
+    '<button type="button" class="ai-chat-close" aria-label="Đóng">×</button></div>' +
+    '<div class="ai-chat-messages"></div>' +
+    '<form class="ai-chat-input-row">' +
+    '<input class="ai-chat-input" placeholder="Hỏi về BMI, TDEE, dinh dưỡng, mục tiêu..." autocomplete="off">' +
+    '<button type="submit" class="ai-chat-send-btn">Gửi</button></form>';
+  document.body.appendChild(panel);
+
+  const msgs  = panel.querySelector(".ai-chat-messages");
+  const form  = panel.querySelector("form");
+  const input = panel.querySelector("input");
+
+  function addMsg(txt, who) {
+    const div = document.createElement("div");
+    div.className = who === "user" ? "ai-msg-user" : "ai-msg-bot";
+    div.textContent = txt;
+    msgs.appendChild(div);
+    msgs.scrollTop = msgs.scrollHeight;
+    return div;
+  }
+
+  // Mở panel + lời chào lần đầu
+  function open() {
+    panel.classList.add("open");
+    if (!msgs.hasChildNodes()) {
+      addMsg(
+        "Xin chào! Mình là trợ lý sức khỏe Libra Health. " +
+        "Bạn có thể hỏi về BMI, BMR, TDEE, dinh dưỡng, tập luyện hoặc cách dùng các chức năng trên website. " +
+        "Thông tin chỉ mang tính tham khảo, không thay thế chẩn đoán hay chỉ định của bác sĩ.",
+        "bot"
+      );
+    }
+    input.focus();
   }
 
-  function appendMsg(text, who) {
-    const msg = document.createElement("div");
-    msg.className = "msg " + who;   // msg user / msg bot
-    msg.textContent = text;
-    chatBody.appendChild(msg);
-    chatBody.scrollTop = chatBody.scrollHeight;
+  fab.addEventListener("click", open);
+  panel.querySelector(".ai-chat-close").addEventListener("click", () => panel.classList.remove("open"));
+
+  // Đọc câu trả lời dạng Server-Sent Events, hiện từng đoạn ngay khi tới
+  async function readStream(body, bubble) {
+    const reader = body.pipeThrough(new TextDecoderStream()).getReader();
+    let buf = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buf += value;
+      let end;
+      while ((end = buf.indexOf("\n\n")) >= 0) {
+        const block = buf.slice(0, end);
+        buf = buf.slice(end + 2);
+        let event = "message", data = "";
+        for (const line of block.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        if (!data) continue;  // ": ok" – comment giữ kết nối
+        const payload = JSON.parse(data);
+        if (event === "chunk") bubble.textContent += payload.text;
+        else if (event === "error") bubble.textContent = payload.error;
+        msgs.scrollTop = msgs.scrollHeight;
+      }
+    }
   }
 
-  // Gửi tin nhắn
-  chatForm.addEventListener("submit", async (e) => {
+  // Gửi câu hỏi: mỗi lúc 1 request (trình duyệt dùng lại cùng 1 kết nối
+  // keep-alive tới server), bỏ qua lần bấm / Enter liên tiếp quá nhanh
+  const sendBtn = form.querySelector("button");
+  const DEBOUNCE_MS = 400;
+  let busy = false;
+  let lastSubmit = 0;
+
+  form.addEventListener("submit", async (e) => {
     e.preventDefault();
-    const text = chatInput.value.trim();
-    if (!text) return;
+    const text = input.value.trim();
+    const now = Date.now();
+    if (!text || busy || now - lastSubmit < DEBOUNCE_MS) return;
+    lastSubmit = now;
+    busy = true;
+    sendBtn.disabled = true;
 
-    appendMsg(text, "user");
-    chatInput.value = "";
+    addMsg(text, "user");
+    input.value = "";
+    const bubble = addMsg("", "bot");
 
     try {
       const res = await fetch("/api/chat/", {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", "Accept": "text/event-stream" },
         body: JSON.stringify({ message: text })
       });
 
-      const data = await res.json();
-      appendMsg(data.reply || "Xin lỗi, trợ lý đang gặp lỗi.", "bot");
+      if (res.ok && res.body && (res.headers.get("Content-Type") || "").includes("text/event-stream")) {
+        await readStream(res.body, bubble);
+      } else {
+        // 429 / 400 trả JSON
+        const data = await res.json().catch(() => ({}));
+        bubble.textContent = data.reply || data.error || "Xin lỗi, trợ lý đang gặp lỗi. Bạn thử hỏi lại sau nhé.";
+      }
+      if (!bubble.textContent) bubble.textContent = "Xin lỗi, trợ lý đang gặp lỗi. Bạn thử hỏi lại sau nhé.";
     } catch (err) {
       console.error(err);
-      appendMsg("Mạng lỗi hoặc server AI đang tạm thời không phản hồi. Thử lại sau nhé!", "bot");
+      bubble.textContent = "Xin lỗi, trợ lý sức khỏe đang bận hoặc mất kết nối. Bạn vui lòng thử lại sau.";
+    } finally {
+      busy = false;
+      sendBtn.disabled = false;
+      input.focus();
     }
   });
 
-  // Thu nhỏ / mở rộng chatbox
-  chatToggle.addEventListener("click", (e) => {
-    e.stopPropagation();
-    chatBox.classList.toggle("minimized");
-    chatToggle.textContent = chatBox.classList.contains("minimized") ? "+" : "–";
-  });
-});
+  window.LibraChat = { open: open };
+})();
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Workout, Meal, Food   # thêm Food
+from .models import Workout, Meal, Food, UserActivity   # thêm Food
 
 # ============================
 #  FOOD
@@ -28,3 +28,13 @@ class MealAdmin(admin.ModelAdmin):
     list_display = ("user", "meal_type", "date", "food", "quantity_gram", "calories_in")
     search_fields = ("user__username", "food__name")
     list_filter = ("meal_type", "date")
+
+
+# ============================
+#  ROLLUP HOẠT ĐỘNG
+# ============================
+@admin.register(UserActivity)
+class UserActivityAdmin(admin.ModelAdmin):
+    list_display = ("user", "meal_count", "workout_count", "last_activity_at")
+    search_fields = ("user__username",)
+    readonly_fields = ("meal_count", "workout_count", "last_activity_at")
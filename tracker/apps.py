@@ -2,3 +2,27 @@ from django.apps import AppConfig
 class TrackerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tracker"
+
+    def ready(self):
+        # rollup UserActivity cho trang quản trị user
+        from . import signals  # noqa: F401
+
+        # pragma SQLite (WAL, ...) cho mọi kết nối mới của project
+        from django.db.backends.signals import connection_created
+
+        from healthmanager.db import apply_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="healthmanager_sqlite_pragmas")
+
+        # đếm truy vấn cho /metrics và log hiệu năng: gắn vào kết nối lúc mở
+        # (chạy đúng cho cả view sync lẫn async dưới ASGI)
+        from django.conf import settings
+
+        if settings.METRICS_ENABLED:
+            from healthmanager.metrics import install_query_counter
+
+            connection_created.connect(install_query_counter, dispatch_uid="healthmanager_metrics_queries")
+        if settings.INSTRUMENTATION_ENABLED:
+            from healthmanager.instrumentation import install_query_wrapper
+
+            connection_created.connect(install_query_wrapper, dispatch_uid="healthmanager_instrumentation")
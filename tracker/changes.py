@@ -0,0 +1,183 @@
+# tracker/changes.py
+"""
+Change feed: mỗi lần lưu / xoá Meal, Workout, Goal, Profile thêm 1 dòng
+ChangeLog (ghi qua tracker.signals; ghi hàng loạt thì gọi record_bulk), id
+tăng dần là version. Bên đọc nhớ version cuối đã xử lý rồi chỉ đọc phần
+sau đó thay vì quét lại cả bảng:
+
+- iter_changes(): cho code nội bộ (rollup, chỉ mục, xuất dữ liệu).
+- feed_page(): 1 trang thay đổi của 1 user cho GET /tracker/api/changes/.
+
+Dòng ChangeLog nằm trong cùng transaction với thay đổi. Transaction commit
+muộn có thể làm version nhỏ hơn hiện ra sau version lớn hơn; dữ liệu của
+1 user thường chỉ do 1 thiết bị ghi nên feed theo user ít gặp.
+QuerySet.update() (vd tổng chạy của Goal) không ghi feed.
+"""
+from django.forms.models import model_to_dict
+
+from accounts.models import Profile
+from goals.models import Goal
+
+from .models import ChangeLog, Meal, Workout
+
+KINDS = {"meal": Meal, "workout": Workout, "goal": Goal, "profile": Profile}
+
+
+def entry(instance, op="save"):
+    """Dòng ChangeLog (chưa lưu) cho 1 bản ghi vừa lưu / xoá."""
+    return ChangeLog(
+        user_id=instance.user_id,
+        kind=instance._meta.model_name,
+        object_id=instance.pk,
+        client_id=getattr(instance, "client_id", None),
+        op=op,
+    )
+
+
+def record(instance, op="save"):
+    entry(instance, op).save()
+
+
+def record_bulk(instances, op="save", batch_size=1000):
+    """Sau bulk_create / bulk_update (không phát signal)."""
+    ChangeLog.objects.bulk_create([entry(obj, op) for obj in instances], batch_size=batch_size)
+
+
+def current_version() -> int:
+    return ChangeLog.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def user_version(user_id) -> int:
+    """
+    Version mới nhất của 1 user (0 = chưa có / đã bị dọn). Đọc thẳng từ DB
+    (chỉ mục user, id) nên mọi worker thấy cùng 1 giá trị: dùng làm khoá
+    cache cho dữ liệu dựng từ bản ghi của user.
+    """
+    return ChangeLog.objects.filter(user_id=user_id).order_by("-id").values_list("id", flat=True).first() or 0
+
+
+async def auser_version(user_id) -> int:
+    return await ChangeLog.objects.filter(user_id=user_id).order_by("-id").values_list("id", flat=True).afirst() or 0
+
+
+def is_stale(since) -> bool:
+    """Các thay đổi sau `since` đã bị dọn một phần -> bên đọc phải quét lại từ đầu."""
+    oldest = ChangeLog.objects.order_by("id").values_list("id", flat=True).first()
+    return oldest is not None and since + 1 < oldest
+
+
+def iter_changes(since=0, *, user=None, kinds=None, until=None, batch_size=1000):
+    """
+    ChangeLog sau version `since` tới `until` (mặc định: version lúc gọi),
+    theo thứ tự version, đọc theo lô bằng keyset (id > version cuối).
+    """
+    until = current_version() if until is None else until
+    qs = ChangeLog.objects.filter(id__lte=until)
+    if user is not None:
+        qs = qs.filter(user=user)
+    if kinds:
+        qs = qs.filter(kind__in=kinds)
+    while True:
+        batch = list(qs.filter(id__gt=since).order_by("id")[:batch_size])
+        if not batch:
+            return
+        yield from batch
+        since = batch[-1].id
+
+
+def latest_per_row(entries):
+    """Chỉ giữ thay đổi mới nhất của mỗi bản ghi: {(kind, object_id): ChangeLog}."""
+    latest = {}
+    for e in entries:
+        latest[(e.kind, e.object_id)] = e
+    return latest
+
+
+def feed_page(user, since, limit):
+    """
+    1 trang feed của `user` sau version `since`: thay đổi mới nhất của mỗi
+    bản ghi kèm dữ liệu hiện tại (op="delete" thì data = null).
+    "next" là version truyền vào lần gọi sau; "reset" = feed đã bị dọn quá
+    `since`, client tải lại toàn bộ (vd API đồng bộ với since = null).
+    """
+    version = current_version()
+    if is_stale(since):
+        return {"reset": True, "next": version, "more": False, "changes": []}
+
+    entries = list(ChangeLog.objects.filter(user=user, id__gt=since).order_by("id")[:limit + 1])
+    more = len(entries) > limit
+    entries = entries[:limit]
+    latest = latest_per_row(entries)
+    rows = _load_rows(e for e in latest.values() if e.op == "save")
+
+    return {
+        "reset": False,
+        "next": entries[-1].id if more else max(version, since),
+        "more": more,
+        "changes": [
+            {
+                "version": e.id,
+                "kind": e.kind,
+                "id": e.object_id,
+                "client_id": str(e.client_id) if e.client_id else None,
+                "op": e.op,
+                "at": e.created_at.isoformat(),
+                "data": rows.get((e.kind, e.object_id)),
+            }
+            for e in sorted(latest.values(), key=lambda e: e.id)
+        ],
+    }
+
+
+def _load_rows(entries):
+    # mỗi loại 1 truy vấn; bản ghi đã bị xoá sau đó -> không có data
+    ids = {}
+    for e in entries:
+        ids.setdefault(e.kind, []).append(e.object_id)
+    rows = {}
+    for kind, pks in ids.items():
+        qs = KINDS[kind].objects.all()
+        if kind == "meal":
+            qs = qs.select_related("food")
+        to_json = SERIALIZERS.get(kind, _model_json)
+        for pk, obj in qs.in_bulk(pks).items():
+            rows[(kind, pk)] = to_json(obj)
+    return rows
+
+
+# ================== dữ liệu bản ghi (feed + API đồng bộ) ==================
+def meal_json(m):
+    return {
+        "client_id": str(m.client_id),
+        "id": m.pk,
+        "date": m.date.isoformat(),
+        "meal_type": m.meal_type,
+        "food_id": m.food_id,
+        "food": m.food.name,
+        "portion": m.portion,
+        "quantity_gram": m.quantity_gram,
+        "calories_in": m.calories_in,
+        "updated_at": m.updated_at.isoformat(),
+    }
+
+
+def workout_json(w):
+    return {
+        "client_id": str(w.client_id),
+        "id": w.pk,
+        "date": w.date.isoformat(),
+        "type": w.type,
+        "duration_min": w.duration_min,
+        "distance_km": w.distance_km,
+        "steps": w.steps,
+        "note": w.note,
+        "calories_out": w.calories_out,
+        "updated_at": w.updated_at.isoformat(),
+    }
+
+
+def _model_json(obj):
+    return model_to_dict(obj, exclude=["user"])
+
+
+SERIALIZERS = {"meal": meal_json, "workout": workout_json}
@@ -0,0 +1,67 @@
+"""
+Gọi ứng dụng ASGI (ASGIHandler thật) trong cùng tiến trình cho các lệnh
+bench_*: như _wsgi.py nhưng theo giao thức ASGI, nhiều request chạy xen kẽ
+trên một event loop.
+"""
+import asyncio
+import time
+
+
+async def timed_request(app, method, path, body=b"", headers=None, cookie=""):
+    """
+    Gửi 1 request HTTP tới `app`, đọc response theo từng message.
+    Trả về (status code, time-to-first-byte ms, tổng thời gian ms).
+    """
+    path, _, query = path.partition("?")
+    raw_headers = [(b"host", b"127.0.0.1")]
+    if body:
+        raw_headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if cookie:
+        raw_headers.append((b"cookie", cookie.encode()))
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode(), value.encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 80),
+    }
+
+    finished = asyncio.Event()
+    body_sent = False
+    status = []
+    ttfb = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # client giữ kết nối tới khi nhận đủ response
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal ttfb
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif message["type"] == "http.response.body":
+            if message.get("body") and ttfb is None:
+                ttfb = (time.perf_counter() - t0) * 1000
+            if not message.get("more_body"):
+                finished.set()
+
+    t0 = time.perf_counter()
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    total = (time.perf_counter() - t0) * 1000
+    return status[0], ttfb if ttfb is not None else total, total
@@ -0,0 +1,69 @@
+"""
+Gọi view qua WSGIHandler thật (không qua test Client) cho các lệnh bench_*:
+signal request_started/request_finished -> close_old_connections chạy y như
+khi deploy, nên đo được cả chi phí kết nối DB.
+"""
+import io
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.utils.module_loading import import_string
+
+
+def login_cookie(user) -> str:
+    """Cookie phiên đã đăng nhập của `user` (ghi session như django.contrib.auth.login)."""
+    store = import_string(settings.SESSION_ENGINE + ".SessionStore")()
+    store[SESSION_KEY] = str(user.pk)
+    store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    store.save()
+    return f"{settings.SESSION_COOKIE_NAME}={store.session_key}"
+
+
+def timed_get(handler, path, cookie=""):
+    """GET `path`, đọc hết body. Trả về (status code, thời gian ms)."""
+    path, _, query = path.partition("?")
+    environ = {"PATH_INFO": path, "QUERY_STRING": query, "HTTP_COOKIE": cookie}
+    setup_testing_defaults(environ)
+    status = []
+    t0 = time.perf_counter()
+    response = handler(environ, lambda s, headers: status.append(s))
+    try:
+        b"".join(response)
+    finally:
+        response.close()  # -> request_finished
+    return int(status[0].split()[0]), (time.perf_counter() - t0) * 1000
+
+
+def timed_post(handler, path, body, headers=None, cookie=""):
+    """
+    POST `body` (bytes) tới `path`, đọc response theo từng chunk như client thật.
+    Trả về (status code, time-to-first-byte ms, tổng thời gian ms, body).
+    """
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "PATH_INFO": path,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "HTTP_COOKIE": cookie,
+    }
+    for name, value in (headers or {}).items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+    setup_testing_defaults(environ)
+    status = []
+    chunks = []
+    ttfb = None
+    t0 = time.perf_counter()
+    response = handler(environ, lambda s, h: status.append(s))
+    try:
+        for chunk in response:
+            if chunk and ttfb is None:
+                ttfb = (time.perf_counter() - t0) * 1000
+            chunks.append(chunk)
+    finally:
+        response.close()
+    total = (time.perf_counter() - t0) * 1000
+    return int(status[0].split()[0]), ttfb if ttfb is not None else total, total, b"".join(chunks)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+
+from chatbot.backends import DEFAULT_BACKENDS, ChatBackend, get_backends
+
+from ._wsgi import login_cookie, timed_get, timed_post
+
+User = get_user_model()
+
+ENDPOINTS = ("chat", "summary")
+
+
+class SlowBackend(ChatBackend):
+    """
+    Giả lập backend gọi dịch vụ ngoài (LLM, API...) mất `delay` giây rồi
+    nhường cho backend kế tiếp. Bản sync chặn thread, bản async chỉ chờ.
+    """
+
+    name = "slow"
+    delay = 0.0
+
+    def reply(self, message, *, intent, known=None):
+        time.sleep(self.delay)
+        return None
+
+    async def areply(self, message, *, intent, known=None):
+        await asyncio.sleep(self.delay)
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "So sánh thông lượng /api/chat/ và /reports/api/summary/ khi chạy WSGI (view sync, "
+        "N luồng như gunicorn gthread) và ASGI (view async, N request cùng lúc trên 1 event "
+        "loop như uvicorn). Mỗi chế độ chạy trong 1 tiến trình con riêng."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=("wsgi", "asgi"), help="Chỉ chạy 1 chế độ, trong tiến trình này")
+        parser.add_argument("--requests", type=int, default=200, help="Số request mỗi endpoint")
+        parser.add_argument("--threads", type=int, default=8, help="WSGI: số luồng xử lý")
+        parser.add_argument("--concurrency", type=int, default=64, help="ASGI: số request đồng thời")
+        parser.add_argument("--backend-delay-ms", type=float, default=0,
+                            help="Thêm 1 backend chat giả lập chờ dịch vụ ngoài (ms)")
+        parser.add_argument("--endpoint", action="append", dest="endpoints", choices=ENDPOINTS)
+        parser.add_argument("--user", default="bench_load_0", help="User đăng nhập khi gọi API")
+
+    def handle(self, *args, **opts):
+        if not opts["mode"]:
+            # ASYNC_VIEWS được đọc lúc nạp URLconf -> mỗi chế độ 1 tiến trình
+            self.stdout.write(f"{'chế độ':<8}{'endpoint':<10}{'req':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}  lỗi")
+            for mode in ("wsgi", "asgi"):
+                env = dict(os.environ, ASYNC_VIEWS=str(mode == "asgi"))
+                subprocess.run([sys.executable, sys.argv[0], *sys.argv[1:], "--mode", mode], env=env, check=True)
+            return
+
+        if settings.ASYNC_VIEWS != (opts["mode"] == "asgi"):
+            raise CommandError(f"--mode {opts['mode']} cần ASYNC_VIEWS={opts['mode'] == 'asgi'}")
+        try:
+            cookie = login_cookie(User.objects.get(username=opts["user"]))
+        except User.DoesNotExist:
+            raise CommandError(f"Không có user {opts['user']!r} (tạo bằng bench_concurrency)")
+        connections.close_all()
+
+        backends = list(DEFAULT_BACKENDS)
+        if opts["backend_delay_ms"]:
+            SlowBackend.delay = opts["backend_delay_ms"] / 1000
+            backends.insert(0, f"{__name__}.SlowBackend")
+
+        # bỏ giới hạn tần suất để đo được nhiều request liên tiếp
+        with override_settings(CHAT_RATE_PER_MINUTE=1e9, CHAT_RATE_BURST=1e9, CHATBOT_BACKENDS=backends):
+            get_backends.cache_clear()
+            for endpoint in opts["endpoints"] or ENDPOINTS:
+                requests = [self._request(endpoint, i) for i in range(opts["requests"])]
+                if opts["mode"] == "wsgi":
+                    samples, errors, elapsed = self._run_wsgi(requests, cookie, opts["threads"])
+                else:
+                    samples, errors, elapsed = asyncio.run(self._run_asgi(requests, cookie, opts["concurrency"]))
+                self._report(opts["mode"], endpoint, samples, errors, elapsed)
+        get_backends.cache_clear()
+
+    def _request(self, endpoint, i):
+        if endpoint == "summary":
+            return "GET", "/reports/api/summary/", b""
+        # có số liệu -> không trúng cache câu trả lời, lần nào cũng đi tới backend
+        message = f"BMI {50 + i % 50}kg 170cm"
+        return "POST", "/api/chat/", json.dumps({"message": message}).encode()
+
+    def _run_wsgi(self, requests, cookie, threads):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        handler = WSGIHandler()
+
+        def call(req):
+            method, path, body = req
+            if method == "GET":
+                status, ms = timed_get(handler, path, cookie)
+            else:
+                status, _, ms, _ = timed_post(handler, path, body, {"Accept": "application/json"}, cookie)
+            return status, ms
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(call, requests))
+        return self._collect(results, time.perf_counter() - started)
+
+    async def _run_asgi(self, requests, cookie, concurrency):
+        from django.core.handlers.asgi import ASGIHandler
+
+        from ._asgi import timed_request
+
+        app = ASGIHandler()
+        gate = asyncio.Semaphore(concurrency)
+
+        async def call(req):
+            method, path, body = req
+            async with gate:
+                status, _, ms = await timed_request(app, method, path, body, {"Accept": "application/json"}, cookie)
+            return status, ms
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(call(r) for r in requests))
+        return self._collect(results, time.perf_counter() - started)
+
+    def _collect(self, results, elapsed):
+        samples = [ms for status, ms in results if status < 400]
+        errors = Counter(f"HTTP {status}" for status, _ in results if status >= 400)
+        return samples, errors, elapsed
+
+    def _report(self, mode, endpoint, samples, errors, elapsed):
+        samples.sort()
+        p50 = statistics.median(samples) if samples else 0
+        p95 = samples[max(int(len(samples) * 0.95) - 1, 0)] if samples else 0
+        err = ", ".join(f"{n}× {msg}" for msg, n in errors.items()) or "-"
+        self.stdout.write(
+            f"{mode:<8}{endpoint:<10}{len(samples):>6}{len(samples) / elapsed:>9.1f}{p50:>9.1f}{p95:>9.1f}  {err}"
+        )
+        self.stdout.flush()
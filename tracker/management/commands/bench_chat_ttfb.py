@@ -0,0 +1,72 @@
+import json
+import statistics
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from chatbot import reply_cache
+
+from ._wsgi import login_cookie, timed_post
+
+User = get_user_model()
+
+# câu trả lời nhiều đoạn (FAQ), phép tính, câu theo dữ liệu cá nhân
+DEFAULT_MESSAGES = [
+    "hệ số vận động là gì",
+    "BMI bao nhiêu là bình thường",
+    "TDEE 67kg 172cm 21 tuổi nam vận động vừa",
+    "hôm nay tôi ăn bao nhiêu calo",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo time-to-first-byte và tổng thời gian của /api/chat/: trả JSON (chờ đủ câu trả lời) "
+        "so với stream Server-Sent Events (Accept: text/event-stream)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=50)
+        parser.add_argument("--user", default="", help="Gửi như user đã đăng nhập (trả lời theo dữ liệu cá nhân)")
+        parser.add_argument("--message", action="append", dest="messages", help="Tin nhắn đo (lặp lại được)")
+        parser.add_argument("--cold", action="store_true", help="Xoá cache câu trả lời trước mỗi lượt")
+
+    def handle(self, *args, **opts):
+        cookie = login_cookie(User.objects.get(username=opts["user"])) if opts["user"] else ""
+        handler = WSGIHandler()
+        modes = {
+            "json": {"Accept": "application/json"},
+            "stream": {"Accept": "text/event-stream"},
+        }
+
+        # bỏ giới hạn tần suất để đo được nhiều lượt liên tiếp
+        with override_settings(CHAT_RATE_PER_MINUTE=1e9, CHAT_RATE_BURST=1e9):
+            self.stdout.write(
+                f"{'Tin nhắn':<44}{'kiểu':<8}{'TTFB p50':>10}{'TTFB p95':>10}{'tổng p50':>10}{'chunk':>7}"
+            )
+            for message in opts["messages"] or DEFAULT_MESSAGES:
+                body = json.dumps({"message": message}).encode()
+                for mode, headers in modes.items():
+                    ttfb, total, chunks = [], [], 0
+                    for _ in range(opts["rounds"]):
+                        if opts["cold"]:
+                            reply_cache.clear()
+                        status, first, elapsed, content = timed_post(handler, "/api/chat/", body, headers, cookie)
+                        if status != 200:
+                            self.stderr.write(f"{message!r} ({mode}): HTTP {status}")
+                            break
+                        ttfb.append(first)
+                        total.append(elapsed)
+                        chunks = content.count(b"event: chunk") if mode == "stream" else 1
+                    if not ttfb:
+                        continue
+                    self.stdout.write(
+                        f"{message[:42]:<44}{mode:<8}{statistics.median(ttfb):>10.2f}"
+                        f"{self._p95(ttfb):>10.2f}{statistics.median(total):>10.2f}{chunks:>7}"
+                    )
+
+    def _p95(self, samples):
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
@@ -0,0 +1,136 @@
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from tracker.models import Food, Meal, Workout
+from tracker.services import rebuild_user_activity
+
+from ._wsgi import login_cookie, timed_get
+
+User = get_user_model()
+
+DEFAULT_PATHS = ["/", "/tracker/meals/", "/tracker/workouts/", "/goals/", "/reports/", "/health/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thông lượng các trang chính khi nhiều luồng cùng gọi (kèm một tỉ lệ "
+        "ghi bữa ăn). Chạy lần lượt với DB_ENGINE=sqlite và PostgreSQL để so sánh."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--write-pct", type=float, default=10.0,
+                            help="%% thao tác là ghi (tạo rồi xoá 1 bữa ăn qua ORM)")
+        parser.add_argument("--users", type=int, default=8, help="Số user mẫu (mỗi luồng 1 user, xoay vòng)")
+        parser.add_argument("--path", action="append", dest="paths", help="URL đo (lặp lại được)")
+
+    def handle(self, *args, **opts):
+        paths = opts["paths"] or DEFAULT_PATHS
+        users = [self._bench_user(i) for i in range(opts["users"])]
+        cookies = [login_cookie(u) for u in users]
+        connections.close_all()  # mỗi luồng tự mở kết nối riêng
+
+        db = connections["default"]
+        self.stdout.write(
+            f"DB: {db.vendor} ({'có' if 'replica' in connections.databases else 'không'} replica) – "
+            f"{opts['threads']} luồng × {opts['seconds']:g}s, ghi {opts['write_pct']:g}%"
+        )
+
+        handler = WSGIHandler()
+        deadline = time.perf_counter() + opts["seconds"]
+        lock = threading.Lock()
+        samples, writes, errors = [], [], Counter()
+
+        def worker(n):
+            rng = random.Random(n)
+            user, cookie = users[n % len(users)], cookies[n % len(cookies)]
+            local, local_w, local_err = [], [], Counter()
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        if rng.random() * 100 < opts["write_pct"]:
+                            local_w.append(self._write(user, rng))
+                            continue
+                        status, ms = timed_get(handler, rng.choice(paths), cookie)
+                        if status >= 400:
+                            local_err[f"HTTP {status}"] += 1
+                        local.append(ms)
+                    except Exception as exc:  # vd "database is locked"
+                        local_err[type(exc).__name__ + ": " + str(exc)[:60]] += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    samples.extend(local)
+                    writes.extend(local_w)
+                    errors.update(local_err)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(opts["threads"])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        self._report("Đọc (GET)", samples, elapsed)
+        self._report("Ghi (ORM)", writes, elapsed)
+        if errors:
+            self.stdout.write(self.style.WARNING("Lỗi:"))
+            for msg, n in errors.most_common():
+                self.stdout.write(f"  {n:>5} × {msg}")
+        else:
+            self.stdout.write(self.style.SUCCESS("Không có lỗi."))
+
+    def _report(self, label, samples, elapsed):
+        if not samples:
+            return
+        samples.sort()
+        p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"{label:<10} {len(samples):>6} thao tác, {len(samples) / elapsed:8.1f}/s, "
+            f"p50 {statistics.median(samples):.2f} ms, p95 {p95:.2f} ms, max {samples[-1]:.2f} ms"
+        )
+
+    def _write(self, user, rng):
+        # đi qua signal như request thật (rollup, goal, chỉ mục tìm kiếm)
+        t0 = time.perf_counter()
+        meal = Meal.objects.create(
+            user=user, food=rng.choice(self._foods), meal_type="snack",
+            date=timezone.localdate(), quantity_gram=100, calories_in=rng.randint(100, 500),
+        )
+        meal.delete()
+        return (time.perf_counter() - t0) * 1000
+
+    def _bench_user(self, i):
+        user, created = User.objects.get_or_create(username=f"bench_load_{i}")
+        if not hasattr(self, "_foods"):
+            self._foods = [
+                Food.objects.get_or_create(name=name, defaults={"calories_per_100g": kcal})[0]
+                for name, kcal in [("Cơm trắng", 130), ("Ức gà", 165), ("Chuối", 89)]
+            ]
+        if created:
+            # ~3 tháng nhật ký cho mỗi user để các trang báo cáo có dữ liệu
+            today = timezone.localdate()
+            Meal.objects.bulk_create([
+                Meal(user=user, food=self._foods[d % 3], meal_type="lunch", date=today - timedelta(days=d),
+                     quantity_gram=200, calories_in=400 + d % 7 * 30)
+                for d in range(90)
+            ])
+            Workout.objects.bulk_create([
+                Workout(user=user, type="run", date=today - timedelta(days=d), duration_min=30,
+                        calories_out=250)
+                for d in range(0, 90, 2)
+            ])
+            rebuild_user_activity([user.pk])
+        return user
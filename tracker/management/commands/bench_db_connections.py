@@ -0,0 +1,71 @@
+import statistics
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from ._wsgi import login_cookie, timed_get
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "So sánh chi phí kết nối DB mỗi request: mở/đóng mỗi request (CONN_MAX_AGE=0) "
+        "với cấu hình hiện tại (kết nối bền)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/", help="URL gọi thử (đăng nhập sẵn bằng --user)")
+        parser.add_argument("--user", default="bench_db", help="Username dùng để đo (tự tạo nếu chưa có)")
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **opts):
+        handler = WSGIHandler()
+        user, _ = User.objects.get_or_create(username=opts["user"])
+        cookie = login_cookie(user)
+
+        db = connections["default"]
+        configured = db.settings_dict["CONN_MAX_AGE"]
+        self.stdout.write(
+            f"DB: {db.vendor} – CONN_MAX_AGE={configured}, "
+            f"CONN_HEALTH_CHECKS={db.settings_dict['CONN_HEALTH_CHECKS']}"
+        )
+
+        modes = [("Mở/đóng mỗi request", 0), ("Kết nối bền", configured if configured != 0 else 600)]
+
+        for label, max_age in modes:
+            db.close()
+            db.settings_dict["CONN_MAX_AGE"] = max_age
+            try:
+                samples, opened = self._run(handler, opts["path"], cookie, opts["requests"])
+            finally:
+                db.close()
+                db.settings_dict["CONN_MAX_AGE"] = configured
+
+            samples.sort()
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            self.stdout.write(
+                f"{label:<22} {len(samples)} request: kết nối mới {opened}, "
+                f"trung bình {statistics.mean(samples):.2f} ms, p50 {statistics.median(samples):.2f} ms, "
+                f"p95 {p95:.2f} ms"
+            )
+
+    def _run(self, handler, path, cookie, n):
+        opened = 0
+
+        def on_connect(sender, connection, **kwargs):
+            nonlocal opened
+            if connection.alias == "default":
+                opened += 1
+
+        connection_created.connect(on_connect)
+        samples = []
+        try:
+            for _ in range(n):
+                samples.append(timed_get(handler, path, cookie)[1])
+        finally:
+            connection_created.disconnect(on_connect)
+        return samples, opened
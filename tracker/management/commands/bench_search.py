@@ -0,0 +1,95 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracker import changes, search
+from tracker.models import Food, Meal, Workout
+from tracker.services import rebuild_user_activity
+
+User = get_user_model()
+
+FOODS = ["Phở bò", "Bún chả", "Cơm tấm", "Bánh mì", "Gỏi cuốn", "Cháo gà", "Đậu hũ sốt cà", "Rau muống xào"]
+NOTES = ["chạy ven hồ", "đạp xe buổi sáng", "gym ngực vai", "yoga thư giãn", "đi bộ công viên", ""]
+QUERIES = ["phở", "pho bo", "bun", "dau hu", "chay ho", "yoga", "com tam", "ga", "rau"]
+
+
+class Command(BaseCommand):
+    help = "Đo thời gian tìm kiếm (tracker.search) trên dữ liệu mẫu lớn"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="bench_search", help="Username dùng để đo (tự tạo nếu chưa có)")
+        parser.add_argument("--seed", type=int, default=0, help="Sinh thêm N bữa ăn (+N/4 buổi tập) cho user")
+        parser.add_argument("--rounds", type=int, default=50)
+        parser.add_argument("--budget-ms", type=float, default=50.0, help="Ngưỡng p95 cho phép")
+
+    def handle(self, *args, **opts):
+        user, _ = User.objects.get_or_create(username=opts["user"])
+        if opts["seed"]:
+            self._seed(user, opts["seed"])
+
+        n_meals = Meal.objects.filter(user=user).count()
+        n_workouts = Workout.objects.filter(user=user).count()
+        self.stdout.write(
+            f"Backend: {search.backend_name()} – {n_meals} bữa ăn, {n_workouts} buổi tập, "
+            f"{Food.objects.count()} món"
+        )
+
+        t0 = time.perf_counter()
+        search.search(user, QUERIES[0])
+        self.stdout.write(f"Lần đầu (gồm dựng chỉ mục): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+        samples = []
+        for _ in range(opts["rounds"]):
+            for q in QUERIES:
+                t0 = time.perf_counter()
+                search.search(user, q)
+                samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        p50 = statistics.median(samples)
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        self.stdout.write(f"{len(samples)} truy vấn: p50 {p50:.2f} ms, p95 {p95:.2f} ms, max {samples[-1]:.2f} ms")
+
+        if p95 > opts["budget_ms"]:
+            raise CommandError(f"p95 {p95:.1f} ms vượt ngưỡng {opts['budget_ms']:.0f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Đạt ngưỡng {opts['budget_ms']:.0f} ms."))
+
+    def _seed(self, user, n):
+        rng = random.Random(42)
+        foods = [Food.objects.get_or_create(name=name, defaults={"calories_per_100g": rng.randint(80, 400)})[0]
+                 for name in FOODS]
+        today = timezone.localdate()
+        meal_types = [k for k, _ in Meal.MEAL_CHOICES]
+        workout_types = [k for k, _ in Workout.TYPE_CHOICES]
+
+        # bulk_create không phát signal -> cập nhật rollup + chỉ mục thủ công bên dưới
+        Meal.objects.bulk_create(
+            [
+                Meal(
+                    user=user, food=rng.choice(foods), meal_type=rng.choice(meal_types),
+                    date=today - timedelta(days=rng.randint(0, 365)),
+                    quantity_gram=rng.choice([100, 150, 200, 250]), calories_in=rng.randint(100, 800),
+                )
+                for _ in range(n)
+            ],
+            batch_size=2000,
+        )
+        Workout.objects.bulk_create(
+            [
+                Workout(
+                    user=user, type=rng.choice(workout_types), note=rng.choice(NOTES),
+                    date=today - timedelta(days=rng.randint(0, 365)),
+                    duration_min=rng.randint(15, 90),
+                )
+                for _ in range(n // 4)
+            ],
+            batch_size=2000,
+        )
+        rebuild_user_activity([user.pk])
+        # bulk_create không phát signal -> ghi 1 dòng change feed để chỉ mục cũ hết hiệu lực
+        changes.record(Meal.objects.filter(user=user).latest("pk"))
+        self.stdout.write(f"Đã sinh {n} bữa ăn, {n // 4} buổi tập.")
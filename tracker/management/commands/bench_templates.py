@@ -0,0 +1,77 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template import Engine, RequestContext, engines
+from django.test import RequestFactory, override_settings
+
+User = get_user_model()
+
+# (template, context) – các trang tĩnh / layout nặng nhất
+PAGES = [
+    ("dashboard.html", {"services": ["BMI", "BMR", "TDEE", "DINH DƯỠNG", "TẬP LUYỆN", "MỤC TIÊU"]}),
+    ("pages/about.html", {}),
+    ("pages/services.html", {}),
+    ("tracker/meals_list.html", {"items": [], "summary": {}}),
+    ("tracker/workouts_list.html", {"items": [], "summary": {}}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thời gian render mỗi trang: trước (parse lại template mỗi lần, không cache "
+        "fragment) và sau (cached loader + {% cache %} đã ấm)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=200)
+        parser.add_argument("--user", default="", help="Render như user này (mặc định: khách)")
+
+    def handle(self, *args, **opts):
+        user = User.objects.get(username=opts["user"]) if opts["user"] else AnonymousUser()
+        cached_engine = engines["django"].engine
+        # "trước": cùng cấu hình nhưng loader không cache -> mỗi lần render đều đọc + parse file
+        plain_engine = Engine(
+            dirs=cached_engine.dirs,
+            context_processors=cached_engine.context_processors,
+            loaders=cached_engine.loaders[0][1],
+            libraries=cached_engine.libraries,
+            builtins=cached_engine.builtins,
+            debug=cached_engine.debug,
+            string_if_invalid=cached_engine.string_if_invalid,
+        )
+        fragments = caches["template_fragments"]
+
+        # DEBUG mặc định tắt cache fragment -> đo với thời hạn của production
+        with override_settings(FRAGMENT_CACHE_SECONDS=86400):
+            self.stdout.write(f"{'Trang':<28}{'trước (ms)':>12}{'sau (ms)':>12}{'nhanh hơn':>12}")
+            for name, ctx in PAGES:
+                before = self._bench(opts["rounds"], lambda: (
+                    fragments.clear(),
+                    plain_engine.get_template(name).render(RequestContext(self._request(user), ctx)),
+                ))
+                cached_engine.get_template(name).render(RequestContext(self._request(user), ctx))  # làm ấm
+                after = self._bench(opts["rounds"], lambda: (
+                    cached_engine.get_template(name).render(RequestContext(self._request(user), ctx)),
+                ))
+                self.stdout.write(f"{name:<28}{before:>12.3f}{after:>12.3f}{before / after:>11.1f}x")
+
+    def _request(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def _bench(self, rounds, fn):
+        samples = []
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,62 @@
+import io
+from pathlib import Path
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from healthmanager import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Sinh biến thể AVIF / WebP / thu nhỏ cho ảnh trong static/img và báo dung lượng "
+        "trước / sau. collectstatic tự chạy bước này (healthmanager.storage); lệnh này "
+        "để xem trước hoặc ghi biến thể ra thư mục khác (--output)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="", help="Ghi các file sinh ra vào thư mục này")
+
+    def handle(self, *args, **opts):
+        if images.Image is None:
+            raise CommandError("Cần Pillow để tối ưu ảnh (pip install pillow).")
+        self.stdout.write(f"Định dạng hỗ trợ: {', '.join(images.formats_available()) or '(không có)'}")
+
+        output = Path(opts["output"]) if opts["output"] else None
+        seen = set()
+        total_before = total_after = 0
+        for finder in finders.get_finders():
+            for name, storage in finder.list([]):
+                name = name.replace("\\", "/")
+                if name in seen or not images.is_source(name):
+                    continue
+                seen.add(name)
+                with storage.open(name) as fh:
+                    data = fh.read()
+                variants = images.build_variants(name, data)
+                best = self._best_full_width(name, data, variants)
+                total_before += len(data)
+                total_after += best
+                self.stdout.write(
+                    f"{name:<24}{len(data) / 1024:>9.1f} KB -> {best / 1024:>8.1f} KB "
+                    f"({len(variants)} file)"
+                )
+                if output is not None:
+                    for variant, content in variants:
+                        target = output / variant
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        target.write_bytes(content)
+
+        if total_before:
+            self.stdout.write(self.style.SUCCESS(
+                f"Tổng ảnh gốc {total_before / 1024:.1f} KB -> {total_after / 1024:.1f} KB "
+                f"(bản nhỏ nhất ở bề rộng gốc, giảm {100 - total_after * 100 / total_before:.0f}%)"
+            ))
+
+    def _best_full_width(self, name, data, variants):
+        # bản nhẹ nhất trình duyệt tải ở bề rộng gốc: AVIF / WebP / ảnh gốc nén lại
+        sizes = dict((variant, len(content)) for variant, content in variants)
+        width = images.Image.open(io.BytesIO(data)).width
+        candidates = [sizes.get(name, len(data))]
+        candidates += [sizes[v] for v in (images.variant_name(name, width, f) for f in images.FORMATS) if v in sizes]
+        return min(candidates)
@@ -0,0 +1,144 @@
+import gzip
+import os
+from html.parser import HTMLParser
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+try:
+    import brotli
+except ImportError:  # không có Brotli: chỉ báo gzip
+    brotli = None
+
+User = get_user_model()
+
+
+class _Resources(HTMLParser):
+    """Gom tài nguyên trang tải: CSS / JS chặn render, ảnh, phần tải khi mở chat."""
+
+    def __init__(self, image_width):
+        super().__init__()
+        self.image_width = image_width
+        self.found = []          # (nhóm, url)
+        self.inline_css = 0
+        self._in_style = False
+        self._noscript = False   # <noscript>: trình duyệt có JS không tải
+        self._picture = None     # srcset của <source> đầu tiên trong <picture>
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "noscript":
+            self._noscript = True
+        if self._noscript:
+            return
+        if tag == "link" and a.get("rel") == "stylesheet":
+            group = "css (không chặn)" if a.get("media") == "print" else "css chặn render"
+            self.found.append((group, a["href"]))
+        elif tag == "script" and a.get("src"):
+            self.found.append(("js defer" if "defer" in a or "async" in a else "js chặn render", a["src"]))
+        elif tag == "style":
+            self._in_style = True
+        elif tag == "picture":
+            self._picture = ""
+        elif tag == "source" and self._picture == "":
+            self._picture = a.get("srcset", "")
+        elif tag == "img":
+            url = self._pick(self._picture or a.get("srcset") or "") or a.get("src")
+            self.found.append(("ảnh lazy" if a.get("loading") == "lazy" else "ảnh", url))
+        if a.get("data-js"):
+            self.found.append(("tải khi mở chat", a["data-js"]))
+        if a.get("data-css"):
+            self.found.append(("tải khi mở chat", a["data-css"]))
+
+    def handle_endtag(self, tag):
+        if tag == "style":
+            self._in_style = False
+        elif tag == "noscript":
+            self._noscript = False
+        elif tag == "picture":
+            self._picture = None
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.inline_css += len(data.encode())
+
+    def _pick(self, srcset):
+        # ứng viên nhỏ nhất >= bề rộng hiển thị giả định (giống cách trình duyệt chọn)
+        candidates = []
+        for part in filter(None, (p.strip() for p in srcset.split(","))):
+            url, _, width = part.partition(" ")
+            candidates.append((int(width.rstrip("w") or 0), url))
+        if not candidates:
+            return None
+        candidates.sort()
+        return next((url for w, url in candidates if w >= self.image_width), candidates[-1][1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Báo cáo dung lượng tải trang: HTML, CSS / JS (chặn render hay không), ảnh, phần "
+        "chỉ tải khi mở chat. File tĩnh tính theo bản gốc / gzip / brotli; tài nguyên CDN chỉ liệt kê."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", default=["/", "/about/", "/services/"])
+        parser.add_argument("--user", default="", help="Đăng nhập bằng user này trước khi đo")
+        parser.add_argument("--image-width", type=int, default=960, help="Bề rộng ảnh giả định khi chọn từ srcset")
+
+    def handle(self, *args, **opts):
+        client = Client(HTTP_HOST="127.0.0.1")
+        if opts["user"]:
+            client.force_login(User.objects.get(username=opts["user"]))
+
+        for path in opts["paths"]:
+            response = client.get(path)
+            html = response.content
+            parser = _Resources(opts["image_width"])
+            parser.feed(html.decode("utf-8", "replace"))
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{path} ({response.status_code})"))
+            self._row("HTML", *self._sizes(html))
+            self.stdout.write(f"  (trong đó CSS inline: {parser.inline_css / 1024:.1f} KB)")
+
+            totals, cdn = {}, []
+            for group, url in parser.found:
+                data = self._static_bytes(url)
+                if data is None:
+                    cdn.append(f"{group}: {url}")
+                    continue
+                row = totals.setdefault(group, [0, 0, 0, 0])
+                for i, size in enumerate((1,) + self._sizes(data)):
+                    row[i] += size
+            initial = list(self._sizes(html))
+            for group, (count, raw, gz, br) in totals.items():
+                self._row(f"{group} ({count})", raw, gz, br)
+                if group != "tải khi mở chat" and group != "ảnh lazy":
+                    initial = [initial[0] + raw, initial[1] + gz, initial[2] + br]
+            self._row("=> tải ban đầu (trừ CDN)", *initial)
+            for line in cdn:
+                self.stdout.write(f"  CDN  {line}")
+
+    def _row(self, label, raw, gz, br):
+        brotli_col = f"{br / 1024:>8.1f} KB br" if brotli else ""
+        self.stdout.write(f"  {label:<28}{raw / 1024:>8.1f} KB{gz / 1024:>8.1f} KB gz{brotli_col}")
+
+    def _sizes(self, data):
+        gz = len(gzip.compress(data, 9))
+        br = len(brotli.compress(data)) if brotli else gz
+        # ảnh đã nén sẵn: WhiteNoise không gửi bản nén
+        if len(data) and gz >= len(data) * 0.95:
+            return len(data), len(data), len(data)
+        return len(data), gz, br
+
+    def _static_bytes(self, url):
+        if not url or not url.startswith(settings.STATIC_URL):
+            return None
+        name = url[len(settings.STATIC_URL):]
+        path = finders.find(name) or os.path.join(settings.STATIC_ROOT, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as fh:
+            return fh.read()
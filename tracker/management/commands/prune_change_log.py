@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tracker.services import prune_change_log
+
+
+class Command(BaseCommand):
+    help = "Xoá lịch sử change feed (kể cả dấu xoá) cũ hơn CHANGE_LOG_DAYS (theo lô)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Mặc định CHANGE_LOG_DAYS")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        n = prune_change_log(days=opts["days"], batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Đã xoá {n} dòng change feed cũ."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from tracker import changes
+from tracker.services import rebuild_user_activity
+
+
+class Command(BaseCommand):
+    help = "Dựng lại bảng tổng hợp hoạt động (số bữa ăn / buổi tập) cho trang quản trị user"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since-version", type=int, default=None,
+            help="Chỉ dựng lại user có Meal / Workout đổi sau version này của change feed",
+        )
+
+    def handle(self, *args, **opts):
+        since = opts["since_version"]
+        version = changes.current_version()
+        if since is None or changes.is_stale(since):
+            n = rebuild_user_activity()
+        else:
+            entries = changes.iter_changes(since, kinds=("meal", "workout"), until=version)
+            n = rebuild_user_activity({e.user_id for e in entries})
+        self.stdout.write(self.style.SUCCESS(f"Đã dựng lại số liệu hoạt động cho {n} user."))
+        self.stdout.write(f"Lần sau: --since-version {version}")
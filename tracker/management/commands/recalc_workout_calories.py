@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from tracker.services import recalc_workout_calories
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Tính lại calo tiêu hao của Workout theo cân nặng tại ngày tập (lịch sử chỉ số)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Chỉ tính cho username này")
+
+    def handle(self, *args, **opts):
+        users = User.objects.all()
+        if opts.get("user"):
+            users = users.filter(username=opts["user"])
+
+        total = 0
+        for user in users.iterator():
+            total += recalc_workout_calories(user)
+
+        self.stdout.write(self.style.SUCCESS(f"Đã cập nhật calo cho {total} buổi tập."))
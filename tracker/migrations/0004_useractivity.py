@@ -0,0 +1,61 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:10
+
+from datetime import datetime, time
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.utils import timezone
+
+
+def seed_activity(apps, schema_editor):
+    # 1 dòng rollup cho mỗi user hiện có, đếm bằng GROUP BY;
+    # lần hoạt động gần nhất = ngày nhật ký mới nhất
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Meal = apps.get_model("tracker", "Meal")
+    Workout = apps.get_model("tracker", "Workout")
+    UserActivity = apps.get_model("tracker", "UserActivity")
+    tz = timezone.get_current_timezone()
+
+    def grouped(model):
+        rows = model.objects.values_list("user_id").annotate(n=Count("id"), last=Max("date")).order_by()
+        return {uid: (n, last) for uid, n, last in rows}
+
+    meals, workouts = grouped(Meal), grouped(Workout)
+    rows = []
+    for uid in User.objects.values_list("pk", flat=True).iterator():
+        n_meals, last_meal = meals.get(uid, (0, None))
+        n_workouts, last_workout = workouts.get(uid, (0, None))
+        last_day = max(filter(None, (last_meal, last_workout)), default=None)
+        rows.append(UserActivity(
+            user_id=uid,
+            meal_count=n_meals,
+            workout_count=n_workouts,
+            last_activity_at=datetime.combine(last_day, time.min, tzinfo=tz) if last_day else None,
+        ))
+    UserActivity.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tracker', '0003_food_meal_quantity_gram_alter_meal_calories_in_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivity',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('meal_count', models.PositiveIntegerField(default=0)),
+                ('workout_count', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_activity_at'], name='tracker_act_last_idx'), models.Index(fields=['meal_count'], name='tracker_act_meals_idx'), models.Index(fields=['workout_count'], name='tracker_act_workouts_idx')],
+            },
+        ),
+        migrations.RunPython(seed_activity, migrations.RunPython.noop),
+    ]
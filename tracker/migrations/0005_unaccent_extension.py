@@ -0,0 +1,24 @@
+from django.db import DatabaseError, migrations, transaction
+
+
+def create_unaccent(apps, schema_editor):
+    # Tìm kiếm không dấu trên PostgreSQL (tracker.search); thiếu quyền tạo
+    # extension thì bỏ qua – tìm kiếm tự dùng chỉ mục trong process.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    except DatabaseError:
+        pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_useractivity'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_unaccent, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.0.6 on 2026-10-19 15:40
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fill_client_ids(apps, schema_editor):
+    # AddField với default=uuid4 chỉ gọi default 1 lần -> mọi dòng cũ trùng
+    # client_id; sinh riêng cho từng dòng trước khi thêm ràng buộc unique
+    for name in ("Meal", "Workout"):
+        model = apps.get_model("tracker", name)
+        rows = list(model.objects.only("id"))
+        for row in rows:
+            row.client_id = uuid.uuid4()
+        model.objects.bulk_update(rows, ["client_id"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_unaccent_extension'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meal',
+            name='client_id',
+            field=models.UUIDField(null=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='client_id',
+            field=models.UUIDField(null=True, editable=False),
+        ),
+        migrations.RunPython(fill_client_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='meal',
+            name='client_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='workout',
+            name='client_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False),
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name='meal',
+            constraint=models.UniqueConstraint(fields=('user', 'client_id'), name='tracker_meal_client_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='workout',
+            constraint=models.UniqueConstraint(fields=('user', 'client_id'), name='tracker_workout_client_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['user', 'updated_at'], name='tracker_meal_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', 'updated_at'], name='tracker_workout_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_sync_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('meal', 'Bữa ăn'), ('workout', 'Buổi tập'), ('goal', 'Mục tiêu'), ('profile', 'Hồ sơ')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('client_id', models.UUIDField(blank=True, null=True)),
+                ('op', models.CharField(choices=[('save', 'Lưu'), ('delete', 'Xoá')], max_length=6)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['user', 'id'], name='tracker_change_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['created_at'], name='tracker_change_time_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='food',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
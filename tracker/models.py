@@ -1,7 +1,18 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from accounts.models import ProfileMetric
+
+
+def _energy_snapshot(instance, field):
+    """(user_id, date, kcal) của bản ghi; None nếu có trường bị defer."""
+    if instance.get_deferred_fields() & {"user_id", "date", field}:
+        return None
+    return (instance.user_id, instance.date, getattr(instance, field))
+
 
 # ============================
 #   WORKOUT (GIỮ NGUYÊN)
@@ -23,11 +34,33 @@ class Workout(models.Model):
     calories_out = models.FloatField(default=0.0)
     note = models.CharField(max_length=255, blank=True)
 
+    # đồng bộ với app mobile (tracker/sync.py): id do client sinh (bản ghi
+    # nhập trên web thì server sinh) + mốc sửa cuối cho delta
+    client_id = models.UUIDField(default=uuid.uuid4, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "client_id"], name="tracker_workout_client_uniq"),
+        ]
+        indexes = [models.Index(fields=["user", "updated_at"], name="tracker_workout_sync_idx")]
+
     def __str__(self):
         return f"{self.get_type_display()} - {self.date} - {self.duration_min} phút"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # (user, ngày, kcal) lúc load -> goals.signals cộng/trừ phần chênh lệch
+        instance._loaded_energy = _energy_snapshot(instance, "calories_out")
+        return instance
+
     def _get_weight(self) -> float:
+        """Cân nặng có hiệu lực vào ngày tập (lịch sử chỉ số), fallback hồ sơ / 70kg."""
         try:
+            point = ProfileMetric.as_of(self.user_id, self.date)
+            if point and point.weight_kg > 0:
+                return float(point.weight_kg)
             prof = self.user.profile
             w = float(prof.weight_kg or 0)
             if w > 0:
@@ -36,25 +69,30 @@ class Workout(models.Model):
             pass
         return 70.0
 
-    def _base_kcal_by_met(self) -> float:
+    def _base_kcal_by_met(self, weight=None) -> float:
         met = {"run": 9.8, "walk": 3.5, "bike": 7.5, "gym": 6.0, "yoga": 3.0}.get(self.type, 4.0)
-        weight = self._get_weight()
+        weight = weight or self._get_weight()
         minutes = float(self.duration_min or 0)
         return met * 3.5 * weight / 200.0 * minutes
 
-    def _bonus_distance_steps(self, base: float) -> float:
+    def _bonus_distance_steps(self, base: float, weight=None) -> float:
         bonus = 0.0
-        weight = self._get_weight()
+        weight = weight or self._get_weight()
         if self.type in ("run", "walk") and self.distance_km > 0:
             bonus += weight * float(self.distance_km)
         if self.steps and self.steps > 0:
             bonus += 0.05 * float(self.steps)
         return min(bonus, base * 0.3) if base > 0 else bonus
 
+    def compute_calories(self, weight=None) -> float:
+        """kcal tiêu hao; truyền sẵn weight khi tính lại hàng loạt để khỏi query."""
+        weight = weight or self._get_weight()
+        base = self._base_kcal_by_met(weight)
+        bonus = self._bonus_distance_steps(base, weight)
+        return round(base + bonus, 1)
+
     def save(self, *args, **kwargs):
-        base = self._base_kcal_by_met()
-        bonus = self._bonus_distance_steps(base)
-        self.calories_out = round(base + bonus, 1)
+        self.calories_out = self.compute_calories()
         super().save(*args, **kwargs)
 
 
@@ -64,6 +102,8 @@ class Workout(models.Model):
 class Food(models.Model):
     name = models.CharField(max_length=200, unique=True)
     calories_per_100g = models.FloatField(help_text="kcal trên 100g")
+    # phiên bản chỉ mục món ăn của tracker.search (Max + Count đọc từ DB)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.calories_per_100g} kcal/100g)"
@@ -93,15 +133,96 @@ class Meal(models.Model):
     # kcal auto tính – không cho nhập form
     calories_in = models.FloatField(default=0.0, editable=False)
 
+    client_id = models.UUIDField(default=uuid.uuid4, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "client_id"], name="tracker_meal_client_uniq"),
+        ]
+        indexes = [models.Index(fields=["user", "updated_at"], name="tracker_meal_sync_idx")]
+
     def __str__(self):
         return f"{self.get_meal_type_display()} - {self.food} - {self.calories_in} kcal"
 
-    def save(self, *args, **kwargs):
-        if self.food and self.quantity_gram:
-            self.calories_in = round(
-                self.food.calories_per_100g * (self.quantity_gram / 100.0), 1
-            )
-        else:
-            self.calories_in = 0.0
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_energy = _energy_snapshot(instance, "calories_in")
+        return instance
 
+    def compute_calories(self, food=None) -> float:
+        """kcal ăn vào; truyền sẵn food khi tính hàng loạt để khỏi query."""
+        food = food or self.food
+        if food and self.quantity_gram:
+            return round(food.calories_per_100g * (self.quantity_gram / 100.0), 1)
+        return 0.0
+
+    def save(self, *args, **kwargs):
+        self.calories_in = self.compute_calories()
         super().save(*args, **kwargs)
+
+
+# ============================
+#   ROLLUP HOẠT ĐỘNG THEO USER
+# ============================
+class UserActivity(models.Model):
+    """
+    Số liệu tổng hợp cho trang quản trị user: đếm Meal / Workout và lần ghi
+    nhật ký gần nhất. Cập nhật dần qua tracker.signals để trang staff chỉ
+    cần JOIN 1 bảng thay vì COUNT trên toàn bộ nhật ký.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="activity"
+    )
+    meal_count = models.PositiveIntegerField(default=0)
+    workout_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["last_activity_at"], name="tracker_act_last_idx"),
+            models.Index(fields=["meal_count"], name="tracker_act_meals_idx"),
+            models.Index(fields=["workout_count"], name="tracker_act_workouts_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.meal_count} bữa, {self.workout_count} buổi tập"
+
+
+# ============================
+#   CHANGE FEED
+# ============================
+class ChangeLog(models.Model):
+    """
+    Change feed (tracker/changes.py): mỗi lần lưu / xoá Meal, Workout, Goal,
+    Profile thêm 1 dòng, id tăng dần chính là version. Dòng op="delete" là
+    dấu xoá (giữ client_id cho API đồng bộ). Không ràng buộc FK tới user để
+    vẫn ghi được khi xoá user kéo theo nhật ký; dọn dòng cũ hơn
+    CHANGE_LOG_DAYS bằng `manage.py prune_change_log`.
+    """
+    KIND_CHOICES = [
+        ("meal", "Bữa ăn"),
+        ("workout", "Buổi tập"),
+        ("goal", "Mục tiêu"),
+        ("profile", "Hồ sơ"),
+    ]
+    OP_CHOICES = [
+        ("save", "Lưu"),
+        ("delete", "Xoá"),
+    ]
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    client_id = models.UUIDField(null=True, blank=True)
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="tracker_change_user_idx"),
+            models.Index(fields=["created_at"], name="tracker_change_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"v{self.pk} {self.op} {self.kind}#{self.object_id}"
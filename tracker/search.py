@@ -0,0 +1,340 @@
+# tracker/search.py
+"""
+Tìm kiếm trong dữ liệu của user: bữa ăn (tên món, khẩu phần), buổi tập
+(loại, ghi chú), mục tiêu (ghi chú) và danh mục món ăn.
+
+Hai backend, chọn theo settings.SEARCH_BACKEND ("auto" / "postgres" / "memory"):
+- postgres: full-text search (to_tsvector 'simple' + unaccent), xếp hạng bằng
+  ts_rank; cần extension unaccent (migration tracker 0005 tự tạo nếu có quyền).
+- memory: chỉ mục đảo (inverted index) trong process cho từng user, dựng 1
+  lần rồi dùng lại tới khi dữ liệu của user đổi. Phiên bản đọc từ DB (version
+  change feed của user; Count + Max(updated_at) của Food) nên worker nào
+  cũng thấy thay đổi do worker khác ghi. Dùng cho SQLite / Postgres thiếu
+  unaccent.
+
+Cả hai đều bỏ dấu tiếng Việt ("pho" khớp "phở", "dau" khớp "đậu") và khớp
+tiền tố cho từ cuối (gõ "ph" đã ra "phở").
+"""
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import date
+from itertools import chain
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, F, Func, Max, Value, When
+from django.db.models.functions import Coalesce, Concat, Lower
+from django.urls import reverse
+
+from chatbot.extract import fold
+from goals.models import Goal
+
+from .changes import user_version
+from .models import Food, Meal, Workout
+
+MAX_RESULTS = 500       # tổng số kết quả xếp hạng tối đa trước khi phân trang
+INDEX_CACHE_SIZE = 256  # số user giữ chỉ mục trong RAM mỗi process
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+KIND_LABELS = {
+    "meal": "Bữa ăn",
+    "workout": "Buổi tập",
+    "goal": "Mục tiêu",
+    "food": "Món ăn",
+}
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    kind: str
+    pk: int
+    title: str
+    snippet: str
+    day: Optional[date]
+    score: float
+
+    @property
+    def kind_label(self):
+        return KIND_LABELS.get(self.kind, self.kind)
+
+    @property
+    def url(self):
+        if self.kind == "meal":
+            return reverse("tracker:meals_edit", args=[self.pk])
+        if self.kind == "workout":
+            return reverse("tracker:workouts_edit", args=[self.pk])
+        if self.kind == "food":
+            return reverse("tracker:meals_create") + f"?food={self.pk}"
+        return reverse("goals_overview")
+
+
+def terms(text: str):
+    return _WORD_RE.findall(fold(text))
+
+
+# ==============================
+# Tài liệu (dùng chung cho 2 backend)
+# ==============================
+
+def _meal_hit(m, score):
+    return SearchHit(
+        "meal", m.pk, m.food.name,
+        " · ".join(filter(None, [m.get_meal_type_display(), m.portion, f"{m.calories_in:g} kcal"])),
+        m.date, score,
+    )
+
+
+def _workout_hit(w, score):
+    return SearchHit(
+        "workout", w.pk, w.get_type_display(),
+        " · ".join(filter(None, [f"{w.duration_min} phút", w.note])),
+        w.date, score,
+    )
+
+
+def _goal_hit(g, score):
+    return SearchHit(
+        "goal", g.pk, f"{g.get_type_display()} – {g.target_value:g} kg", g.note, g.start_date, score,
+    )
+
+
+def _food_hit(f, score):
+    return SearchHit("food", f.pk, f.name, f"{f.calories_per_100g:g} kcal/100g", None, score)
+
+
+# Nội dung được tìm của từng loại (2 backend phải index cùng các trường):
+# bữa ăn: tên món + khẩu phần + buổi; buổi tập: loại + ghi chú;
+# mục tiêu: loại + ghi chú; món ăn: tên.
+# Backend memory đọc bằng values_list (không dựng model) cho nhanh; mỗi
+# tài liệu là tuple (kind, pk, title, snippet, day, text).
+
+def _meal_docs(user):
+    labels = dict(Meal.MEAL_CHOICES)
+    rows = Meal.objects.filter(user=user).values_list(
+        "pk", "date", "meal_type", "portion", "calories_in", "food__name"
+    )
+    for pk, day, meal_type, portion, kcal, food in rows.iterator(chunk_size=5000):
+        label = labels.get(meal_type, meal_type)
+        snippet = " · ".join(filter(None, [label, portion, f"{kcal:g} kcal"]))
+        yield "meal", pk, food, snippet, day, f"{food} {portion or ''} {label}"
+
+
+def _workout_docs(user):
+    labels = dict(Workout.TYPE_CHOICES)
+    rows = Workout.objects.filter(user=user).values_list("pk", "date", "type", "duration_min", "note")
+    for pk, day, wtype, minutes, note in rows.iterator(chunk_size=5000):
+        label = labels.get(wtype, wtype)
+        yield "workout", pk, label, " · ".join(filter(None, [f"{minutes} phút", note])), day, f"{label} {note or ''}"
+
+
+def _goal_docs(user):
+    labels = dict(Goal.GOAL_TYPE_CHOICES)
+    rows = Goal.objects.filter(user=user).values_list("pk", "start_date", "type", "target_value", "note")
+    for pk, day, gtype, target, note in rows:
+        label = labels.get(gtype, gtype)
+        yield "goal", pk, f"{label} – {target:g} kg", note, day, f"{label} {note or ''}"
+
+
+def _food_docs():
+    for pk, name, kcal in Food.objects.values_list("pk", "name", "calories_per_100g").iterator(chunk_size=5000):
+        yield "food", pk, name, f"{kcal:g} kcal/100g", None, name
+
+
+# ==============================
+# Backend "memory": chỉ mục đảo trong process
+# ==============================
+
+def _foods_version():
+    # thêm / sửa -> Max(updated_at) đổi, xoá -> Count đổi
+    agg = Food.objects.aggregate(n=Count("pk"), at=Max("updated_at"))
+    return agg["n"], agg["at"]
+
+
+class InvertedIndex:
+    """term -> {doc_id: tf}; danh sách term đã sort để khớp tiền tố bằng bisect."""
+
+    def __init__(self, docs):
+        self.docs = []
+        self.order = []  # khoá phụ khi bằng điểm: ngày mới hơn, pk lớn hơn trước
+        postings = defaultdict(dict)
+        fold_cache = {}
+        for doc in docs:
+            doc_id = len(self.docs)
+            self.docs.append(doc[:5])
+            self.order.append(((doc[4].toordinal() if doc[4] else 0), doc[1]))
+            text = doc[5]
+            # nhiều dòng trùng nội dung (cùng món, cùng khẩu phần) -> tách từ 1 lần
+            toks = fold_cache.get(text)
+            if toks is None:
+                toks = fold_cache[text] = terms(text)
+            for t in toks:
+                plist = postings[t]
+                plist[doc_id] = plist.get(doc_id, 0) + 1
+        self.postings = dict(postings)
+        self.sorted_terms = sorted(self.postings)
+        self.n = len(self.docs) or 1
+
+    def _prefix_terms(self, prefix):
+        i = bisect_left(self.sorted_terms, prefix)
+        out = []
+        while i < len(self.sorted_terms) and self.sorted_terms[i].startswith(prefix):
+            out.append(self.sorted_terms[i])
+            i += 1
+        return out
+
+    def search(self, q_terms):
+        """Mọi từ đều phải khớp (AND); từ cuối khớp tiền tố. Trả về {doc_id: score}."""
+        scores = None
+        for pos, t in enumerate(q_terms):
+            matched = self._prefix_terms(t) if pos == len(q_terms) - 1 else [t]
+            term_scores = defaultdict(float)
+            for term in matched:
+                plist = self.postings.get(term)
+                if not plist:
+                    continue
+                idf = math.log(1 + self.n / len(plist))
+                exact = 1.0 if term == t else 0.5  # khớp nguyên từ xếp trên khớp tiền tố
+                for doc_id, tf in plist.items():
+                    term_scores[doc_id] += idf * exact * (1 + math.log(tf)) if tf > 1 else idf * exact
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {d: s + term_scores[d] for d, s in scores.items() if d in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def top(self, q_terms, limit):
+        """(số tài liệu khớp, [SearchHit] tốt nhất)."""
+        scores = self.search(q_terms)
+        order = self.order
+        best = heapq.nlargest(limit, scores.items(), key=lambda kv: (kv[1], order[kv[0]]))
+        return len(scores), [SearchHit(*self.docs[d], round(s, 4)) for d, s in best]
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cached_index(key, build):
+    with _lock:
+        idx = _indexes.get(key)
+        if idx is not None:
+            _indexes.move_to_end(key)
+            return idx
+    idx = build()
+    with _lock:
+        _indexes[key] = idx
+        # bỏ phiên bản cũ của cùng scope + giới hạn số chỉ mục giữ trong RAM
+        for k in [k for k in _indexes if k[0] == key[0] and k != key]:
+            del _indexes[k]
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return idx
+
+
+def user_index(user, foods_version=None) -> InvertedIndex:
+    # tên món nằm trong tài liệu bữa ăn -> khoá gồm cả phiên bản Food
+    if foods_version is None:
+        foods_version = _foods_version()
+    key = (user.pk, user_version(user.pk), foods_version)
+
+    def build():
+        return InvertedIndex(chain(_meal_docs(user), _workout_docs(user), _goal_docs(user)))
+
+    return _cached_index(key, build)
+
+
+def food_index(foods_version=None) -> InvertedIndex:
+    if foods_version is None:
+        foods_version = _foods_version()
+    return _cached_index(("foods", foods_version), lambda: InvertedIndex(_food_docs()))
+
+
+def _search_memory(user, q_terms, limit):
+    foods_version = _foods_version()
+    n_user, user_hits = user_index(user, foods_version).top(q_terms, limit)
+    n_food, food_hits = food_index(foods_version).top(q_terms, limit)
+    return n_user + n_food, user_hits + food_hits
+
+
+# ==============================
+# Backend "postgres": full-text search
+# ==============================
+
+def _search_postgres(user, q_terms, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    # term đã lọc [a-z0-9]+ nên ghép thẳng vào tsquery được; từ cuối khớp tiền tố
+    query = SearchQuery(
+        " & ".join(q_terms[:-1] + [q_terms[-1] + ":*"]), config="simple", search_type="raw"
+    )
+
+    def label(field, choices):
+        # nhãn tiếng Việt của choices ("run" -> "Chạy bộ") để tìm được bằng chữ hiển thị
+        return Case(*[When(**{field: k}, then=Value(v)) for k, v in choices], default=Value(""))
+
+    def ranked(qs, *fields):
+        parts = []
+        for f in fields:
+            expr = f if not isinstance(f, str) else Coalesce(F(f), Value(""))
+            parts.extend([expr, Value(" ")])
+        vector = SearchVector(Func(Lower(Concat(*parts)), function="unaccent"), config="simple")
+        return (
+            qs.annotate(document=vector, rank=SearchRank(vector, query))
+            .filter(document=query)
+            .order_by("-rank")[:limit]
+        )
+
+    hits = []
+    meals = Meal.objects.filter(user=user).select_related("food")
+    for m in ranked(meals, "food__name", "portion", label("meal_type", Meal.MEAL_CHOICES)):
+        hits.append(_meal_hit(m, m.rank))
+    for w in ranked(Workout.objects.filter(user=user), label("type", Workout.TYPE_CHOICES), "note"):
+        hits.append(_workout_hit(w, w.rank))
+    for g in ranked(Goal.objects.filter(user=user), label("type", Goal.GOAL_TYPE_CHOICES), "note"):
+        hits.append(_goal_hit(g, g.rank))
+    for f in ranked(Food.objects.all(), "name"):
+        hits.append(_food_hit(f, f.rank))
+    return hits
+
+
+_pg_ready = None
+
+
+def backend_name() -> str:
+    """Backend dùng thực tế: postgres chỉ khi có extension unaccent."""
+    global _pg_ready
+    choice = getattr(settings, "SEARCH_BACKEND", "auto")
+    if choice == "memory" or connection.vendor != "postgresql":
+        return "memory"
+    if _pg_ready is None:
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'unaccent'")
+            _pg_ready = cur.fetchone() is not None
+    return "postgres" if _pg_ready else "memory"
+
+
+def search(user, query: str, limit: int = MAX_RESULTS):
+    """
+    Kết quả đã xếp hạng (điểm giảm dần, cùng điểm thì mới hơn trước) trong
+    dữ liệu của `user` + danh mục món ăn.
+    Trả về (tổng số kết quả khớp, list[SearchHit] tối đa `limit` phần tử).
+    """
+    q_terms = terms(query)
+    if not q_terms:
+        return 0, []
+    if backend_name() == "postgres":
+        hits = _search_postgres(user, q_terms, limit)
+        total = len(hits)
+    else:
+        total, hits = _search_memory(user, q_terms, limit)
+    hits.sort(key=lambda h: (h.score, h.day or date.min, h.pk), reverse=True)
+    return total, hits[:limit]
@@ -1,20 +1,26 @@
 # tracker/services.py
-from django.db.models import Sum, Count
-from datetime import timedelta, date
+from django.contrib.auth.models import User
+from django.db.models import F, Max, Sum, Count
+from django.db.models.functions import Greatest
+from datetime import datetime, time, timedelta, date
 from goals.models import Goal
-from .models import Workout, Meal
+from goals import progress as goal_progress
+from . import changes
+from .models import Workout, Meal, ChangeLog, UserActivity
 from django.utils import timezone
 import json 
-from accounts.models import Profile
-def workouts_summary(user):
+from accounts.models import Profile, ProfileMetric
+def workouts_summary(user, request=None):
     """
     Tổng hợp dữ liệu tập luyện:
     - Nếu có Goal đang 'in_progress' → chỉ tính trong khoảng start_date → deadline
     - Nếu không có Goal → tính toàn bộ
-    Đồng thời trả thêm thông tin về kcal cần đốt cho mục tiêu.
+    Đồng thời trả thêm thông tin về kcal cần đốt cho mục tiêu; tiến độ lấy từ
+    goals.progress (cùng số liệu với trang mục tiêu).
     """
     qs = Workout.objects.filter(user=user)
-    active_goal = Goal.get_active_goal(user)
+    user_goals = goal_progress.goals_for(user, request)
+    active_goal = user_goals.active
     goal_range_text = None
 
     if active_goal and active_goal.start_date and active_goal.deadline:
@@ -41,10 +47,7 @@ def workouts_summary(user):
     if active_goal:
         goal_total_required = active_goal.total_required_deficit_kcal or 0
         goal_daily_required = active_goal.required_deficit_per_day or 0
-        if goal_total_required > 0:
-            goal_kcal_progress_pct = min(
-                100, round(total_kcal / goal_total_required * 100, 1)
-            )
+        goal_kcal_progress_pct = user_goals.of(active_goal).progress_pct
 
     return {
         "total_minutes": agg["total_minutes"] or 0,
@@ -260,4 +263,143 @@ def nutrition_summary_for_user(user, today=None, days_back=7):
         "chart_calories": chart_calories,
         "chart_tdee": chart_tdee,
         "top_foods": top_foods,
-    }
\ No newline at end of file
+    }
+
+
+def workout_weights(user, days):
+    """
+    Hàm ngày -> cân nặng có hiệu lực (như Workout._get_weight) cho nhiều
+    ngày, chỉ với 3 truy vấn: dùng khi tính calories_out hàng loạt.
+    """
+    weights = ProfileMetric.weights_as_of(user, days)
+    profile = Profile.objects.filter(user=user).only("weight_kg").first()
+    fallback = float(profile.weight_kg) if profile and profile.weight_kg else 70.0
+    return lambda day: weights.get(day) or fallback
+
+
+def recalc_workout_calories(user, start=None, end=None, batch_size=500):
+    """
+    Tính lại calories_out cho các Workout của user theo cân nặng có hiệu lực
+    vào từng ngày tập. Cân nặng lấy bằng 1 as-of join theo lô
+    (ProfileMetric.weights_as_of) thay vì 1 truy vấn cho mỗi buổi tập.
+    Trả về số buổi tập đã thay đổi.
+    """
+    qs = Workout.objects.filter(user=user)
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    workouts = list(qs.only(
+        "id", "user", "client_id", "date", "type", "duration_min", "distance_km", "steps", "calories_out",
+    ))
+    if not workouts:
+        return 0
+
+    weight_on = workout_weights(user, {w.date for w in workouts})
+
+    changed = []
+    now = timezone.now()
+    for w in workouts:
+        kcal = w.compute_calories(weight_on(w.date))
+        if kcal != w.calories_out:
+            w.calories_out = kcal
+            w.updated_at = now
+            changed.append(w)
+
+    Workout.objects.bulk_update(changed, ["calories_out", "updated_at"], batch_size=batch_size)
+    if changed:
+        changes.record_bulk(changed)
+        # bulk_update không phát signal -> tính lại tổng chạy tiến độ mục tiêu
+        for goal in Goal.objects.filter(user=user):
+            goal_progress.rebuild(goal)
+    return len(changed)
+
+
+def bump_activity(user_id, field=None, delta=0, touch=True):
+    """
+    Cộng delta vào meal_count / workout_count của UserActivity (F(), không
+    race) và cập nhật lần hoạt động gần nhất. Chưa có dòng rollup -> dựng lại.
+
+    delta < 0 (post_delete) không dựng lại: khi xoá user, Collector xoá dòng
+    UserActivity trước Meal / Workout, dựng lại giữa chừng sẽ chèn dòng mới
+    rồi trừ xuống âm. Số đếm cũng không xuống dưới 0.
+    """
+    values = {}
+    if field and delta:
+        values[field] = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+    if touch:
+        values["last_activity_at"] = timezone.now()
+    if not values:
+        return
+    if not UserActivity.objects.filter(user_id=user_id).update(**values) and delta >= 0:
+        rebuild_user_activity([user_id])
+
+
+def rebuild_user_activity(user_ids=None, batch_size=1000):
+    """
+    Dựng lại rollup UserActivity bằng 2 truy vấn GROUP BY (dùng sau
+    bulk_create / import dữ liệu hoặc khi nghi số liệu lệch).
+    Lần hoạt động gần nhất lấy theo ngày nhật ký mới nhất nếu chưa có.
+    Trả về số user đã xử lý.
+    """
+    meals = Meal.objects.all()
+    workouts = Workout.objects.all()
+    users = User.objects.all()
+    existing = UserActivity.objects.all()
+    if user_ids is not None:
+        meals = meals.filter(user_id__in=user_ids)
+        workouts = workouts.filter(user_id__in=user_ids)
+        users = users.filter(pk__in=user_ids)
+        existing = existing.filter(user_id__in=user_ids)
+
+    def grouped(qs):
+        rows = qs.values_list("user_id").annotate(n=Count("id"), last=Max("date")).order_by()
+        return {uid: (n, last) for uid, n, last in rows}
+
+    meal_stats = grouped(meals)
+    workout_stats = grouped(workouts)
+    last_seen = dict(existing.values_list("user_id", "last_activity_at"))
+    tz = timezone.get_current_timezone()
+
+    rows = []
+    for uid in users.values_list("pk", flat=True).iterator():
+        n_meals, last_meal = meal_stats.get(uid, (0, None))
+        n_workouts, last_workout = workout_stats.get(uid, (0, None))
+        last = last_seen.get(uid)
+        if last is None:
+            last_day = max(filter(None, (last_meal, last_workout)), default=None)
+            if last_day:
+                last = datetime.combine(last_day, time.min, tzinfo=tz)
+        rows.append(UserActivity(
+            user_id=uid, meal_count=n_meals, workout_count=n_workouts, last_activity_at=last,
+        ))
+
+    UserActivity.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["meal_count", "workout_count", "last_activity_at"],
+    )
+    return len(rows)
+
+
+def prune_change_log(days=None, batch_size=1000) -> int:
+    """
+    Xoá dòng change feed cũ hơn CHANGE_LOG_DAYS theo lô (không bảng con,
+    không signal -> QuerySet.delete chỉ là 1 câu DELETE); luôn giữ dòng mới nhất để changes.is_stale còn mốc so sánh.
+    Bên đọc có version cũ hơn mốc này phải quét lại toàn bộ.
+    """
+    from django.conf import settings
+
+    newest = ChangeLog.objects.order_by("-id").values_list("id", flat=True).first()
+    if newest is None:
+        return 0
+    cutoff = timezone.now() - timedelta(days=days if days is not None else settings.CHANGE_LOG_DAYS)
+    stale = ChangeLog.objects.filter(created_at__lt=cutoff, id__lt=newest)
+    total = 0
+    while True:
+        ids = list(stale.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += ChangeLog.objects.filter(pk__in=ids).delete()[0]
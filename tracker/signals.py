@@ -0,0 +1,58 @@
+# tracker/signals.py
+"""
+Giữ rollup UserActivity (số Meal / Workout, lần ghi nhật ký gần nhất)
+khớp với dữ liệu; đếm số lượt ghi / xoá cho /metrics; ghi change feed (tracker.changes) cho Meal /
+Workout / Goal / Profile (chỉ mục tìm kiếm tracker.search và GET có điều
+kiện healthmanager.conditional lấy phiên bản từ change feed). bulk_create / QuerySet.delete theo
+lô không phát signal -> chạy `manage.py rebuild_user_activity` sau các
+thao tác hàng loạt.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Profile
+from goals.models import Goal
+from healthmanager.metrics import TRACKER_ENTRIES
+
+from . import changes
+from .models import Meal, UserActivity, Workout
+from .services import bump_activity
+
+COUNT_FIELDS = {Meal: "meal_count", Workout: "workout_count"}
+
+
+@receiver(post_save, sender=User)
+def create_user_activity(sender, instance, created, **kwargs):
+    if created:
+        UserActivity.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Meal)
+@receiver(post_save, sender=Workout)
+def log_saved(sender, instance, created, **kwargs):
+    bump_activity(instance.user_id, COUNT_FIELDS[sender], 1 if created else 0)
+    TRACKER_ENTRIES.inc(sender._meta.model_name, "created" if created else "updated")
+
+
+@receiver(post_delete, sender=Meal)
+@receiver(post_delete, sender=Workout)
+def log_deleted(sender, instance, **kwargs):
+    bump_activity(instance.user_id, COUNT_FIELDS[sender], -1, touch=False)
+    TRACKER_ENTRIES.inc(sender._meta.model_name, "deleted")
+
+
+@receiver(post_save, sender=Meal)
+@receiver(post_save, sender=Workout)
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Profile)
+def record_saved(sender, instance, **kwargs):
+    changes.record(instance)
+
+
+@receiver(post_delete, sender=Meal)
+@receiver(post_delete, sender=Workout)
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Profile)
+def record_deleted(sender, instance, **kwargs):
+    changes.record(instance, "delete")
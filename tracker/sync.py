@@ -0,0 +1,227 @@
+# tracker/sync.py
+"""
+Đồng bộ nhật ký ăn uống / tập luyện với app mobile ghi offline
+(POST /tracker/api/sync/): 1 request = 1 lô thêm / sửa / xoá theo client_id
+(1 transaction, upsert bằng bulk_create) + các thay đổi phía server kể từ
+lần đồng bộ trước.
+
+Body:
+    {"since": "<sync token>" | null,
+     "meals":    [{"client_id", "date", "meal_type", "food_id", "quantity_gram", "portion"}],
+     "workouts": [{"client_id", "date", "type", "duration_min", "distance_km", "steps", "note"}],
+     "deleted":  {"meals": [client_id, ...], "workouts": [client_id, ...]}}
+
+Mỗi phần tử là bản ghi đầy đủ (ghi đè bản trên server, client_id trùng ->
+sửa). Trả về token mới + mọi Meal / Workout đổi và client_id đã xoá kể từ
+`since`; "full": true = token trống / quá cũ, client thay toàn bộ dữ liệu.
+
+Sync token là version của change feed (tracker/changes.py) lúc trả lời.
+"""
+import math
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from goals import progress as goal_progress
+from goals.models import Goal
+from healthmanager.metrics import TRACKER_ENTRIES
+
+from . import changes
+from .changes import meal_json, workout_json
+from .models import Food, Meal, Workout
+from .services import bump_activity, rebuild_user_activity, workout_weights
+
+# trường client gửi (ngoài client_id / food_id)
+FIELDS = {
+    Meal: ("date", "meal_type", "portion", "quantity_gram"),
+    Workout: ("date", "type", "duration_min", "distance_km", "steps", "note"),
+}
+KINDS = {"meals": Meal, "workouts": Workout}
+FINITE_FIELDS = {Meal: ("quantity_gram",), Workout: ("distance_km",)}
+
+
+def clean_batch(user, payload):
+    """
+    Kiểm tra lô client gửi (không ghi gì). Trả về (batch, None) hoặc
+    (None, lỗi): lỗi là list {"kind", "index", "errors"}.
+    """
+    errors = []
+    deleted_ids = payload.get("deleted") or {}
+    if (
+        not isinstance(deleted_ids, dict)
+        or not all(isinstance(payload.get(k) or [], list) for k in KINDS)
+        or not all(isinstance(v or [], list) for v in deleted_ids.values())
+    ):
+        return None, [{"errors": {"__all__": ["meals / workouts phải là list, deleted là object chứa các list."]}}]
+    size = sum(len(payload.get(k) or []) for k in KINDS) + sum(
+        len(v or []) for v in deleted_ids.values()
+    )
+    if size > settings.SYNC_MAX_BATCH:
+        return None, [{"errors": {"__all__": [f"Tối đa {settings.SYNC_MAX_BATCH} thao tác mỗi lần đồng bộ."]}}]
+
+    since = payload.get("since")
+    if since in (None, ""):
+        since = None
+    else:
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            since = -1
+        if since < 0:
+            errors.append({"errors": {"since": ["Sync token không hợp lệ."]}})
+
+    foods = Food.objects.in_bulk({
+        item.get("food_id") for item in payload.get("meals") or []
+        if isinstance(item, dict) and isinstance(item.get("food_id"), int)
+    })
+
+    upserts = {}
+    for kind, model in KINDS.items():
+        # client_id lặp trong cùng lô: giữ bản sau cùng
+        objs = {}
+        for index, item in enumerate(payload.get(kind) or []):
+            obj, item_errors = _clean_item(user, model, item, foods)
+            if item_errors:
+                errors.append({"kind": kind, "index": index, "errors": item_errors})
+            else:
+                objs[obj.client_id] = obj
+        upserts[model] = list(objs.values())
+
+    deleted = {}
+    for kind, ids in deleted_ids.items():
+        if kind not in KINDS:
+            errors.append({"kind": kind, "errors": {"deleted": ["Loại không hợp lệ."]}})
+            continue
+        try:
+            deleted[KINDS[kind]] = {uuid.UUID(str(v)) for v in ids or []}
+        except ValueError:
+            errors.append({"kind": kind, "errors": {"deleted": ["client_id không hợp lệ."]}})
+
+    if errors:
+        return None, errors
+    return {"since": since, "upserts": upserts, "deleted": deleted}, None
+
+
+def _clean_item(user, model, item, foods):
+    if not isinstance(item, dict):
+        return None, {"__all__": ["Cần 1 object."]}
+    errors = {}
+    obj = model(user=user)
+    try:
+        obj.client_id = uuid.UUID(str(item.get("client_id")))
+    except ValueError:
+        errors["client_id"] = ["client_id phải là UUID."]
+    for field in FIELDS[model]:
+        if field in item:
+            setattr(obj, field, item[field])
+
+    if model is Meal:
+        food = foods.get(item.get("food_id"))
+        if food is None:
+            errors["food_id"] = ["Món ăn không tồn tại."]
+        else:
+            obj.food = food
+
+    try:
+        obj.full_clean(exclude=["user", "food", "client_id"], validate_unique=False, validate_constraints=False)
+    except ValidationError as exc:
+        errors.update(exc.message_dict)
+    # như form web (forms.FloatField): không nhận inf / nan ("1e400")
+    for field in FINITE_FIELDS[model]:
+        value = getattr(obj, field)
+        if field not in errors and isinstance(value, float) and not math.isfinite(value):
+            errors[field] = ["Giá trị phải là số hữu hạn."]
+    # như MealForm: khối lượng tối thiểu 1 gram
+    if model is Meal and "quantity_gram" not in errors and not obj.quantity_gram >= 1:
+        errors["quantity_gram"] = ["Khối lượng phải từ 1 gram."]
+    return obj, errors
+
+
+@transaction.atomic
+def apply_batch(user, batch):
+    """
+    Ghi lô đã kiểm tra trong 1 transaction rồi trả về response cho client:
+    {"token", "full", "applied", "meals", "workouts", "deleted"}.
+    """
+    applied = {"created": 0, "updated": 0, "deleted": 0}
+    upserts = batch["upserts"]
+
+    if upserts[Workout]:
+        weight_on = workout_weights(user, {w.date for w in upserts[Workout]})
+        for w in upserts[Workout]:
+            w.calories_out = w.compute_calories(weight_on(w.date))
+    for m in upserts[Meal]:
+        m.calories_in = m.compute_calories(m.food)
+
+    for model, objs in upserts.items():
+        if not objs:
+            continue
+        ids = [o.client_id for o in objs]
+        existing = set(model.objects.filter(user=user, client_id__in=ids).values_list("client_id", flat=True))
+        model.objects.bulk_create(
+            objs,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["user", "client_id"],
+            update_fields=[*FIELDS[model], "food", "calories_in", "updated_at"] if model is Meal
+            else [*FIELDS[model], "calories_out", "updated_at"],
+        )
+        # bulk_create không phát signal -> ghi change feed theo lô
+        pks = dict(model.objects.filter(user=user, client_id__in=ids).values_list("client_id", "pk"))
+        for o in objs:
+            o.pk = pks[o.client_id]
+        changes.record_bulk(objs)
+
+        name = model._meta.model_name
+        applied["created"] += len(objs) - len(existing)
+        applied["updated"] += len(existing)
+        TRACKER_ENTRIES.inc(name, "created", amount=len(objs) - len(existing))
+        TRACKER_ENTRIES.inc(name, "updated", amount=len(existing))
+
+    if upserts[Meal] or upserts[Workout]:
+        _after_bulk_write(user)
+
+    # xoá qua QuerySet.delete: signal từng dòng (rollup, mục tiêu, change feed)
+    for model, ids in batch["deleted"].items():
+        if ids:
+            applied["deleted"] += model.objects.filter(user=user, client_id__in=ids).delete()[0]
+
+    return {"applied": applied, **changes_since(user, batch["since"])}
+
+
+def _after_bulk_write(user):
+    # bulk_create không phát signal (tracker.signals, goals.signals) -> làm bù 1 lần cho cả lô
+    rebuild_user_activity([user.pk])
+    bump_activity(user.pk)
+    for goal in Goal.objects.filter(user=user):
+        goal_progress.rebuild(goal)
+
+
+def changes_since(user, since):
+    """Meal / Workout đổi và client_id đã xoá sau version `since` (None = toàn bộ)."""
+    version = changes.current_version()
+    full = since is None or changes.is_stale(since)
+
+    meals = Meal.objects.filter(user=user).select_related("food").order_by("updated_at")
+    workouts = Workout.objects.filter(user=user).order_by("updated_at")
+    deleted = {"meals": [], "workouts": []}
+    if not full:
+        saved = {"meal": [], "workout": []}
+        entries = changes.iter_changes(since, user=user, kinds=("meal", "workout"), until=version)
+        for (kind, pk), e in changes.latest_per_row(entries).items():
+            if e.op == "delete":
+                deleted[kind + "s"].append(str(e.client_id))
+            else:
+                saved[kind].append(pk)
+        meals = meals.filter(pk__in=saved["meal"])
+        workouts = workouts.filter(pk__in=saved["workout"])
+
+    return {
+        "token": str(version),
+        "full": full,
+        "meals": [meal_json(m) for m in meals],
+        "workouts": [workout_json(w) for w in workouts],
+        "deleted": deleted,
+    }
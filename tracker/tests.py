@@ -0,0 +1,137 @@
+import json
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from goals.models import Goal
+
+from .models import ChangeLog, Food, Meal, UserActivity, Workout
+from .services import bump_activity, prune_change_log
+
+
+class UserActivityRollupTests(TestCase):
+    """Rollup UserActivity khi xoá nhật ký / xoá user (tracker.signals)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="an", password="x")
+        self.food = Food.objects.create(name="Phở bò", calories_per_100g=120)
+
+    def _log(self, n_meals=2, n_workouts=2):
+        for _ in range(n_meals):
+            Meal.objects.create(user=self.user, food=self.food, quantity_gram=200, date=date(2026, 1, 5))
+        for _ in range(n_workouts):
+            Workout.objects.create(user=self.user, type="run", duration_min=30, date=date(2026, 1, 5))
+
+    def test_counts_follow_saves_and_deletes(self):
+        self._log()
+        act = UserActivity.objects.get(user=self.user)
+        self.assertEqual((act.meal_count, act.workout_count), (2, 2))
+
+        Meal.objects.filter(user=self.user).first().delete()
+        act.refresh_from_db()
+        self.assertEqual(act.meal_count, 1)
+
+    def test_delete_user_with_history(self):
+        self._log()
+        pk = self.user.pk
+        self.user.delete()
+        self.assertFalse(User.objects.filter(pk=pk).exists())
+        self.assertFalse(UserActivity.objects.filter(user_id=pk).exists())
+        self.assertFalse(Meal.objects.filter(user_id=pk).exists())
+
+    def test_decrement_never_goes_below_zero_or_recreates_row(self):
+        self._log(n_meals=1, n_workouts=0)
+        UserActivity.objects.filter(user=self.user).update(meal_count=0)
+        bump_activity(self.user.pk, "meal_count", -1, touch=False)
+        self.assertEqual(UserActivity.objects.get(user=self.user).meal_count, 0)
+
+        UserActivity.objects.filter(user=self.user).delete()
+        bump_activity(self.user.pk, "meal_count", -1, touch=False)
+        self.assertFalse(UserActivity.objects.filter(user=self.user).exists())
+
+
+class SyncBatchTests(TestCase):
+    """POST /tracker/api/sync/ (tracker.sync)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="chi", password="x")
+        self.food = Food.objects.create(name="Bún chả", calories_per_100g=180)
+        self.goal = Goal.objects.create(
+            user=self.user, type="lose_weight", target_value=55, start_weight_kg=60,
+            start_date=date(2026, 1, 1), deadline=date(2026, 3, 1),
+        )
+        self.client.force_login(self.user)
+
+    def _sync(self, **payload):
+        payload.setdefault("since", None)
+        return self.client.post(
+            "/tracker/api/sync/", json.dumps(payload),
+            content_type="application/json", HTTP_HOST="127.0.0.1",
+        )
+
+    def _meal_item(self, day="2026-01-05", **extra):
+        return {
+            "client_id": str(uuid.uuid4()), "date": day, "meal_type": "lunch",
+            "food_id": self.food.pk, "quantity_gram": 200, "portion": "", **extra,
+        }
+
+    def test_upsert_then_delete_two_meals_same_day(self):
+        items = [self._meal_item(), self._meal_item(), self._meal_item(day="2026-01-06")]
+        resp = self._sync(meals=items)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["applied"]["created"], 3)
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.meal_days, 2)
+        self.assertEqual(UserActivity.objects.get(user=self.user).meal_count, 3)
+
+        token = resp.json()["token"]
+        resp = self._sync(since=token, deleted={"meals": [items[0]["client_id"], items[1]["client_id"]]})
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(body["applied"]["deleted"], 2)
+        self.assertCountEqual(body["deleted"]["meals"], [items[0]["client_id"], items[1]["client_id"]])
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.meal_days, 1)
+        self.assertAlmostEqual(self.goal.kcal_in_total, 360)
+        self.assertEqual(UserActivity.objects.get(user=self.user).meal_count, 1)
+
+    def test_resend_same_client_id_updates(self):
+        item = self._meal_item()
+        self._sync(meals=[item])
+        resp = self._sync(meals=[{**item, "quantity_gram": 100}])
+        self.assertEqual(resp.json()["applied"], {"created": 0, "updated": 1, "deleted": 0})
+        self.assertEqual(Meal.objects.get(user=self.user).calories_in, 180)
+
+    def test_rejects_malformed_batches(self):
+        bad = [
+            {"meals": {"x": 1}},
+            {"deleted": {"meals": "abc"}},
+            {"deleted": {"meals": ["not-a-uuid"]}},
+            {"meals": [self._meal_item(quantity_gram="nan")]},
+            {"meals": [self._meal_item(quantity_gram=1e999)]},
+        ]
+        for payload in bad:
+            with self.subTest(payload=payload):
+                self.assertEqual(self._sync(**payload).status_code, 400)
+        self.assertFalse(Meal.objects.filter(user=self.user).exists())
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self._sync().status_code, 401)
+
+
+class PruneChangeLogTests(TestCase):
+    def test_prunes_old_rows_but_keeps_newest(self):
+        user = User.objects.create_user(username="dung", password="x")
+        food = Food.objects.create(name="Bánh mì", calories_per_100g=260)
+        for _ in range(3):
+            Meal.objects.create(user=user, food=food, meal_type="breakfast", date=date(2026, 1, 5))
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=400))
+        newest = ChangeLog.objects.order_by("-id").first()
+
+        deleted = prune_change_log(days=30, batch_size=2)
+        self.assertGreater(deleted, 0)
+        self.assertEqual(list(ChangeLog.objects.values_list("id", flat=True)), [newest.id])
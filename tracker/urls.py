@@ -16,4 +16,8 @@ urlpatterns = [
     path("meals/new/", views.meals_create, name="meals_create"),
     path("meals/<int:pk>/edit/", views.meals_edit, name="meals_edit"),
     path("meals/<int:pk>/delete/", views.meals_delete, name="meals_delete"),
+
+    # --- Đồng bộ app mobile ---
+    path("api/sync/", views.sync_api, name="sync_api"),
+    path("api/changes/", views.changes_api, name="changes_api"),
 ]
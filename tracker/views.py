@@ -2,6 +2,11 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.core.paginator import Paginator
 from django.db.models import Sum
+from django.http import JsonResponse
+from django.conf import settings
+from django.views.decorators.http import require_GET, require_POST
+from healthmanager.conditional import user_data_page
+from . import changes, sync
 from .models import Workout, Meal, Food
 from .forms import WorkoutForm, MealForm
 from .services import workouts_summary ,meals_summary
@@ -110,7 +115,8 @@ def meals_create(request):
             obj.save()
             return redirect("tracker:meals_list")
     else:
-        form = MealForm()
+        # ?food=<id> (vd từ kết quả tìm kiếm) -> chọn sẵn món
+        form = MealForm(initial={"food": request.GET.get("food")})
     ctx = {
         "form": form,
         "food_kcal_json": _food_kcal_json(),
@@ -146,9 +152,10 @@ def meals_delete(request, pk):
     return render(request, "confirm_delete.html", {"obj": obj})
 
 @login_required
+@user_data_page
 def workouts_list(request):
     items = Workout.objects.filter(user=request.user).order_by("-date")
-    summary = workouts_summary(request.user)
+    summary = workouts_summary(request.user, request)
 
     return render(
         request,
@@ -162,6 +169,7 @@ def workouts_list(request):
 
 # ============ LIST MEAL ============
 @login_required
+@user_data_page
 def meals_list(request):
     items = Meal.objects.filter(user=request.user).order_by("-date")
     summary = meals_summary(request.user)
@@ -173,4 +181,46 @@ def meals_list(request):
             "items": items,
             "summary": summary,
         }
-    )
\ No newline at end of file
+    )
+
+
+# ============ API ĐỒNG BỘ (APP MOBILE) ============
+@require_POST
+def sync_api(request):
+    """
+    Đồng bộ 1 lô Meal / Workout ghi offline, trả về thay đổi phía server
+    kể từ sync token (định dạng xem tracker/sync.py). Đăng nhập bằng
+    session + header X-CSRFToken như form web.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "login required"}, status=401)
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    batch, errors = sync.clean_batch(request.user, payload)
+    if errors:
+        return JsonResponse({"error": "invalid batch", "errors": errors}, status=400)
+    return JsonResponse(sync.apply_batch(request.user, batch))
+
+
+@require_GET
+def changes_api(request):
+    """
+    Change feed của user đăng nhập: ?since=<version>&limit=<n>, trả về các
+    thay đổi sau version đó + "next" cho lần gọi sau (xem tracker/changes.py).
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "login required"}, status=401)
+    try:
+        since = int(request.GET.get("since") or 0)
+        limit = int(request.GET.get("limit") or settings.CHANGE_FEED_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({"error": "since / limit phải là số"}, status=400)
+    if since < 0 or limit < 1:
+        return JsonResponse({"error": "since / limit phải là số"}, status=400)
+    limit = min(limit, settings.CHANGE_FEED_PAGE_SIZE)
+    return JsonResponse(changes.feed_page(request.user, since, limit))